@@ -9,6 +9,7 @@ export interface OpeningHours {
 }
 
 export interface Library {
+  code: string;
   long_name: string;
   url: string | null;
   building: string | null;
@@ -5,40 +5,344 @@ HTTP API server for PlatzPilot - serves library data to mobile clients.
 
 import json
 import os
+import signal
+import socket
 import threading
 import time
 from datetime import datetime
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http import HTTPStatus
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 
-from tools.config import AppConfig
-from tools.log import setup_logger
+from tools.config import AppConfig, file_stamp
+from tools.lazy import LazyMembers
+from tools.log import setup_logger, set_level, stop_listeners, AccessLogSampler
+from tools.ranking import RankingIndex
+from tools.ratelimit import ConcurrencyLimiter, RequestLimits, TokenBucketLimiter
+from tools.snapshot import SnapshotReader, EntryIndex
+from tools.timing import PhaseTimer
+
+class SiteResources(LazyMembers):
+    """
+    Readers and indexes over one site's published snapshots, created on first use.
+    
+    Args:
+        name (str): Site name, labels timed phases.
+        config (AppConfig): The site's config (see `AppConfig.site`).
+        timer (PhaseTimer): The application's startup phase timer.
+    """
+    
+    def __init__(self, name, config, timer):
+        super().__init__()
+        self.name = name
+        self.config = config
+        self.timer = timer
+    
+    def _phase(self, name):
+        return f"{self.name}.{name}"
+    
+    @property
+    def snapshot_reader(self):
+        return self._lazy("snapshot_reader", lambda: SnapshotReader(
+            os.path.join(self.config.ring_buffer_config, self.config.snapshot_file)))
+    
+    @property
+    def ranking(self):
+        return self._lazy("ranking", lambda: RankingIndex(
+            self.snapshot_reader, self.config.formatting_grouping, dict(self.config.max_seats)))
+    
+    @property
+    def wire(self):
+        def create():
+            # NumPy is only imported once the first binary body is requested
+            from tools.wire import WireIndex
+            return WireIndex(self.snapshot_reader)
+        return self._lazy("wire", create)
+    
+    @property
+    def recommendations(self):
+        return self._lazy("recommendations", lambda: EntryIndex(SnapshotReader(
+            os.path.join(self.config.ring_buffer_config, self.config.recommendations_file))))
+    
+    @property
+    def profiles(self):
+        """The site's OccupancyProfiles, or None until the collector has written them."""
+        from tools.profiles import OccupancyProfiles, has_profiles
+        
+        interval_minutes = self.config.fetch_interval // 60
+        if "profiles" not in self._members and not has_profiles(
+                self.config.ring_buffer_config, self.config.location_number, interval_minutes,
+                self.config.profile_config["bins"]):
+            # Checked before _lazy, so waiting for the files neither takes the lock nor records a phase
+            return None
+        return self._lazy("profiles", lambda: OccupancyProfiles(
+            self.config.ring_buffer_config, self.config.forecast_config["max_seats_list"],
+            interval_minutes=interval_minutes, read_only=True, **self.config.profile_config))
+    
+    @property
+    def forecaster(self):
+        def create():
+            # NumPy is only imported once the first forecast is requested
+            from tools.forecast import OnDemandForecaster
+            return OnDemandForecaster(
+                SnapshotReader(os.path.join(self.config.ring_buffer_config, self.config.model_snapshot_file)),
+                max_horizon=self.config.max_forecast_horizon)
+        return self._lazy("forecaster", create)
+
+
+class APIApplication(LazyMembers):
+    """
+    Per-process state shared by all request handlers.
+
+    Config, logger, access-log sampler and the sites' snapshot readers are
+    created on first use rather than at import time, so importing this module
+    is cheap and startup phases can be timed. `reload_config()` swaps in a new
+    config and the resources that depend on it while requests are served.
+    
+    Attributes:
+        reload_event (threading.Event): Set (e.g. on SIGHUP) to reload config.json right away.
+    """
+    
+    def __init__(self, config_path='config.json'):
+        super().__init__()
+        self.config_path = config_path
+        self.timer = PhaseTimer()
+        self.reload_event = threading.Event()
+        self._rejected_stamp = None
+    
+    @property
+    def config(self):
+        return self._lazy("config", lambda: AppConfig(self.config_path))
+    
+    @property
+    def logger(self):
+        return self._lazy("logger", lambda: setup_logger(
+            name="api_server", level=self.config.logging_config["level"], logger_dir=self.config.logger_config,
+            use_queue=self.config.logging_config["use_queue"]))
+    
+    @property
+    def access_log(self):
+        return self._lazy("access_log", lambda: AccessLogSampler(
+            self.logger,
+            sample_every=self.config.logging_config["access_log_sample_every"],
+            aggregate_seconds=self.config.logging_config["access_log_aggregate_seconds"]))
+    
+    @property
+    def sites(self):
+        """Site name -> SiteResources, the primary site first."""
+        return self._lazy("sites", lambda: {
+            name: SiteResources(name, self.config.site(name), self.timer) for name in self.config.site_names
+        })
+    
+    def site(self, name=None):
+        """Resources of site `name` (default: the primary site), or None for an unknown site."""
+        return self.sites.get(self.config.site_name if name is None else name)
+    
+    @property
+    def limits(self):
+        def create():
+            settings = self.config.api_limits
+            clients = None
+            if settings["requests_per_second"] > 0:
+                clients = TokenBucketLimiter(settings["requests_per_second"], settings["burst"],
+                                             settings["max_clients"])
+            return RequestLimits(clients, ConcurrencyLimiter(
+                settings["max_active"], settings["max_queued"], settings["queue_timeout"]))
+        return self._lazy("limits", create)
+    
+    @property
+    def export_slots(self):
+        return self._lazy("export_slots", lambda: threading.BoundedSemaphore(
+            self.config.api_config["max_exports"]))
+    
+    def check_config(self, force=False):
+        """Reload config.json if `force` is set or the file changed; costs one stat otherwise."""
+        if force or file_stamp(self.config_path) not in (self.config.stamp, self._rejected_stamp):
+            return self.reload_config()
+        return False
+    
+    def reload_config(self):
+        """
+        Load config.json again and swap in the new config and the resources that depend on it.
+        
+        Requests in flight finish with the objects they started with. Sites whose config is
+        unchanged keep their readers and indexes; limits and the export cap are recreated (with
+        fresh counters) only if their settings changed. An invalid file is logged once and
+        otherwise ignored. Workers, port and log directory only change on restart.
+        
+        Returns:
+            bool: Whether the new config was applied.
+        """
+        old = self.config
+        try:
+            config = AppConfig(self.config_path)
+        except (OSError, ValueError) as e:
+            self._rejected_stamp = file_stamp(self.config_path)
+            self.logger.error("Keeping the current configuration: %s", e)
+            return False
+        self._rejected_stamp = None
+        if config.data == old.data:
+            # Touched or rewritten without changes
+            self._members["config"] = config
+            return False
+        
+        sites = {}
+        for name in config.site_names:
+            site = self.sites.get(name)
+            if site is None or site.config.data != config.site(name).data:
+                site = SiteResources(name, config.site(name), self.timer)
+            sites[name] = site
+        
+        with self._init_lock:
+            if old.api_limits != config.api_limits:
+                self._members.pop("limits", None)
+            if old.api_config["max_exports"] != config.api_config["max_exports"]:
+                self._members.pop("export_slots", None)
+            if old.logging_config != config.logging_config:
+                self._members.pop("access_log", None)
+            self._members["sites"] = sites
+            self._members["config"] = config
+            set_level(self.logger, config.logging_config["level"])
+        
+        self.logger.info("Reloaded %s (pid %d, %d site(s))", self.config_path, os.getpid(), len(sites))
+        return True
+    
+    def warm_up(self):
+        """Create everything a request needs and map the last published snapshots."""
+        self.access_log
+        self.limits
+        with self.timer.phase("snapshot"):
+            snapshots = {name: site.snapshot_reader.read() for name, site in self.sites.items()}
+        return snapshots[self.config.site_name]
+
+
+# Rejections are sent before any other work, so their bodies are encoded once
+REJECTION_BODIES = {
+    429: b'{"error": "Too many requests, slow down"}',
+    503: b'{"error": "Server busy, try again later"}'
+}
+
+# /api/libraries is negotiated on Accept (see tools/wire.py; imported lazily, like NumPy behind it)
+WIRE_CONTENT_TYPE = 'application/x-platzpilot'
+VARY_ACCEPT = {'Vary': 'Accept'}
+
+
+def _quality(value):
+    try:
+        return min(max(float(value), 0.0), 1.0)
+    except ValueError:
+        return 0.0
+
+
+def prefers_wire(accept):
+    """
+    Whether an Accept header asks for the binary form over JSON.
+
+    Only a media range naming WIRE_CONTENT_TYPE itself selects it (wildcards do not), and only
+    with a q value above 0 and not below the one JSON gets from its most specific range.
+    """
+    wire_q = None
+    json_q = {}
+    for media_range in (accept or '').split(','):
+        media_type, *params = media_range.split(';')
+        media_type = media_type.strip().lower()
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition('=')
+            if name.strip().lower() == 'q':
+                q = _quality(value.strip())
+        if media_type == WIRE_CONTENT_TYPE:
+            wire_q = q
+        elif media_type in ('application/json', 'application/*', '*/*'):
+            json_q[media_type] = q
+    if not wire_q:
+        return False
+    json_range = next((r for r in ('application/json', 'application/*', '*/*') if r in json_q), None)
+    return json_range is None or wire_q >= json_q[json_range]
+
+
+def _site_route(path):
+    """
+    Split `path` into the site it names and its route as served for the primary site.
+    
+    /api/sites/<site>/health -> ('<site>', '/api/health'); /api/... -> (None, path), i.e. the primary site.
+    """
+    if path.startswith('/api/sites/'):
+        name, _, rest = path[len('/api/sites/'):].partition('/')
+        return name, '/api/' + rest
+    return None, path
 
 # Global variables
-config = AppConfig('config.json')
-logger = setup_logger(name="api_server", level="DEBUG", logger_dir=config.logger_config)
+app = APIApplication('config.json')
 data_lock = threading.Lock()
 cached_data = None
 last_update = None
 
+class _ChunkedWriter:
+    """Buffers writes into HTTP/1.1 chunks of about `chunk_size` bytes."""
+    
+    def __init__(self, wfile, chunk_size=64 * 1024):
+        self.wfile = wfile
+        self.chunk_size = chunk_size
+        self._buffer = bytearray()
+    
+    def write(self, data):
+        self._buffer += data
+        if len(self._buffer) >= self.chunk_size:
+            self.flush()
+        return len(data)
+    
+    def flush(self):
+        if self._buffer:
+            self.wfile.write(b'%x\r\n' % len(self._buffer))
+            self.wfile.write(self._buffer)
+            self.wfile.write(b'\r\n')
+            self._buffer.clear()
+    
+    def close(self):
+        self.flush()
+        self.wfile.write(b'0\r\n\r\n')
+        self.wfile.flush()
+
+
 class LibraryAPIHandler(BaseHTTPRequestHandler):
     """HTTP request handler for library data API."""
     
+    # Keep-alive connections; every response carries a Content-Length or is chunked
+    protocol_version = 'HTTP/1.1'
+    timeout = 30
+    # Headers and body are separate writes; with Nagle the body of a small response waits for a delayed ACK
+    disable_nagle_algorithm = True
+    
     def _set_cors_headers(self):
         """Set CORS headers to allow client access."""
         self.send_header('Access-Control-Allow-Origin', '*')
         self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
     
-    def _send_json_response(self, data, status_code=200):
+    def _send_json_response(self, data, status_code=200, headers=None):
         """Send JSON response with appropriate headers."""
+        json_str = json.dumps(data, ensure_ascii=False, indent=2)
+        self._send_body(json_str.encode('utf-8'), status_code, headers=headers)
+    
+    def _send_body(self, body, status_code=200, content_type='application/json', headers=None):
+        """Send an already serialized response body."""
         self.send_response(status_code)
-        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
         self._set_cors_headers()
         self.end_headers()
-        
-        json_str = json.dumps(data, ensure_ascii=False, indent=2)
-        self.wfile.write(json_str.encode('utf-8'))
+        self.wfile.write(body)
+    
+    def _send_enveloped(self, data, metadata, status_code=200, headers=None):
+        """Send {"data": <pre-encoded bytes>, "metadata": {...}} without re-parsing `data`."""
+        body = b''.join((
+            b'{"data": ', data,
+            b', "metadata": ', json.dumps(metadata).encode('utf-8'), b'}'
+        ))
+        self._send_body(body, status_code, headers=headers)
     
     def _send_error_response(self, message, status_code=500):
         """Send error response."""
@@ -48,44 +352,154 @@ class LibraryAPIHandler(BaseHTTPRequestHandler):
         }
         self._send_json_response(error_data, status_code)
     
+    def _send_rejection(self, status_code, retry_after):
+        """Shed a request with a pre-encoded body and Retry-After."""
+        body = REJECTION_BODIES[status_code]
+        self.send_response(status_code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Retry-After', str(retry_after))
+        if status_code == 503:
+            # Overloaded: free the connection's thread as well
+            self.send_header('Connection', 'close')
+            self.close_connection = True
+        self._set_cors_headers()
+        self.end_headers()
+        self.wfile.write(body)
+    
+    def _client_id(self):
+        """Address the rate limit applies to (the first X-Forwarded-For hop behind a trusted proxy)."""
+        if app.config.api_limits["trust_forwarded_for"]:
+            forwarded = self.headers.get('X-Forwarded-For')
+            if forwarded:
+                return forwarded.split(',')[0].strip()
+        return self.client_address[0]
+    
     def do_OPTIONS(self):
         """Handle preflight OPTIONS requests."""
         self.send_response(200)
         self._set_cors_headers()
+        self.send_header('Content-Length', '0')
         self.end_headers()
     
     def do_GET(self):
-        """Handle GET requests."""
+        """Admit the request (rate and concurrency limits), then handle it."""
+        parsed_url = urlparse(self.path)
+        # Resolved once so that the limits and the handler agree on what is requested
+        name, route = _site_route(parsed_url.path)
+        if route == '/api/health':
+            # Health checks must keep answering while the server sheds load
+            self._handle_get(name, route, parsed_url.query)
+            return
+        
+        # Exports hold their connection for long and are capped separately by api.max_exports
+        concurrent = route != '/api/export'
+        # Released on the same limiter it was admitted by, even if a config reload replaced it meanwhile
+        limits = app.limits
+        status, retry_after = limits.admit(self._client_id(), concurrent)
+        if status:
+            self._send_rejection(status, retry_after)
+            return
+        try:
+            self._handle_get(name, route, parsed_url.query)
+        finally:
+            if concurrent:
+                limits.release()
+    
+    def _handle_get(self, name, path, query_string):
+        """Handle a GET request for `path` of site `name` (None: the primary site), as split by _site_route."""
         try:
-            parsed_url = urlparse(self.path)
-            path = parsed_url.path
+            app.logger.debug("GET request: %s", self.path)
             
-            logger.info(f"GET request: {path}")
+            # /api/sites/<site>/... serves the same endpoints for another site; /api/... is the primary site
+            site = app.site(name)
+            if site is None:
+                self._send_error_response(f"Unknown site {name!r}", 404)
+                return
             
-            if path == '/api/libraries':
-                self._handle_libraries_request()
+            if path == '/api/sites':
+                self._handle_sites_request()
+            elif path == '/api/libraries':
+                self._handle_libraries_request(site, parse_qs(query_string))
+            elif path.startswith('/api/libraries/') and path.endswith('/forecast'):
+                self._handle_forecast_request(site, path, parse_qs(query_string))
+            elif path.startswith('/api/libraries/') and path.endswith('/profile'):
+                self._handle_profile_request(site, path, parse_qs(query_string))
+            elif path == '/api/recommendations' or path.startswith('/api/recommendations/'):
+                self._handle_recommendations_request(site, path[len('/api/recommendations/'):] or None)
+            elif path == '/api/rank':
+                self._handle_rank_request(site, parse_qs(query_string))
+            elif path == '/api/export':
+                self._handle_export_request(site, parse_qs(query_string))
             elif path == '/api/health':
-                self._handle_health_request()
+                self._handle_health_request(site)
             elif path == '/':
                 self._handle_root_request()
             else:
                 self._send_error_response("Endpoint not found", 404)
                 
         except Exception as e:
-            logger.error(f"Error handling GET request: {e}")
+            app.logger.error(f"Error handling GET request: {e}")
             self._send_error_response("Internal server error")
     
-    def _handle_libraries_request(self):
-        """Handle /api/libraries endpoint."""
+    def _handle_sites_request(self):
+        """Handle /api/sites endpoint."""
+        self._send_json_response({
+            'primary': app.config.site_name,
+            'sites': {
+                name: {
+                    'locations': site.config.location_number,
+                    'groups': list(site.config.formatting_grouping),
+                    'prefix': '/api' if name == app.config.site_name else f'/api/sites/{name}'
+                }
+                for name, site in app.sites.items()
+            },
+            'timestamp': datetime.now().isoformat()
+        })
+    
+    def _handle_libraries_request(self, site, query):
+        """
+        Handle /api/libraries endpoint.
+        
+        JSON by default; the binary form of tools/wire.py when the Accept header prefers
+        `application/x-platzpilot` (see prefers_wire), without the metadata block when
+        `?meta=<id>` names the client's current metadata.
+        """
         global cached_data, last_update
         
         try:
+            if prefers_wire(self.headers.get('Accept')):
+                found = site.wire.lookup(query.get('meta', [None])[0])
+                if found is not None:
+                    snapshot, body = found
+                    self._send_body(body, content_type=WIRE_CONTENT_TYPE, headers=VARY_ACCEPT)
+                    app.logger.debug("Libraries snapshot v%d served in binary form", snapshot.version)
+                    return
+            
+            snapshot = site.snapshot_reader.read()
+            if snapshot is not None:
+                # Splice the published bytes into the envelope without parsing them
+                metadata = {
+                    'last_update': datetime.fromtimestamp(snapshot.published_at).isoformat(),
+                    'server_time': datetime.now().isoformat(),
+                    'total_locations': snapshot.entries,
+                    'version': snapshot.version
+                }
+                self._send_enveloped(snapshot.payload, metadata, headers=VARY_ACCEPT)
+                app.logger.debug("Libraries snapshot v%d served successfully", snapshot.version)
+                return
+            
+            if site is not app.site():
+                # The JSON file fallback predates snapshots and only exists for the primary site
+                self._send_error_response("Data not available yet", 503)
+                return
+            
             with data_lock:
                 if cached_data is None:
                     # Try to load data from file if not cached
                     data_file_path = os.path.join(
-                        config.ring_buffer_config, 
-                        config.json_save_file
+                        app.config.ring_buffer_config, 
+                        app.config.json_save_file
                     )
                     
                     if os.path.exists(data_file_path):
@@ -106,22 +520,203 @@ class LibraryAPIHandler(BaseHTTPRequestHandler):
                     }
                 }
                 
-                self._send_json_response(response_data)
-                logger.info("Libraries data served successfully")
+                self._send_json_response(response_data, headers=VARY_ACCEPT)
+                app.logger.debug("Libraries data served successfully")
                 
         except Exception as e:
-            logger.error(f"Error serving libraries data: {e}")
+            app.logger.error(f"Error serving libraries data: {e}")
             self._send_error_response("Failed to load library data")
     
-    def _handle_health_request(self):
+    def _handle_forecast_request(self, site, path, query):
+        """Handle /api/libraries/<code>/forecast?horizon=<steps> endpoint."""
+        code = path[len('/api/libraries/'):-len('/forecast')]
+        i = site.config.location_index.get(code)
+        if i is None:
+            self._send_error_response(f"Unknown library {code!r}", 404)
+            return
+        
+        try:
+            horizon = int(query.get('horizon', [site.config.forecast_config["max_forecast"]])[0])
+            result = site.forecaster.forecast(horizon)
+        except ValueError:
+            self._send_error_response(f"horizon must be an integer between 1 and {site.forecaster.max_horizon}",
+                                      400)
+            return
+        
+        if result is None:
+            self._send_error_response("Forecast not available yet", 503)
+            return
+        
+        self._send_json_response({
+            'code': code,
+            'model': result.model_types[i],
+            'horizon': horizon,
+            'interval_minutes': site.config.fetch_interval // 60,
+            'last_reading': result.reading_time,
+            'predictions': result.predictions[i].tolist(),
+            'metadata': {
+                'last_update': datetime.fromtimestamp(result.published_at).isoformat(),
+                'server_time': datetime.now().isoformat(),
+                'version': result.version
+            }
+        })
+    
+    def _handle_profile_request(self, site, path, query):
+        """Handle /api/libraries/<code>/profile?weekday=<name or 0-6>&at=<HH:MM>&resolution=<minutes> endpoint."""
+        from tools.profiles import parse_minutes, parse_weekday, profile_document
+        
+        code = path[len('/api/libraries/'):-len('/profile')]
+        i = site.config.location_index.get(code)
+        if i is None:
+            self._send_error_response(f"Unknown library {code!r}", 404)
+            return
+        
+        profiles = site.profiles
+        if profiles is None:
+            self._send_error_response("Profiles not available yet", 503)
+            return
+        
+        try:
+            weekday = parse_weekday(query.get('weekday', [None])[0])
+            at = parse_minutes(query.get('at', [None])[0])
+            resolution = int(query.get('resolution', ['60'])[0])
+            profiles.refresh()
+            document = profile_document(profiles, code, i, site.config.max_seats[code],
+                                        weekday, resolution, at)
+        except ValueError as e:
+            self._send_error_response(str(e), 400)
+            return
+        
+        document['metadata'] = {'server_time': datetime.now().isoformat()}
+        self._send_json_response(document)
+    
+    def _handle_recommendations_request(self, site, name):
+        """Handle /api/recommendations[/<code or group>] endpoint."""
+        found = site.recommendations.lookup(name)
+        if found is None:
+            self._send_error_response("Recommendations not available yet", 503)
+            return
+        
+        snapshot, body = found
+        if body is None:
+            self._send_error_response(f"Unknown library or group {name!r}", 404)
+            return
+        
+        self._send_enveloped(body, {
+            'last_update': datetime.fromtimestamp(snapshot.published_at).isoformat(),
+            'server_time': datetime.now().isoformat(),
+            'version': snapshot.version
+        })
+    
+    def _handle_rank_request(self, site, query):
+        """Handle /api/rank?by=free|ratio&k=<n>&horizon=<steps>&group=<group>&open=true|false endpoint."""
+        by = query.get('by', ['free'])[0]
+        group = query.get('group', [None])[0]
+        open_param = query.get('open', [None])[0]
+        open_filter = None if open_param is None else open_param.lower() in ('1', 'true', 'yes')
+        
+        try:
+            k = int(query.get('k', ['5'])[0])
+            horizon = int(query.get('horizon', ['0'])[0])
+            found = site.ranking.query(by, horizon, k, group, open_filter)
+        except ValueError as e:
+            self._send_error_response(str(e), 400)
+            return
+        
+        if found is None:
+            self._send_error_response("Data not available yet", 503)
+            return
+        
+        snapshot, entries = found
+        header = json.dumps({
+            'by': by,
+            'horizon': horizon,
+            'minutes_ahead': horizon * site.config.fetch_interval // 60,
+            'group': group,
+            'open': open_filter
+        })
+        data = b''.join((header[:-1].encode('utf-8'), b', "results": [', b', '.join(entries), b']}'))
+        self._send_enveloped(data, {
+            'last_update': datetime.fromtimestamp(snapshot.published_at).isoformat(),
+            'server_time': datetime.now().isoformat(),
+            'version': snapshot.version
+        })
+    
+    def _handle_export_request(self, site, query):
+        """Handle /api/export?format=csv|npy|npz&start=<iso>&end=<iso> endpoint (streamed)."""
+        # NumPy and the store are only loaded once the first export is requested
+        from tools.export import FORMATS, CONTENT_TYPES, export
+        from tools.storage import RingBufferStore
+        
+        fmt = query.get('format', ['csv'])[0]
+        if fmt not in FORMATS:
+            self._send_error_response(f"format must be one of {', '.join(FORMATS)}", 400)
+            return
+        try:
+            start = datetime.fromisoformat(query['start'][0]) if 'start' in query else None
+            end = datetime.fromisoformat(query['end'][0]) if 'end' in query else None
+        except ValueError as e:
+            self._send_error_response(f"Invalid date: {e}", 400)
+            return
+        
+        slots = app.export_slots
+        if not slots.acquire(blocking=False):
+            self._send_error_response("Too many exports in progress, try again later", 503)
+            return
+        try:
+            try:
+                store = RingBufferStore(site.config.ring_buffer_config, num_buildings=site.config.location_number,
+                                        archive_dir=site.config.archive_dir, read_only=True)
+            except ValueError as e:
+                # The locations changed and the collector has not remapped the history yet
+                app.logger.warning("Export of %s unavailable: %s", site.name, e)
+                self._send_error_response("History is being updated, try again later", 503)
+                return
+            chunked = self.request_version != 'HTTP/1.0'
+            
+            self.send_response(200)
+            self.send_header('Content-Type', CONTENT_TYPES[fmt])
+            self.send_header('Content-Disposition', f'attachment; filename="occupancy-{site.name}.{fmt}"')
+            if chunked:
+                self.send_header('Transfer-Encoding', 'chunked')
+            else:
+                # HTTP/1.0 has no chunked encoding: the end of the body is the end of the connection
+                self.close_connection = True
+            self._set_cors_headers()
+            self.end_headers()
+            
+            out = _ChunkedWriter(self.wfile) if chunked else self.wfile
+            started = time.perf_counter()
+            rows = export(store, site.config.location_codes, fmt, out, start, end)
+            if chunked:
+                out.close()
+            app.logger.info("Exported %d %s readings as %s in %.1fs", rows, site.name, fmt,
+                            time.perf_counter() - started)
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True
+            app.logger.info("Export client disconnected")
+        finally:
+            slots.release()
+    
+    def _handle_health_request(self, site):
         """Handle /api/health endpoint."""
         global last_update
         
+        snapshot = site.snapshot_reader.read()
+        fallback = site is app.site() and cached_data is not None
+        if snapshot is not None:
+            data_update = datetime.fromtimestamp(snapshot.published_at)
+        else:
+            data_update = last_update if fallback else None
+        
         health_data = {
             'status': 'healthy',
+            'site': site.name,
             'timestamp': datetime.now().isoformat(),
-            'data_available': cached_data is not None,
-            'last_data_update': last_update.isoformat() if last_update else None
+            'data_available': snapshot is not None or fallback,
+            'last_data_update': data_update.isoformat() if data_update else None,
+            'limits': app.limits.stats(),
+            'pid': os.getpid()
         }
         
         self._send_json_response(health_data)
@@ -132,7 +727,13 @@ class LibraryAPIHandler(BaseHTTPRequestHandler):
             'service': 'PlatzPilot API Server',
             'version': '1.0.0',
             'endpoints': {
-                '/api/libraries': 'Get current library data',
+                '/api/libraries': 'Get current library data (binary with Accept: application/x-platzpilot)',
+                '/api/libraries/<code>/forecast?horizon=<steps>': 'Forecast free seats up to one day ahead',
+                '/api/libraries/<code>/profile?weekday=&at=&resolution=': 'Typical occupancy by weekday and time',
+                '/api/recommendations[/<code or group>]': 'Next windows with free seats per threshold',
+                '/api/rank?by=free|ratio&k=&horizon=&group=&open=': 'Top-k libraries by availability',
+                '/api/export?format=csv|npy|npz&start=&end=': 'Download the raw occupancy history',
+                '/api/sites': 'Configured sites; /api/sites/<site>/<endpoint> serves any endpoint above for that site',
                 '/api/health': 'Health check endpoint'
             },
             'timestamp': datetime.now().isoformat()
@@ -140,22 +741,34 @@ class LibraryAPIHandler(BaseHTTPRequestHandler):
         
         self._send_json_response(info_data)
     
+    def log_request(self, code='-', size='-'):
+        """Route access lines through the sampler instead of one INFO line per request."""
+        if isinstance(code, HTTPStatus):
+            code = code.value
+        app.access_log.record(self.client_address[0], f'"{self.requestline}" {code} {size}', code)
+    
     def log_message(self, format, *args):
         """Override default logging to use our logger."""
-        logger.info(f"{self.client_address[0]} - {format % args}")
+        app.logger.info("%s - %s", self.client_address[0], format % args)
 
 
 def update_cached_data():
-    """Background thread to update cached data from file."""
+    """Background thread to update cached data from file (only until a snapshot is published)."""
     global cached_data, last_update
     
     data_file_path = os.path.join(
-        config.ring_buffer_config, 
-        config.json_save_file
+        app.config.ring_buffer_config, 
+        app.config.json_save_file
     )
     
     while True:
         try:
+            if app.site().snapshot_reader.read() is not None:
+                # The shared snapshot supersedes the per-process JSON copy
+                with data_lock:
+                    cached_data = None
+                return
+            
             if os.path.exists(data_file_path):
                 # Check if file was modified
                 file_mtime = os.path.getmtime(data_file_path)
@@ -169,33 +782,198 @@ def update_cached_data():
                             cached_data = new_data
                             last_update = datetime.now()
                         
-                        logger.info("Cached data updated from file")
+                        app.logger.info("Cached data updated from file")
             
             # Check every 30 seconds for data updates
             time.sleep(30)
             
         except Exception as e:
-            logger.error(f"Error updating cached data: {e}")
+            app.logger.error(f"Error updating cached data: {e}")
             time.sleep(60)  # Wait longer on error
 
 
-def run_server(host='0.0.0.0', port=8080):
-    """Run the HTTP API server."""
-    logger.info(f"Starting PlatzPilot API Server on {host}:{port}")
+def watch_config(httpd):
+    """Background thread applying config.json changes (polled, or right away on SIGHUP) without a restart."""
+    while True:
+        poll = app.config.api_config["config_poll_seconds"]
+        requested = app.reload_event.wait(poll or None)
+        app.reload_event.clear()
+        try:
+            if app.check_config(force=requested):
+                httpd.max_connections = app.config.api_limits["max_connections"]
+        except Exception as e:
+            app.logger.error("Failed to reload the configuration: %s", e)
+
+
+class APIHTTPServer(ThreadingHTTPServer):
+    """
+    Thread per connection, so long exports and keep-alive clients do not block other requests.
+    
+    Beyond `max_connections` open connections, new ones get a canned 503 from the
+    accepting thread and are closed, which bounds the number of handler threads.
+    """
+    
+    daemon_threads = True
+    request_queue_size = 128
+    max_connections = 256
+    OVERLOADED = (b'HTTP/1.1 503 Service Unavailable\r\nContent-Type: application/json\r\n'
+                  b'Retry-After: 1\r\nConnection: close\r\nContent-Length: %d\r\n\r\n%s'
+                  % (len(REJECTION_BODIES[503]), REJECTION_BODIES[503]))
+    
+    def __init__(self, *args, **kwargs):
+        self._connections = 0
+        self._connections_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+    
+    def process_request(self, request, client_address):
+        with self._connections_lock:
+            shed = self._connections >= self.max_connections
+            if not shed:
+                self._connections += 1
+        if shed:
+            app.limits.count("connections_shed")
+            try:
+                request.settimeout(0.5)
+                request.sendall(self.OVERLOADED)
+            except OSError:
+                pass
+            self.shutdown_request(request)
+            return
+        try:
+            super().process_request(request, client_address)
+        except Exception:
+            self._connection_closed()
+            raise
+    
+    def process_request_thread(self, request, client_address):
+        try:
+            super().process_request_thread(request, client_address)
+        finally:
+            self._connection_closed()
+    
+    def _connection_closed(self):
+        with self._connections_lock:
+            self._connections -= 1
+
+
+class ReusePortHTTPServer(APIHTTPServer):
+    """APIHTTPServer that lets several worker processes bind the same port (Linux SO_REUSEPORT)."""
+    
+    def server_bind(self):
+        self.socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+        super().server_bind()
+
+
+def _serve(httpd):
+    """Serve on `httpd` until interrupted or asked to stop via SIGTERM."""
+    httpd.max_connections = app.config.api_limits["max_connections"]
     
     # Start background data updater
     data_thread = threading.Thread(target=update_cached_data, daemon=True)
     data_thread.start()
+    threading.Thread(target=watch_config, args=(httpd,), name="ConfigWatcher", daemon=True).start()
     
-    server_address = (host, port)
-    httpd = HTTPServer(server_address, LibraryAPIHandler)
+    if threading.current_thread() is threading.main_thread():
+        # shutdown() blocks until serve_forever returns, so it must not run on the serving thread
+        signal.signal(signal.SIGTERM, lambda signum, frame: threading.Thread(target=httpd.shutdown).start())
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, lambda signum, frame: app.reload_event.set())
     
     try:
-        logger.info("API Server is running...")
+        app.logger.info("API Server is running (pid %d)...", os.getpid())
         httpd.serve_forever()
     except KeyboardInterrupt:
-        logger.info("Shutting down API Server...")
+        app.logger.info("Shutting down API Server...")
         httpd.shutdown()
+    finally:
+        httpd.server_close()
+
+
+def _run_workers(host, port, workers, reuse_port):
+    """
+    Fork `workers` API processes.
+    
+    Without `reuse_port` the listening socket is created once here and inherited
+    by every worker (pre-forked listener); with it, each worker binds its own
+    socket and the kernel balances connections between them. Dead workers are
+    respawned until the parent receives SIGTERM/SIGINT.
+    """
+    listener = None if reuse_port else APIHTTPServer((host, port), LibraryAPIHandler)
+    children = {}
+    stopping = False
+    
+    def spawn(index):
+        pid = os.fork()
+        if pid == 0:
+            signal.signal(signal.SIGINT, signal.SIG_DFL)
+            exit_code = 0
+            try:
+                _serve(listener or ReusePortHTTPServer((host, port), LibraryAPIHandler))
+            except Exception as e:
+                app.logger.error("API worker %d failed: %s", index, e)
+                exit_code = 1
+            finally:
+                stop_listeners()
+                os._exit(exit_code)
+        children[pid] = index
+        app.logger.info("Started API worker %d (pid %d)", index, pid)
+    
+    def forward(signum):
+        for pid in list(children):
+            try:
+                os.kill(pid, signum)
+            except ProcessLookupError:
+                pass
+    
+    def stop(signum=None, frame=None):
+        nonlocal stopping
+        stopping = True
+        forward(signal.SIGTERM)
+    
+    if threading.current_thread() is threading.main_thread():
+        signal.signal(signal.SIGTERM, stop)
+        if hasattr(signal, "SIGHUP"):
+            # Every worker reloads config.json itself
+            signal.signal(signal.SIGHUP, lambda signum, frame: forward(signal.SIGHUP))
+    
+    for index in range(workers):
+        spawn(index)
+    
+    while children:
+        try:
+            pid, _ = os.wait()
+        except ChildProcessError:
+            break
+        except KeyboardInterrupt:
+            stop()
+            continue
+        index = children.pop(pid, None)
+        if index is not None and not stopping:
+            app.logger.warning("API worker %d (pid %d) exited, restarting", index, pid)
+            time.sleep(1)
+            spawn(index)
+    
+    if listener is not None:
+        listener.server_close()
+    app.logger.info("All API workers stopped")
+
+
+def run_server(host='0.0.0.0', port=8080, workers=None, reuse_port=None):
+    """Run the HTTP API server, optionally as several forked worker processes."""
+    workers = app.config.api_config["workers"] if workers is None else workers
+    reuse_port = app.config.api_config["reuse_port"] if reuse_port is None else reuse_port
+    app.logger.info(f"Starting PlatzPilot API Server on {host}:{port} with {workers} worker(s)")
+    
+    snapshot = app.warm_up()
+    app.logger.info("API ready after %.0fms (%s), serving snapshot %s", app.timer.elapsed() * 1000,
+                    app.timer.summary(), f"v{snapshot.version}" if snapshot else "none yet")
+    
+    if workers > 1:
+        _run_workers(host, port, workers, reuse_port)
+        return
+    
+    server_address = (host, port)
+    _serve(APIHTTPServer(server_address, LibraryAPIHandler))
 
 
 if __name__ == "__main__":
@@ -204,7 +982,10 @@ if __name__ == "__main__":
     parser = argparse.ArgumentParser(description='PlatzPilot API Server')
     parser.add_argument('--host', default='0.0.0.0', help='Host to bind to')
     parser.add_argument('--port', type=int, default=8080, help='Port to bind to')
+    parser.add_argument('--workers', type=int, default=None, help='Number of API worker processes')
+    parser.add_argument('--reuse-port', action='store_true', default=None,
+                        help='Let each worker bind its own SO_REUSEPORT socket instead of sharing one')
     
     args = parser.parse_args()
     
-    run_server(args.host, args.port)
\ No newline at end of file
+    run_server(args.host, args.port, args.workers, args.reuse_port)
\ No newline at end of file
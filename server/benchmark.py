@@ -0,0 +1,447 @@
+#!/usr/bin/env python3
+"""
+Benchmark suite for the PlatzPilot server.
+
+Load-tests the API (started locally against a synthetic snapshot, or an
+already running server via --url) with an asyncio load generator, times the
+hot pipeline functions, and compares the results against a stored baseline.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+import zlib
+from datetime import datetime, timedelta
+from urllib.parse import urlparse
+
+import numpy as np
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SERVER_DIR)
+
+from tools.config import AppConfig
+from tools.formatting import json_handler
+from tools.snapshot import SnapshotWriter
+from tools.synthetic import synthetic_payload, DATE_FORMAT
+from tools import wire
+
+DEFAULT_BASELINE = os.path.join(SERVER_DIR, "bench_baseline.json")
+
+
+def summarize(latencies):
+    """p50/p95/p99/mean of a list of latencies in seconds, reported in milliseconds."""
+    if not latencies:
+        return {"p50_ms": None, "p95_ms": None, "p99_ms": None, "mean_ms": None}
+    arr = np.asarray(latencies) * 1000
+    p50, p95, p99 = np.percentile(arr, [50, 95, 99])
+    return {"p50_ms": round(float(p50), 3), "p95_ms": round(float(p95), 3),
+            "p99_ms": round(float(p99), 3), "mean_ms": round(float(arr.mean()), 3)}
+
+
+# ---------------------------------------------------------------------------
+# Synthetic environment
+# ---------------------------------------------------------------------------
+
+def build_snapshot(config, when=None):
+    """json_handler output for a synthetic SeatFinder payload, as the collector would publish it."""
+    payload = synthetic_payload(config, when or datetime.now())
+    seat_estimate = payload[0]["seatestimate"]
+    free = [entries[0]["free_seats"] if entries else 0 for entries in seat_estimate.values()]
+    closed = {code: not entries for code, entries in seat_estimate.items()}
+    forecasts = np.tile(np.asarray(free, dtype=float)[:, None], (1, config.forecast_config["max_forecast"]))
+    return json_handler(payload[1]["location"], forecasts, free, closed, config)
+
+
+def prepare_workdir(config_path):
+    """Temporary server directory with its own config.json and a published synthetic snapshot."""
+    workdir = tempfile.mkdtemp(prefix="platzpilot-bench-")
+    with open(config_path, "r") as f:
+        settings = json.load(f)
+    # Every request comes from this machine: the per-client rate limit would reject almost all of them
+    settings.setdefault("api", {}).setdefault("limits", {})["requests_per_second"] = 0
+    with open(os.path.join(workdir, "config.json"), "w") as f:
+        json.dump(settings, f, indent=2)
+    config = AppConfig(os.path.join(workdir, "config.json"))
+
+    snapshot = build_snapshot(config)
+    data_dir = os.path.join(workdir, config.ring_buffer_config)
+    os.makedirs(data_dir, exist_ok=True)
+    with open(os.path.join(data_dir, config.json_save_file), "w") as f:
+        json.dump(snapshot, f, ensure_ascii=True, indent=2)
+    writer = SnapshotWriter(os.path.join(data_dir, config.snapshot_file))
+    writer.publish(json.dumps(snapshot, ensure_ascii=False, separators=(",", ":")).encode("utf-8"),
+                   entries=len(snapshot))
+    writer.close()
+    return workdir
+
+
+def start_api_server(workdir, port, workers, timeout=15.0):
+    """Start api_server.py in `workdir` and wait until /api/health answers."""
+    process = subprocess.Popen(
+        [sys.executable, os.path.join(SERVER_DIR, "api_server.py"),
+         "--host", "127.0.0.1", "--port", str(port), "--workers", str(workers)],
+        cwd=workdir, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            status, _, _ = asyncio.run(_single_request("127.0.0.1", port, "/api/health"))
+            if status == 200:
+                return process
+        except OSError:
+            pass
+        time.sleep(0.1)
+    process.kill()
+    raise RuntimeError(f"API server did not come up on port {port} within {timeout}s")
+
+
+# ---------------------------------------------------------------------------
+# Async load generator
+# ---------------------------------------------------------------------------
+
+async def _read_response(reader):
+    """Read one HTTP/1.x response; returns (status, body, keep_alive)."""
+    head = await reader.readuntil(b"\r\n\r\n")
+    lines = head.decode("latin-1").split("\r\n")
+    version, status = lines[0].split(" ", 2)[:2]
+    headers = {}
+    for line in lines[1:]:
+        if ":" in line:
+            key, value = line.split(":", 1)
+            headers[key.strip().lower()] = value.strip()
+
+    if "content-length" in headers:
+        body = await reader.readexactly(int(headers["content-length"]))
+    elif headers.get("transfer-encoding", "").lower() == "chunked":
+        parts = []
+        while True:
+            size = int((await reader.readuntil(b"\r\n")).split(b";")[0], 16)
+            if size == 0:
+                await reader.readuntil(b"\r\n")
+                break
+            parts.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+        body = b"".join(parts)
+    else:
+        body = await reader.read()
+
+    connection = headers.get("connection", "").lower()
+    keep_alive = connection != "close" and (version == "HTTP/1.1" or connection == "keep-alive")
+    if "content-length" not in headers and "transfer-encoding" not in headers:
+        keep_alive = False
+    return int(status), body, keep_alive
+
+
+def _request_bytes(host, path, keep_alive, headers=None):
+    lines = [f"GET {path} HTTP/1.1", f"Host: {host}",
+             f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    lines += [f"{key}: {value}" for key, value in (headers or {}).items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def _single_request(host, port, path, headers=None):
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        writer.write(_request_bytes(host, path, False, headers))
+        await writer.drain()
+        return await _read_response(reader)
+    finally:
+        writer.close()
+
+
+async def _load_worker(host, port, jobs, keep_alive, headers, results):
+    reader = writer = None
+    while jobs:
+        path = jobs.pop()
+        start = time.perf_counter()
+        try:
+            if writer is None:
+                reader, writer = await asyncio.open_connection(host, port)
+            writer.write(_request_bytes(host, path, keep_alive, headers))
+            await writer.drain()
+            status, body, reusable = await _read_response(reader)
+        except (OSError, asyncio.IncompleteReadError, ValueError) as e:
+            results[path]["errors"] += 1
+            results[path]["last_error"] = str(e)
+            if writer is not None:
+                writer.close()
+            reader = writer = None
+            continue
+
+        elapsed = time.perf_counter() - start
+        entry = results[path]
+        entry["latencies"].append(elapsed)
+        entry["bytes"] += len(body)
+        entry["status"][status] = entry["status"].get(status, 0) + 1
+
+        if not (keep_alive and reusable):
+            writer.close()
+            reader = writer = None
+
+    if writer is not None:
+        writer.close()
+
+
+async def _run_load(host, port, endpoints, concurrency, requests_per_endpoint, keep_alive, headers):
+    jobs = [path for path in endpoints for _ in range(requests_per_endpoint)]
+    random.Random(0).shuffle(jobs)
+    results = {path: {"latencies": [], "bytes": 0, "status": {}, "errors": 0} for path in endpoints}
+
+    start = time.perf_counter()
+    await asyncio.gather(*(
+        _load_worker(host, port, jobs, keep_alive, headers, results) for _ in range(concurrency)
+    ))
+    wall = time.perf_counter() - start
+    return results, wall
+
+
+def run_load(url, endpoints, concurrency, requests_per_endpoint, keep_alive, headers=None):
+    """Drive `endpoints` concurrently and return throughput and latency percentiles per endpoint."""
+    parsed = urlparse(url)
+    results, wall = asyncio.run(_run_load(
+        parsed.hostname, parsed.port or 80, endpoints, concurrency, requests_per_endpoint, keep_alive, headers
+    ))
+
+    report = {}
+    for path, entry in results.items():
+        done = len(entry["latencies"])
+        # Endpoints share the wall clock, so throughput is each endpoint's share of it
+        report[path] = {
+            "requests": done,
+            "errors": entry["errors"],
+            "status": {str(code): n for code, n in sorted(entry["status"].items())},
+            "throughput_rps": round(done / wall, 1) if wall else None,
+            "avg_bytes": round(entry["bytes"] / done) if done else 0,
+            **summarize(entry["latencies"])
+        }
+        if entry["errors"]:
+            report[path]["last_error"] = entry.get("last_error")
+    report["_total"] = {
+        "requests": sum(r["requests"] for r in report.values()),
+        "wall_seconds": round(wall, 3),
+        "throughput_rps": round(sum(len(e["latencies"]) for e in results.values()) / wall, 1),
+        "concurrency": concurrency,
+        "keep_alive": keep_alive
+    }
+    return report
+
+
+# ---------------------------------------------------------------------------
+# Microbenchmarks
+# ---------------------------------------------------------------------------
+
+def time_call(fn, repeat):
+    """Call `fn` `repeat` times and summarize the per-call latency."""
+    latencies = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - start)
+    result = summarize(latencies)
+    result["calls"] = repeat
+    return result
+
+
+def run_micro(config, repeat):
+    """
+    Time RingBufferStore.append/get_all, ForecastManager.update_and_forecast and json_handler,
+    and compare the binary /api/libraries form (tools/wire.py) with JSON in size and speed.
+    """
+    from tools.storage import RingBufferStore
+    from tools.forecast import ForecastManager
+
+    workdir = tempfile.mkdtemp(prefix="platzpilot-micro-")
+    try:
+        store = RingBufferStore(os.path.join(workdir, "data"), num_buildings=config.location_number)
+        rng = np.random.default_rng(0)
+        max_seats = np.asarray(config.forecast_config["max_seats_list"])
+        clock = [store.start_time]
+
+        def append():
+            clock[0] += timedelta(minutes=5)
+            counts = (rng.random(config.location_number) * max_seats).astype(int).tolist()
+            store.append(counts, clock[0].strftime(DATE_FORMAT))
+
+        # Fill one full week so get_all and model initialization see realistic data
+        for _ in range(store.capacity):
+            append()
+
+        forecast_config = dict(config.forecast_config, model_dir=os.path.join(workdir, "model_states"))
+        init_start = time.perf_counter()
+        manager = ForecastManager(store, **forecast_config)
+        init_seconds = time.perf_counter() - init_start
+
+        payload = synthetic_payload(config, datetime.now())
+        seat_estimate = payload[0]["seatestimate"]
+        free = [entries[0]["free_seats"] if entries else 0 for entries in seat_estimate.values()]
+        closed = {code: not entries for code, entries in seat_estimate.items()}
+        forecasts = manager.update_and_forecast()
+
+        document = json_handler(payload[1]["location"], forecasts, free, closed, config)
+        published = json.dumps(document, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+        binary = wire.encode(document)
+        arrays_only = wire.encode(document, include_metadata=False)
+        metadata = wire.decode(binary)[1]["metadata"]
+
+        return {
+            "ring_buffer.append": time_call(append, repeat),
+            "ring_buffer.get_all": time_call(store.get_all, repeat),
+            "forecast.init_ms": round(init_seconds * 1000, 3),
+            "forecast.update_and_forecast": time_call(manager.update_and_forecast, repeat),
+            "formatting.json_handler": time_call(
+                lambda: json_handler(payload[1]["location"], forecasts, free, closed, config), repeat),
+            "wire.json_bytes": len(published),
+            "wire.json_gzip_bytes": len(zlib.compress(published)),
+            "wire.binary_bytes": len(binary),
+            "wire.binary_gzip_bytes": len(zlib.compress(binary)),
+            "wire.binary_bytes_without_metadata": len(arrays_only),
+            "wire.json_encode": time_call(
+                lambda: json.dumps(document, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), repeat),
+            "wire.json_decode": time_call(lambda: json.loads(published), repeat),
+            "wire.binary_encode": time_call(lambda: wire.encode(document), repeat),
+            "wire.binary_decode": time_call(lambda: wire.decode(binary), repeat),
+            "wire.binary_decode_without_metadata": time_call(lambda: wire.decode(arrays_only, metadata), repeat),
+        }
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+
+# ---------------------------------------------------------------------------
+# Baseline comparison
+# ---------------------------------------------------------------------------
+
+def flatten(results, prefix=""):
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(results, baseline, tolerance):
+    """Metrics that got worse than the baseline by more than `tolerance` (a fraction)."""
+    current = flatten(results)
+    previous = flatten(baseline.get("results", {}))
+    regressions = []
+    for name, old in previous.items():
+        new = current.get(name)
+        if new is None or not old:
+            continue
+        if name.endswith("_ms"):
+            worse = new > old * (1 + tolerance)
+        elif name.endswith("throughput_rps"):
+            worse = new < old * (1 - tolerance)
+        else:
+            continue
+        if worse:
+            regressions.append((name, old, new))
+    return regressions
+
+
+def print_load(report):
+    print(f"\n🌐 Load test: {report['_total']['requests']} requests in {report['_total']['wall_seconds']}s "
+          f"({report['_total']['throughput_rps']} req/s, concurrency {report['_total']['concurrency']}, "
+          f"keep-alive {'on' if report['_total']['keep_alive'] else 'off'})")
+    for path, entry in report.items():
+        if path == "_total":
+            continue
+        print(f"   {path}: {entry['throughput_rps']} req/s, p50 {entry['p50_ms']}ms, p95 {entry['p95_ms']}ms, "
+              f"p99 {entry['p99_ms']}ms, {entry['avg_bytes']} B, status {entry['status']}, errors {entry['errors']}")
+
+
+def print_micro(report):
+    print("\n⏱️ Microbenchmarks")
+    for name, entry in report.items():
+        if isinstance(entry, dict):
+            print(f"   {name}: mean {entry['mean_ms']}ms, p50 {entry['p50_ms']}ms, p95 {entry['p95_ms']}ms "
+                  f"({entry['calls']} calls)")
+        else:
+            print(f"   {name}: {entry}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='PlatzPilot benchmark suite')
+    parser.add_argument('--mode', choices=['load', 'micro', 'all'], default='all', help='What to run')
+    parser.add_argument('--url', default=None,
+                        help='Benchmark an already running server instead of starting one on a synthetic snapshot')
+    parser.add_argument('--port', type=int, default=8181, help='Port for the locally started server')
+    parser.add_argument('--workers', type=int, default=1, help='API worker processes for the local server')
+    parser.add_argument('--endpoint', action='append', dest='endpoints',
+                        help='Endpoint to load-test (repeatable, default: /api/libraries and /api/health)')
+    parser.add_argument('--concurrency', type=int, default=16, help='Concurrent connections')
+    parser.add_argument('--requests', type=int, default=500, help='Requests per endpoint')
+    parser.add_argument('--no-keep-alive', action='store_true', help='Open a new connection for every request')
+    parser.add_argument('--header', action='append', default=[], help='Extra request header, e.g. "Accept: x/y"')
+    parser.add_argument('--repeat', type=int, default=200, help='Calls per microbenchmark')
+    parser.add_argument('--config', default=os.path.join(SERVER_DIR, 'config.json'), help='config.json to use')
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help='Baseline file to compare against')
+    parser.add_argument('--save-baseline', action='store_true', help='Store these results as the new baseline')
+    parser.add_argument('--tolerance', type=float, default=0.2, help='Allowed slowdown before flagging (fraction)')
+    parser.add_argument('--fail-on-regression', action='store_true', help='Exit with 1 if a regression is flagged')
+
+    args = parser.parse_args()
+    config = AppConfig(args.config)
+    endpoints = args.endpoints or ['/api/libraries', '/api/health']
+    headers = dict(h.split(":", 1) for h in args.header)
+    headers = {key.strip(): value.strip() for key, value in headers.items()}
+
+    print("📊 PlatzPilot Benchmark Suite")
+    print("=" * 40)
+    results = {}
+
+    if args.mode in ('load', 'all'):
+        process = workdir = None
+        url = args.url
+        if url is None:
+            workdir = prepare_workdir(args.config)
+            process = start_api_server(workdir, args.port, args.workers)
+            url = f"http://127.0.0.1:{args.port}"
+        try:
+            # Warm-up pass so connection setup and first-version snapshot copies are not measured
+            run_load(url, endpoints, min(args.concurrency, 4), 20, not args.no_keep_alive, headers)
+            results["load"] = run_load(url, endpoints, args.concurrency, args.requests,
+                                       not args.no_keep_alive, headers)
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait(10)
+            if workdir is not None:
+                shutil.rmtree(workdir, ignore_errors=True)
+        print_load(results["load"])
+
+    if args.mode in ('micro', 'all'):
+        results["micro"] = run_micro(config, args.repeat)
+        print_micro(results["micro"])
+
+    exit_code = 0
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, 'r') as f:
+            baseline = json.load(f)
+        regressions = compare(results, baseline, args.tolerance)
+        print(f"\n📐 Compared with baseline from {baseline.get('created', 'unknown')}")
+        if regressions:
+            for name, old, new in regressions:
+                print(f"   ❌ {name}: {old} -> {new}")
+            exit_code = 1 if args.fail_on_regression else 0
+        else:
+            print(f"   ✅ No regressions beyond {args.tolerance:.0%}")
+
+    if args.save_baseline:
+        with open(args.baseline, 'w') as f:
+            json.dump({"created": datetime.now().isoformat(), "results": results}, f, indent=2)
+        print(f"\n💾 Baseline saved to {args.baseline}")
+
+    return exit_code
+
+if __name__ == "__main__":
+    sys.exit(main())
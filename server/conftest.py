@@ -0,0 +1,2 @@
+# Manual smoke test against a running API server (python test_api.py), not a pytest module
+collect_ignore = ["test_api.py"]
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+Export the raw occupancy history (archive plus ring buffer) with timestamps and location codes.
+
+    cd server && python export_data.py --format csv --output occupancy.csv
+    python export_data.py --format npz --start 2026-09-01 --output september.npz
+    python export_data.py --format npy --output - | gzip > occupancy.npy.gz
+
+The same export is served by the API as GET /api/export?format=...&start=...&end=...
+"""
+
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from tools.config import AppConfig
+from tools.export import FORMATS, export
+from tools.storage import RingBufferStore
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Export the occupancy history')
+    parser.add_argument('--format', choices=FORMATS, default='csv', help='Output format')
+    parser.add_argument('--output', default=None, help='Output file, "-" for stdout (default: occupancy.<format>)')
+    parser.add_argument('--start', type=datetime.fromisoformat, default=None, help='First reading time (ISO format)')
+    parser.add_argument('--end', type=datetime.fromisoformat, default=None, help='Last reading time (ISO format)')
+    parser.add_argument('--chunk-rows', type=int, default=4096, help='Rows per chunk (bounds memory use)')
+    parser.add_argument('--config', default='config.json', help='config.json to use')
+    parser.add_argument('--site', default=None, help='Site to use (default: the primary site)')
+
+    args = parser.parse_args()
+    config = AppConfig(args.config).site(args.site)
+    store = RingBufferStore(storage_dir=config.ring_buffer_config, num_buildings=config.location_number,
+                            archive_dir=config.archive_dir, read_only=True)
+
+    output = args.output or f"occupancy.{args.format}"
+    start = time.perf_counter()
+    if output == '-':
+        rows = export(store, config.location_codes, args.format, sys.stdout.buffer, args.start, args.end,
+                      args.chunk_rows)
+        sys.stdout.buffer.flush()
+        report = sys.stderr
+    else:
+        with open(output, 'wb') as f:
+            rows = export(store, config.location_codes, args.format, f, args.start, args.end, args.chunk_rows)
+        report = sys.stdout
+
+    print(f"📦 Exported {rows} readings x {config.location_number} locations as {args.format} "
+          f"to {output} in {time.perf_counter() - start:.1f}s", file=report)
+
+if __name__ == "__main__":
+    main()
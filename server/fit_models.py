@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Fit the Holt-Winters smoothing parameters per building against the ring buffer history.
+
+Scores a grid of (alpha, beta, gamma) for all buildings in one vectorized pass
+(see tools/fitting.py) and writes the winners to <model_dir>/fitted_params.json,
+which the running collector picks up on its next cycle. Meant to run nightly:
+
+    cd server && python fit_models.py
+    # crontab: 30 3 * * * cd /path/to/server && ../venv/bin/python fit_models.py --quiet
+"""
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from tools.config import AppConfig
+from tools.fitting import DEFAULT_GRID, fit_parameters, param_grid, write_fitted_params
+from tools.forecast import HoltWintersOnline, STATE_FILE
+from tools.storage import RingBufferStore
+
+
+def current_params(model_dir, num_buildings):
+    """(alpha, beta, gamma) per building from the state files, defaults where no state exists."""
+    default = HoltWintersOnline()
+    params = np.tile([default.alpha, default.beta, default.gamma], (num_buildings, 1))
+    for i in range(num_buildings):
+        state_file = os.path.join(model_dir, STATE_FILE.format(i))
+        if os.path.exists(state_file):
+            with open(state_file, 'r') as f:
+                state = json.load(f)
+            params[i] = [state.get('alpha', params[i, 0]),
+                         state.get('beta', params[i, 1]),
+                         state.get('gamma', params[i, 2])]
+    return params
+
+
+def parse_values(text):
+    return tuple(float(v) for v in text.split(","))
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Fit Holt-Winters parameters from ring buffer history')
+    parser.add_argument('--config', default='config.json', help='config.json to use')
+    parser.add_argument('--site', default=None, help='Site to use (default: the primary site)')
+    parser.add_argument('--horizon', type=int, default=1, help='Forecast step (in intervals) to optimize for')
+    parser.add_argument('--alphas', type=parse_values, default=DEFAULT_GRID["alpha"], help='Comma-separated alphas')
+    parser.add_argument('--betas', type=parse_values, default=DEFAULT_GRID["beta"], help='Comma-separated betas')
+    parser.add_argument('--gammas', type=parse_values, default=DEFAULT_GRID["gamma"], help='Comma-separated gammas')
+    parser.add_argument('--workers', type=int, default=1, help='Processes to spread buildings over')
+    parser.add_argument('--nice', type=int, default=10, help='Niceness increment so collection keeps priority')
+    parser.add_argument('--min-improvement', type=float, default=0.02,
+                        help='Only replace parameters that lower the RMSE by at least this fraction')
+    parser.add_argument('--dry-run', action='store_true', help='Report results without writing them')
+    parser.add_argument('--quiet', action='store_true', help='Only print the summary line')
+
+    args = parser.parse_args()
+    if args.nice:
+        os.nice(args.nice)
+
+    config = AppConfig(args.config).site(args.site)
+    forecast_config = config.forecast_config
+    codes = config.location_codes
+    num_buildings = forecast_config["num_buildings"]
+    season_length = forecast_config["season_length"]
+    model_dir = forecast_config["model_dir"]
+
+    if not os.path.exists(os.path.join(config.ring_buffer_config, 'pointer.json')):
+        print(f"❌ No ring buffer in {config.ring_buffer_config}, nothing to fit")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    _, counts = RingBufferStore(storage_dir=config.ring_buffer_config, num_buildings=num_buildings,
+                                read_only=True).get_all()
+    max_seats = np.asarray(forecast_config["max_seats_list"][:num_buildings])
+    current = current_params(model_dir, num_buildings)
+    grid = param_grid(args.alphas, args.betas, args.gammas)
+
+    result = fit_parameters(counts, max_seats, current, grid, season_length, args.horizon, args.workers)
+    elapsed = time.perf_counter() - start
+
+    # Constant history (e.g. a location that never reported) carries no signal to fit against
+    has_signal = np.ptp(counts, axis=0) > 0
+    improved = result["rmse"] < result["current_rmse"] * (1 - args.min_improvement)
+    # The grid covers the single-seasonal model only; double-seasonal buildings keep their parameters
+    fits_model = np.array([t == HoltWintersOnline.model_type for t in forecast_config["model_types"]])
+    apply = has_signal & improved & fits_model
+
+    if not args.quiet:
+        print("🔧 PlatzPilot Model Fitting")
+        print("=" * 40)
+        print(f"   {len(grid)} parameter sets x {num_buildings} buildings over {len(counts)} slots")
+        for i in range(num_buildings):
+            code = codes[i] if i < len(codes) else str(i)
+            alpha, beta, gamma = result["params"][i]
+            mark = "✅" if apply[i] else ("--" if not fits_model[i] else "  ")
+            print(f" {mark} {code:6} alpha={alpha:<5g} beta={beta:<6g} gamma={gamma:<5g} "
+                  f"rmse {result['current_rmse'][i]:7.2f} -> {result['rmse'][i]:7.2f}")
+
+    if args.dry_run or not apply.any():
+        print(f"📊 Fitted in {elapsed:.1f}s, {int(apply.sum())} buildings improved"
+              f"{' (dry run, nothing written)' if args.dry_run else ', nothing written'}")
+        return
+
+    codes = [codes[i] if i < len(codes) else str(i) for i in range(num_buildings)]
+    path = write_fitted_params(model_dir, codes, result["params"], result["rmse"], result["current_rmse"],
+                               args.horizon, apply)
+    print(f"📊 Fitted in {elapsed:.1f}s, {int(apply.sum())} buildings improved, written to {path}")
+
+if __name__ == "__main__":
+    main()
@@ -1,82 +1,568 @@
 import logging
 import json
 import os
-from time import sleep
-from tools.log import setup_logger
-from tools.fetcher import fetch_seats
-from tools.storage import RingBufferStore
-from tools.formatting import json_handler
-from tools.forecast import ForecastManager
-from tools.config import AppConfig
+import signal
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+from time import monotonic, time
+from tools.log import setup_logger, set_level
+from tools.formatting import json_handler, convert_opening_hours
+from tools.config import AppConfig, column_map, file_stamp
+from tools.decoder import DATE_FORMAT, DecodeError
+from tools.lazy import LazyMembers
+from tools.timing import PhaseTimer
+from tools.tracing import Tracer, span
 
-config = AppConfig('config.json')
+TRACE_FILE = "collector_trace.json"
 
-ring_buffer = RingBufferStore(storage_dir=config.ring_buffer_config)
-logger = setup_logger(name="seat_tracker", level=logging.DEBUG, logger_dir=config.logger_config)
-forecast_manager = ForecastManager(ring_buffer, **config.forecast_config)
 
+class SiteCollector(LazyMembers):
+    """
+    Storage, forecasting and publishing for one SeatFinder site.
 
-def main():
-    logger.info("Starting seat-tracker service")
+    The ring buffer, forecaster and snapshot writers (and the NumPy imports
+    behind them) are created on first use. Sites only share the collector's
+    logger and timer, so several of them can process payloads concurrently.
 
-    while True:
-        fetched_data = None
-        try:
-            fetched_data = fetch_seats(config.fetch_url)
-            logger.debug("Raw fetched data: %r", fetched_data)
+    Args:
+        name (str): Site name, labels log lines and timed phases.
+        config (AppConfig): The site's config (see `AppConfig.site`).
+        logger (logging.Logger): The collector's logger.
+        timer (PhaseTimer): The collector's startup phase timer.
+    """
 
-        except Exception as e:
-            logger.error("Failed to fetch seats: %s", e)
-
-        if fetched_data:
-            if not isinstance(fetched_data, list) or len(fetched_data) < 2:
-                logger.critical("Expected fetched_data to be a list of length 2")
-                raise TypeError("Expected a list of length 2")
-
-            seat_estimate = fetched_data[0].get("seatestimate")
-            if not isinstance(seat_estimate, dict) or len(seat_estimate) != config.location_number:
-                logger.critical("seatestimate malformed: %r", seat_estimate)
-                raise ValueError("Expected fetched_data[0]['seatestimate'] to be a dictionary of length %s",
-                                 config.location_number)
-
-            last_seat_count_update = seat_estimate['LSG'][0]['timestamp']['date']
-
-            library_is_closed_flag = {}
-            number_of_free_seats_currently = []
-            for key, timestamp_list in seat_estimate.items():
-                if not isinstance(timestamp_list, list) or len(timestamp_list) < 1:
-                    number_of_free_seats_currently.append(0)
-                    library_is_closed_flag[key] = True
+    def __init__(self, name, config, logger, timer):
+        super().__init__()
+        self.name = name
+        self.config = config
+        self.logger = logger
+        self.timer = timer
+
+    def _phase(self, name):
+        return f"{self.name}.{name}"
+
+    @property
+    def ring_buffer(self):
+        def create():
+            from tools.storage import RingBufferStore
+            return RingBufferStore(storage_dir=self.config.ring_buffer_config, num_buildings=self.config.location_number,
+                                   archive_dir=self.config.archive_dir)
+        return self._lazy("ring_buffer", create)
+
+    @property
+    def forecast_manager(self):
+        def create():
+            from tools.forecast import ForecastManager
+            return ForecastManager(self.ring_buffer, **self.config.forecast_config)
+        return self._lazy("forecast_manager", create)
+
+    @property
+    def profiles(self):
+        def create():
+            from tools.profiles import OccupancyProfiles
+            return OccupancyProfiles(self.config.ring_buffer_config, self.config.forecast_config["max_seats_list"],
+                                     interval_minutes=self.config.fetch_interval // 60,
+                                     **self.config.profile_config)
+        return self._lazy("profiles", create)
+
+    @property
+    def snapshot_writer(self):
+        def create():
+            from tools.snapshot import SnapshotWriter
+            return SnapshotWriter(os.path.join(self.config.ring_buffer_config, self.config.snapshot_file))
+        return self._lazy("snapshot_writer", create)
+
+    @property
+    def model_snapshot_writer(self):
+        def create():
+            from tools.snapshot import SnapshotWriter
+            return SnapshotWriter(os.path.join(self.config.ring_buffer_config, self.config.model_snapshot_file))
+        return self._lazy("model_snapshot_writer", create)
+
+    @property
+    def recommendations_writer(self):
+        def create():
+            from tools.snapshot import SnapshotWriter
+            return SnapshotWriter(os.path.join(self.config.ring_buffer_config, self.config.recommendations_file))
+        return self._lazy("recommendations_writer", create)
+
+    @property
+    def decoder(self):
+        def create():
+            from tools.decoder import SeatFinderDecoder
+            return SeatFinderDecoder(self.config.location_codes)
+        return self._lazy("decoder", create)
+
+    def warm_up(self):
+        """Load storage and model states and map the snapshot files."""
+        self.forecast_manager
+        self.profiles
+        self.snapshot_writer
+        self.model_snapshot_writer
+        self.recommendations_writer
+
+    def apply_config(self, config):
+        """
+        Switch to a reloaded config; called between cycles.
+
+        When the locations change, per-building state follows them by location code: ring buffer
+        and archive columns, model states and profiles are remapped, so the locations that stay
+        keep their history and models and new ones start empty. Members whose files moved, or
+        whose settings are fixed when they are created, are created again on next use.
+        """
+        old = self.config
+        with self._init_lock:
+            try:
+                if (old.ring_buffer_config, old.archive_dir, old.forecast_config["model_dir"]) != \
+                        (config.ring_buffer_config, config.archive_dir, config.forecast_config["model_dir"]):
+                    if "forecast_manager" in self._members:
+                        self._members["forecast_manager"].persist()
+                    self._members.clear()
                 else:
-                    number_of_free_seats_currently.append(timestamp_list[0].get("free_seats"))
-                    library_is_closed_flag[key] = False
-            logger.debug("registered number of free seats: %s", number_of_free_seats_currently)
+                    self._reshape(old, config)
+            except Exception:
+                # Start over from what is on disk rather than keep half-remapped state
+                self._members.clear()
+                raise
+            finally:
+                self.config = config
+
+    def _reshape(self, old, config):
+        layout_changed = old.location_codes != config.location_codes
+        seats_changed = old.forecast_config["max_seats_list"] != config.forecast_config["max_seats_list"]
+        mapping = column_map(old.location_codes, config.location_codes)
+        if layout_changed:
+            # Open everything with the old layout first, so nothing is left on disk in it
+            self.forecast_manager
+            self.profiles
+            self.ring_buffer.remap_columns(mapping)
+            self._members.pop("decoder", None)
+
+        forecast_manager = self._members.get("forecast_manager")
+        if forecast_manager is not None:
+            if layout_changed or seats_changed or old.forecast_model_types != config.forecast_model_types:
+                forecast_manager.remap_buildings(mapping, config.forecast_config["max_seats_list"],
+                                                 config.forecast_model_types, config.location_codes)
+            forecast_manager.max_forecast = config.forecast_config["max_forecast"]
+            forecast_manager.persist_every = config.forecast_config["persist_every"]
 
-            if len(number_of_free_seats_currently) != config.location_number:
-                logger.critical("number_of_free_seats_currently not the expected length")
-                raise ValueError("Expected number_of_free_seats_currently to be a list of length %s",
-                                 config.location_number)
+        if "profiles" in self._members:
+            if old.profile_config != config.profile_config:
+                del self._members["profiles"]
+            elif layout_changed or seats_changed:
+                self._members["profiles"].remap_buildings(mapping, config.forecast_config["max_seats_list"])
 
-            ring_buffer.append(number_of_free_seats_currently, last_seat_count_update)
-            logger.info("Appended %d-seat record at buffer pos %d", len(seat_estimate), ring_buffer.pointer)
+        for member, setting in (("snapshot_writer", "snapshot_file"), ("model_snapshot_writer", "model_snapshot_file"),
+                                ("recommendations_writer", "recommendations_file")):
+            if getattr(old, setting) != getattr(config, setting):
+                self._members.pop(member, None)
 
-            location = fetched_data[1]['location']
-            if not isinstance(location, dict) or len(location) != config.location_number:
-                logger.critical("location malformed: %r", location)
-                raise ValueError("Expected fetched_data[0]['location'] to be a dictionary of length %s",
-                                 config.location_number)
+    def process_payload(self, body, fetched_at=None):
+        """
+        Decode, store, forecast and publish one fetched SeatFinder response (raw body or parsed).
+
+        `fetched_at` (epoch seconds, default now) stands in for the reading time when every
+        location is closed, so the ring buffer and the models' seasonal position still advance.
+        """
+        with span("decode"):
+            reading = self.decoder.decode(body)
+        last_seat_count_update = reading.reading_time
+        if last_seat_count_update is None:
+            last_seat_count_update = datetime.fromtimestamp(time() if fetched_at is None else fetched_at) \
+                .strftime(DATE_FORMAT)
+        number_of_free_seats_currently = reading.free.tolist()
+        library_is_closed_flag = dict(zip(self.config.location_codes, reading.closed.tolist()))
+        location = reading.locations
+        self.logger.debug("registered number of free seats: %s", number_of_free_seats_currently)
+
+        with span("store"):
+            self.ring_buffer.append(reading.free, last_seat_count_update)
+        self.logger.info("[%s] Appended %d-seat record at buffer pos %d", self.name, self.config.location_number,
+                         self.ring_buffer.pointer)
+
+        try:
+            with span("profiles"):
+                self.profiles.update(datetime.strptime(last_seat_count_update, DATE_FORMAT),
+                                     reading.free, ~reading.closed)
+        except Exception as e:
+            # Profiles are derived data; a failure here must not fail the cycle
+            self.logger.error("[%s] Failed to update occupancy profiles: %s", self.name, e)
 
-            forecasts = forecast_manager.update_and_forecast()
-            logger.debug("forecast returned: %s", forecasts)
+        with span("forecast"):
+            # Closed buildings and closed hours cost no model updates or forecasts
+            schedules = [convert_opening_hours(location[code][0]["opening_hours"])
+                         for code in self.config.location_codes]
+            forecasts = self.forecast_manager.update_and_forecast(reading.closed, schedules)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("forecast returned: %s", forecasts)
 
+        with span("format"):
             json_to_push = json_handler(location, forecasts, number_of_free_seats_currently, library_is_closed_flag,
-                                        config)
-            logger.debug("json_handler returned: %s", json_to_push)
+                                        self.config)
+        if self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.debug("json_handler returned: %s", json_to_push)
 
-            with open(os.path.join(config.ring_buffer_config, config.json_save_file), 'w') as f:
+        with span("write_json"):
+            with open(os.path.join(self.config.ring_buffer_config, self.config.json_save_file), 'w') as f:
                 json.dump(json_to_push, f, ensure_ascii=True, indent=2)
 
-            sleep(config.fetch_interval)
+        # Compact copy for the API workers, shared through one memory-mapped file
+        with span("publish"):
+            version = self.snapshot_writer.publish(
+                json.dumps(json_to_push, ensure_ascii=False, separators=(',', ':')).encode('utf-8'),
+                entries=len(json_to_push)
+            )
+        self.logger.info("[%s] Published snapshot v%d", self.name, version)
+
+        # Model states for on-demand long-horizon forecasts in the API
+        with span("publish_models"):
+            self.model_snapshot_writer.publish(self.forecast_manager.pack_states(last_seat_count_update, schedules),
+                                               entries=self.config.location_number)
+
+        try:
+            with span("recommendations"):
+                self.publish_recommendations(schedules, number_of_free_seats_currently, library_is_closed_flag,
+                                             last_seat_count_update)
+        except Exception as e:
+            # Recommendations are derived data; a failure here must not fail the cycle
+            self.logger.error("[%s] Failed to compute recommendations: %s", self.name, e)
+
+    def publish_recommendations(self, schedules, free_seats, is_closed, reading_time):
+        """Publish best-time-to-go windows for every library and group (see tools/recommend.py)."""
+        from tools.recommend import recommendations
+
+        settings = self.config.recommendation_config
+        codes = self.config.location_codes
+        reading_time = datetime.strptime(reading_time, DATE_FORMAT)
+
+        entries = recommendations(
+            codes, self.config.forecast_config["max_seats_list"], free_seats,
+            [is_closed.get(code, True) for code in codes],
+            self.forecast_manager.forecast(settings["horizon"], schedules), schedules, reading_time,
+            self.config.formatting_grouping, settings["thresholds"], self.config.fetch_interval // 60,
+            settings["max_windows"])
+        payload = {
+            "reading_time": reading_time.isoformat(),
+            "horizon_minutes": settings["horizon"] * self.config.fetch_interval // 60,
+            "thresholds": settings["thresholds"],
+            "entries": entries
+        }
+        version = self.recommendations_writer.publish(
+            json.dumps(payload, ensure_ascii=False, separators=(',', ':')).encode('utf-8'), entries=len(entries))
+        self.logger.debug("[%s] Published recommendations v%d", self.name, version)
+
+
+class Collector(LazyMembers):
+    """
+    The seat-tracker service: fetches SeatFinder data, stores it, forecasts and publishes snapshots.
+
+    Every site in config.json (see `AppConfig.site_names`) gets its own
+    SiteCollector. A cycle fetches and processes all sites concurrently on one
+    thread pool over one pooled HTTP session, so dozens of sites run in a
+    single process.
+
+    Nothing heavy happens in the constructor. The sites' ring buffers,
+    forecasters and snapshot writers (and the NumPy/requests imports behind
+    them) are created on first use, and `start_warmup()` builds them on a
+    background thread so the first fetch does not wait for the model states
+    to load. Every phase is timed with a PhaseTimer.
+
+    Attributes:
+        config_path (str): Path of config.json.
+        timer (PhaseTimer): Startup phase durations.
+        stop_event (threading.Event): Set to leave the collection loop after the current cycle.
+    """
+
+    def __init__(self, config_path='config.json'):
+        super().__init__()
+        self.config_path = config_path
+        self.timer = PhaseTimer()
+        self.stop_event = threading.Event()
+        self._warmup_thread = None
+        self._profile_requested = 0
+        self._profile = None
+        self._reload_requested = False
+        self._rejected_stamp = None
+
+    @property
+    def config(self):
+        return self._lazy("config", lambda: AppConfig(self.config_path))
+
+    @property
+    def logger(self):
+        return self._lazy("logger", lambda: setup_logger(
+            name="seat_tracker", level=self.config.logging_config["level"], logger_dir=self.config.logger_config,
+            use_queue=self.config.logging_config["use_queue"]))
+
+    @property
+    def sites(self):
+        """Site name -> SiteCollector, the primary site first."""
+        return self._lazy("sites", lambda: {
+            name: SiteCollector(name, self.config.site(name), self.logger, self.timer)
+            for name in self.config.site_names
+        })
+
+    @property
+    def primary(self):
+        return self.sites[self.config.site_name]
+
+    @property
+    def tracer(self):
+        def create():
+            settings = self.config.tracing_config
+            return Tracer(capacity=settings["cycles"] * len(self.config.site_names),
+                          slow_seconds=settings["slow_cycle_seconds"])
+        return self._lazy("tracer", create)
+
+    @property
+    def session(self):
+        def create():
+            from tools.fetcher import create_session
+            return create_session(pool_size=self.config.collector_config["http_pool_size"])
+        return self._lazy("session", create)
+
+    @property
+    def executor(self):
+        return self._lazy("executor", lambda: ThreadPoolExecutor(
+            max_workers=max(1, min(len(self.sites), self.config.collector_config["site_workers"])),
+            thread_name_prefix="SiteCollector"))
+
+    def fetch(self, site=None):
+        """Raw response body of `site` (default: the primary site), decoded in `process_payload`."""
+        from tools.fetcher import fetch_body
+        return fetch_body((site or self.primary).config.fetch_url, session=self.session)
+
+    def process_payload(self, body, site=None):
+        """Decode, store, forecast and publish one fetched SeatFinder response of `site` (default: the primary site)."""
+        (site or self.primary).process_payload(body, fetched_at=self.now())
+
+    def now(self):
+        """Wall-clock time for heartbeats; replaced by a virtual clock in replays."""
+        return time()
+
+    def wait(self, seconds):
+        """Sleep between cycles, returning early when a stop is requested and applying config changes meanwhile."""
+        deadline = monotonic() + seconds
+        while not self.stop_event.is_set():
+            remaining = deadline - monotonic()
+            if remaining <= 0:
+                return
+            poll = self.config.collector_config["config_poll_seconds"]
+            self.stop_event.wait(min(remaining, poll) if poll else remaining)
+            if poll:
+                self.check_config()
+
+    def start_warmup(self):
+        """Load storage and model states in the background; the first forecast joins this thread."""
+        def warm_up():
+            try:
+                self.session
+                for site in self.sites.values():
+                    site.warm_up()
+                self.logger.info("Forecaster warm after %.0fms (%s)", self.timer.elapsed() * 1000,
+                                 self.timer.summary())
+            except Exception as e:
+                # Surfaced again (and handled) when the first cycle touches the forecaster
+                self.logger.error("Background warm-up failed: %s", e)
+
+        self._warmup_thread = threading.Thread(target=warm_up, name="CollectorWarmup", daemon=True)
+        self._warmup_thread.start()
+
+    def request_stop(self, signum=None, frame=None):
+        """Finish the current cycle and leave the collection loop."""
+        self.logger.info("Stop requested (signal %s), finishing current cycle", signum)
+        self.stop_event.set()
+
+    def request_reload(self, signum=None, frame=None):
+        """Reload config.json before the next cycle (SIGHUP)."""
+        self._reload_requested = True
+
+    def check_config(self):
+        """Reload config.json if requested or if the file changed; costs one stat otherwise."""
+        stamp = file_stamp(self.config_path)
+        if self._reload_requested or stamp not in (self.config.stamp, self._rejected_stamp):
+            self._reload_requested = False
+            return self.reload_config()
+        return False
+
+    def reload_config(self):
+        """
+        Load config.json again and apply it to every site; run between cycles.
+
+        An invalid file is logged once and otherwise ignored: collection goes on with the
+        current config until the file is fixed. New sites start on the next cycle, removed
+        ones stop; logging level, tracing and thread pool settings follow as well. The log
+        directory and HTTP pool size only change on restart.
+
+        Returns:
+            bool: Whether the new config was applied.
+        """
+        old = self.config
+        try:
+            config = AppConfig(self.config_path)
+        except (OSError, ValueError) as e:
+            self._rejected_stamp = file_stamp(self.config_path)
+            self.logger.error("Keeping the current configuration: %s", e)
+            return False
+        self._rejected_stamp = None
+        if config.data == old.data:
+            # Touched or rewritten without changes
+            self._members["config"] = config
+            return False
+
+        with self._init_lock:
+            sites = {}
+            for name in config.site_names:
+                site = self.sites.get(name)
+                if site is None:
+                    site = SiteCollector(name, config.site(name), self.logger, self.timer)
+                    self.logger.info("[%s] Site added", name)
+                else:
+                    try:
+                        site.apply_config(config.site(name))
+                    except Exception as e:
+                        self.logger.error("[%s] Failed to apply the new config, reopening its state: %s", name, e)
+                sites[name] = site
+            for name in self.sites:
+                if name not in sites:
+                    self.logger.info("[%s] Site removed", name)
+
+            if "executor" in self._members and (len(sites) != len(self.sites) or
+                                                old.collector_config != config.collector_config):
+                self._members.pop("executor").shutdown(wait=True)
+            if len(sites) != len(self.sites) or old.tracing_config != config.tracing_config:
+                self._members.pop("tracer", None)
+            self._members["sites"] = sites
+            self._members["config"] = config
+            set_level(self.logger, config.logging_config["level"])
+
+        changed = sorted(section for section in set(old.data) | set(config.data)
+                         if old.data.get(section) != config.data.get(section))
+        self.logger.info("Reloaded %s (changed: %s)", self.config_path, ", ".join(changed) or "nothing")
+        return True
+
+    def request_trace_dump(self, signum=None, frame=None):
+        """Write the traces of recent cycles to the log directory (SIGUSR1)."""
+        # Not inside the handler: the interrupted code may hold the tracer's lock
+        threading.Thread(target=self.dump_trace, name="TraceDump", daemon=True).start()
+
+    def dump_trace(self):
+        path = self.tracer.dump(os.path.join(self.config.logger_config, TRACE_FILE))
+        summary = self.tracer.summary()
+        self.logger.info("Wrote %d cycle traces to %s; p50/p95 per stage: %s", len(self.tracer.recent()), path,
+                         ", ".join(f"{stage} {s['p50_ms']:.0f}/{s['p95_ms']:.0f}ms" for stage, s in summary.items()))
+        return path
+
+    def request_profile(self, signum=None, frame=None, cycles=None):
+        """cProfile the next `cycles` cycles (default: tracing.profile_cycles) into the log directory (SIGUSR2)."""
+        self._profile_requested = cycles or self.config.tracing_config["profile_cycles"]
+
+    def _report_slow_cycle(self, trace):
+        self.logger.warning("[%s] Slow cycle: %.1fs (%s)", trace.label, trace.duration, trace.describe())
+
+    def write_heartbeat(self, status, site_statuses=None):
+        """Record the end of a cycle so the launcher can tell a stuck collector from a slow one."""
+        os.makedirs(self.config.ring_buffer_config, exist_ok=True)
+        path = os.path.join(self.config.ring_buffer_config, self.config.heartbeat_file)
+        with open(path, 'w') as f:
+            json.dump({'time': self.now(), 'pid': os.getpid(), 'status': status, 'sites': site_statuses or {}}, f)
+
+    def collect(self, site):
+        """Fetch and process one site (traced); returns the cycle status of that site."""
+        with self.tracer.cycle(site.name, on_slow=self._report_slow_cycle) as trace:
+            trace.status = self._collect(site)
+        return trace.status
+
+    def _collect(self, site):
+        try:
+            with span("fetch"):
+                body = self.fetch(site)
+            if self.logger.isEnabledFor(logging.DEBUG):
+                self.logger.debug("[%s] Raw fetched data: %r", site.name, body)
+
+        except Exception as e:
+            self.logger.error("[%s] Failed to fetch seats: %s", site.name, e)
+            return "fetch_failed"
+
+        if not body:
+            return "no_data"
+        try:
+            self.process_payload(body, site)
+            return "ok"
+        except DecodeError as e:
+            # A single bad payload must not take the collector (or the other sites) down; skip this cycle
+            self.logger.critical("[%s] Skipping malformed SeatFinder payload at %s: %s", site.name,
+                                 e.path or "<body>", e.reason)
+            return "malformed"
+        except Exception:
+            # Nor may anything else that goes wrong while storing, forecasting or publishing it
+            self.logger.exception("[%s] Failed to process the SeatFinder payload", site.name)
+            return "error"
+
+    def run_cycle(self):
+        """Collect every site once; returns {site name: status}."""
+        sites = list(self.sites.values())
+        if self._profile is None and self._profile_requested:
+            import cProfile
+            self._profile = (cProfile.Profile(), self._profile_requested)
+            self._profile_requested = 0
+            self.logger.info("Profiling the next %d cycle(s)", self._profile[1])
+
+        if self._profile is not None:
+            # cProfile only sees its own thread, so profiled cycles run the sites one after another here
+            profiler, remaining = self._profile
+            profiler.enable()
+            try:
+                statuses = {site.name: self.collect(site) for site in sites}
+            finally:
+                profiler.disable()
+            self._profile = (profiler, remaining - 1)
+            if remaining <= 1:
+                self._finish_profile()
+        elif len(sites) == 1:
+            statuses = {sites[0].name: self.collect(sites[0])}
+        else:
+            statuses = dict(zip(self.sites, self.executor.map(self.collect, sites)))
+        return statuses
+
+    def _finish_profile(self):
+        profiler, _ = self._profile
+        self._profile = None
+        os.makedirs(self.config.logger_config, exist_ok=True)
+        path = os.path.join(self.config.logger_config, f"collector-{datetime.now():%Y%m%d-%H%M%S}.prof")
+        profiler.dump_stats(path)
+        self.logger.info("Wrote cycle profile to %s (inspect with: python -m pstats %s)", path, path)
+
+    def run(self):
+        """Collect until `stop_event` is set."""
+        self.logger.info("Starting seat-tracker service for %d site(s) (ready after %.0fms)",
+                         len(self.config.site_names), self.timer.elapsed() * 1000)
+        self.start_warmup()
+
+        if threading.current_thread() is threading.main_thread():
+            signal.signal(signal.SIGTERM, self.request_stop)
+            if hasattr(signal, "SIGUSR1"):
+                signal.signal(signal.SIGUSR1, self.request_trace_dump)
+                signal.signal(signal.SIGUSR2, self.request_profile)
+                signal.signal(signal.SIGHUP, self.request_reload)
+
+        try:
+            while not self.stop_event.is_set():
+                self.check_config()
+                statuses = self.run_cycle()
+                status = next((s for s in statuses.values() if s != "ok"), "ok")
+                self.write_heartbeat(status, statuses)
+                self.wait(self.config.fetch_interval)
+        finally:
+            if "executor" in self._members:
+                self._members["executor"].shutdown(wait=True)
+
+        self.logger.info("Seat-tracker service stopped")
+
+
+def main():
+    Collector('config.json').run()
 
 
 if __name__ == "__main__":
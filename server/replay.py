@@ -0,0 +1,204 @@
+#!/usr/bin/env python3
+"""
+Time-compressed replay of the full collector pipeline.
+
+Runs main.Collector (store, forecast, publish) against synthetic SeatFinder
+payloads on a virtual clock, so weeks of 5-minute cycles finish in seconds to
+minutes of wall time. Everything is written to a scratch directory, never to
+the live data/ or model_states/.
+
+    python replay.py --weeks 2 --scenario mixed
+    python replay.py --days 1 --via-stub --profile replay.prof
+"""
+
+import argparse
+import cProfile
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+
+SERVER_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, SERVER_DIR)
+
+from main import Collector
+from tools.fetcher import fetch_body
+from tools.synthetic import SCENARIOS, scenario_body
+
+
+class VirtualClock:
+    """A clock that only moves when told to."""
+
+    def __init__(self, start):
+        self.current = start
+
+    def now(self):
+        return self.current
+
+    def advance(self, seconds):
+        self.current += timedelta(seconds=seconds)
+
+
+class ReplayCollector(Collector):
+    """
+    Collector whose fetches, heartbeats and sleeps follow a VirtualClock.
+
+    Payloads are generated in-process for the clock's current time, or fetched
+    over HTTP from a seatfinder_stub server when `stub_url` is given.
+    """
+
+    def __init__(self, config_path, clock, cycles, scenario="normal", seed=0, stub_url=None):
+        super().__init__(config_path)
+        self.clock = clock
+        self.cycles = cycles
+        self.scenario = scenario
+        self.rng = random.Random(seed)
+        self.stub_url = stub_url
+        self.cycles_done = 0
+        self.statuses = {}
+        self.payload_seconds = []
+
+    def fetch(self, site=None):
+        site = site or self.primary
+        when = self.clock.now()
+        if self.stub_url and site is self.primary:
+            return fetch_body(f"{self.stub_url}&scenario={self.scenario}&at={when.isoformat()}",
+                              session=self.session)
+        return scenario_body(site.config, when, self.rng, self.scenario)
+
+    def process_payload(self, body, site=None):
+        start = time.perf_counter()
+        try:
+            super().process_payload(body, site)
+        finally:
+            self.payload_seconds.append(time.perf_counter() - start)
+
+    def now(self):
+        return self.clock.now().timestamp()
+
+    def write_heartbeat(self, status, site_statuses=None):
+        self.statuses[status] = self.statuses.get(status, 0) + 1
+        super().write_heartbeat(status, site_statuses)
+
+    def wait(self, seconds):
+        self.clock.advance(seconds)
+        self.cycles_done += 1
+        if self.cycles_done >= self.cycles:
+            self.stop_event.set()
+
+
+def prepare_workdir(workdir, config_path, log_level, persist_every=1, model_states=None, extra_sites=0):
+    """
+    Copy config.json into `workdir` (quieter logging) and optionally seed model states.
+
+    `extra_sites` adds that many sites ("site1", "site2", ...) with the primary site's
+    locations, to replay a multi-site collector.
+    """
+    os.makedirs(workdir, exist_ok=True)
+    with open(config_path, "r") as f:
+        config = json.load(f)
+    config.setdefault("logging", {})["level"] = log_level
+    config["logging"]["use_queue"] = True
+    config["other"]["model_persist_every"] = persist_every
+    sites = config.setdefault("sites", {})
+    for i in range(1, extra_sites + 1):
+        sites[f"site{i}"] = {"library_info": config["library_info"]}
+    with open(os.path.join(workdir, "config.json"), "w") as f:
+        json.dump(config, f, indent=2)
+    if model_states:
+        shutil.copytree(model_states, os.path.join(workdir, config["save_files"]["forecast_model_dir"]),
+                        dirs_exist_ok=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Replay the collector on a virtual clock')
+    span = parser.add_mutually_exclusive_group()
+    span.add_argument('--weeks', type=float, help='Virtual weeks to replay')
+    span.add_argument('--days', type=float, help='Virtual days to replay')
+    span.add_argument('--cycles', type=int, help='Number of collection cycles to replay')
+    parser.add_argument('--start', default=None, help='Virtual start time (ISO format, default: one week ago)')
+    parser.add_argument('--scenario', choices=SCENARIOS, default='normal', help='Payload scenario')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for synthetic data')
+    parser.add_argument('--via-stub', action='store_true',
+                        help='Fetch over HTTP from an in-process seatfinder_stub instead of generating in-process')
+    parser.add_argument('--workdir', default=None, help='Scratch directory (default: a temporary one)')
+    parser.add_argument('--keep', action='store_true', help='Keep the scratch directory afterwards')
+    parser.add_argument('--seed-model-states', action='store_true',
+                        help='Start from a copy of the repository model_states instead of fresh models')
+    parser.add_argument('--log-level', default='WARNING', help='Collector log level during the replay')
+    parser.add_argument('--persist-every', type=int, default=1,
+                        help='Write model states every N cycles (production writes every cycle)')
+    parser.add_argument('--extra-sites', type=int, default=0,
+                        help='Replay this many additional sites with the same locations alongside the primary one')
+    parser.add_argument('--profile', default=None, help='Write a cProfile of the replay to this file')
+    parser.add_argument('--config', default=os.path.join(SERVER_DIR, 'config.json'), help='config.json to copy')
+
+    args = parser.parse_args()
+
+    profile_path = os.path.abspath(args.profile) if args.profile else None
+    workdir = args.workdir or tempfile.mkdtemp(prefix="platzpilot-replay-")
+    prepare_workdir(workdir, args.config, args.log_level, args.persist_every,
+                    os.path.join(SERVER_DIR, "model_states") if args.seed_model_states else None, args.extra_sites)
+    os.chdir(workdir)
+
+    start = datetime.fromisoformat(args.start) if args.start else \
+        (datetime.now() - timedelta(weeks=1)).replace(second=0, microsecond=0)
+    collector_probe = Collector("config.json")
+    interval = collector_probe.config.fetch_interval
+    if args.cycles:
+        cycles = args.cycles
+    else:
+        seconds = (args.days or 0) * 86400 if args.days else (args.weeks or 1) * 7 * 86400
+        cycles = max(1, int(seconds // interval))
+
+    stub = None
+    stub_url = None
+    if args.via_stub:
+        from seatfinder_stub import StubState, make_server
+        stub = make_server(StubState(collector_probe.config, args.scenario, args.seed))
+        threading.Thread(target=stub.serve_forever, daemon=True).start()
+        stub_url = f"http://127.0.0.1:{stub.server_port}/karlsruhe/getdata.php?callback=replay"
+
+    collector = ReplayCollector("config.json", VirtualClock(start), cycles, args.scenario, args.seed, stub_url)
+
+    print("⏩ PlatzPilot Collector Replay")
+    print("=" * 40)
+    print(f"   {cycles} cycles of {interval}s from {start:%Y-%m-%d %H:%M} ({args.scenario}), "
+          f"{len(collector_probe.config.site_names)} site(s), workdir {workdir}")
+
+    profiler = cProfile.Profile() if args.profile else None
+    wall_start = time.perf_counter()
+    try:
+        if profiler:
+            profiler.enable()
+        collector.run()
+    finally:
+        if profiler:
+            profiler.disable()
+            profiler.dump_stats(profile_path)
+        if stub:
+            stub.shutdown()
+    wall = time.perf_counter() - wall_start
+
+    virtual = collector.clock.now() - start
+    print(f"\n✅ Replayed {collector.cycles_done} cycles ({virtual}) in {wall:.1f}s "
+          f"({collector.cycles_done / wall:.0f} cycles/s, {virtual.total_seconds() / wall:.0f}x real time)")
+    print(f"   Cycle outcomes: {collector.statuses}")
+    if collector.payload_seconds:
+        p50, p95, p99 = np.percentile(np.asarray(collector.payload_seconds) * 1000, [50, 95, 99])
+        print(f"   process_payload: p50 {p50:.2f}ms, p95 {p95:.2f}ms, p99 {p99:.2f}ms")
+    if args.profile:
+        print(f"   Profile written to {profile_path} (inspect with: python -m pstats {profile_path})")
+
+    if not args.keep and not args.workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
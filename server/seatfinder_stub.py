@@ -0,0 +1,138 @@
+#!/usr/bin/env python3
+"""
+Local stand-in for the SeatFinder JSONP endpoint.
+
+Serves synthetic payloads (see tools/synthetic.py for the scenarios) or
+recorded response bodies, so the collector can be exercised offline:
+
+    python seatfinder_stub.py --port 8090 --scenario mixed
+    # then point "seats_url" in a copy of config.json at
+    # http://127.0.0.1:8090/karlsruhe/getdata.php?callback=cb
+
+Query parameters override the defaults per request:
+    callback=<name>   JSONP callback name (default: jQuery_callback)
+    scenario=<name>   normal | closures | empty | malformed | mixed
+    at=<iso time>     reading time of the payload (used by replay.py's virtual clock)
+"""
+
+import argparse
+import json
+import os
+import random
+import sys
+import threading
+from datetime import datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+from urllib.parse import urlparse, parse_qs
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from tools.config import AppConfig
+from tools.synthetic import SCENARIOS, scenario_body, to_jsonp
+
+
+class StubState:
+    """
+    What the stand-in serves.
+
+    Attributes:
+        config (AppConfig): Location codes and seat counts for synthetic payloads.
+        scenario (str): Default scenario when the request does not name one.
+        recorded (list[str]): Recorded bodies served round-robin instead of synthetic data.
+        requests (int): Number of payloads served so far.
+    """
+
+    def __init__(self, config, scenario="normal", seed=0, record_dir=None, history=1):
+        self.config = config
+        self.scenario = scenario
+        self.history = history
+        self.rng = random.Random(seed)
+        self.recorded = load_recordings(record_dir) if record_dir else []
+        self.requests = 0
+        self._lock = threading.Lock()
+
+    def body(self, callback, scenario=None, when=None):
+        with self._lock:
+            self.requests += 1
+            if self.recorded:
+                name, text = self.recorded[(self.requests - 1) % len(self.recorded)]
+                if name.endswith(".json"):
+                    return to_jsonp(json.loads(text), callback)
+                return text
+            return scenario_body(self.config, when or datetime.now(), self.rng,
+                                 scenario or self.scenario, callback, self.history)
+
+
+def load_recordings(record_dir):
+    """Recorded bodies from `record_dir`, sorted by name. `.json` files are wrapped in JSONP on the fly."""
+    recordings = []
+    for name in sorted(os.listdir(record_dir)):
+        path = os.path.join(record_dir, name)
+        if os.path.isfile(path) and name.endswith((".json", ".jsonp", ".txt")):
+            with open(path, "r", encoding="utf-8") as f:
+                recordings.append((name, f.read()))
+    if not recordings:
+        raise ValueError(f"No .json/.jsonp/.txt recordings found in {record_dir}")
+    return recordings
+
+
+class SeatFinderStubHandler(BaseHTTPRequestHandler):
+    """Answers every GET with a JSONP payload, like getdata.php."""
+
+    state = None
+
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query)
+        callback = query.get("callback", ["jQuery_callback"])[0]
+        scenario = query.get("scenario", [None])[0]
+        at = query.get("at", [None])[0]
+
+        try:
+            when = datetime.fromisoformat(at) if at else None
+            body = self.state.body(callback, scenario, when).encode("utf-8")
+        except ValueError as e:
+            self.send_error(400, str(e))
+            return
+
+        self.send_response(200)
+        self.send_header("Content-Type", "application/javascript; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass
+
+
+def make_server(state, host="127.0.0.1", port=0):
+    """A ThreadingHTTPServer serving `state`; port 0 picks a free port (see server.server_port)."""
+    handler = type("BoundSeatFinderStubHandler", (SeatFinderStubHandler,), {"state": state})
+    return ThreadingHTTPServer((host, port), handler)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local SeatFinder stand-in')
+    parser.add_argument('--host', default='127.0.0.1', help='Host to bind to')
+    parser.add_argument('--port', type=int, default=8090, help='Port to bind to')
+    parser.add_argument('--scenario', choices=SCENARIOS, default='normal', help='Default payload scenario')
+    parser.add_argument('--record-dir', default=None, help='Serve recorded bodies from this directory instead')
+    parser.add_argument('--history', type=int, default=1, help='Readings per location in synthetic payloads')
+    parser.add_argument('--seed', type=int, default=0, help='Seed for synthetic noise and scenario choices')
+    parser.add_argument('--config', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'config.json'),
+                        help='config.json providing locations and seat counts')
+
+    args = parser.parse_args()
+    state = StubState(AppConfig(args.config), args.scenario, args.seed, args.record_dir, args.history)
+    httpd = make_server(state, args.host, args.port)
+
+    print(f"🧪 SeatFinder stand-in on http://{args.host}:{httpd.server_port}/karlsruhe/getdata.php "
+          f"(scenario: {'recorded' if state.recorded else args.scenario})")
+    try:
+        httpd.serve_forever()
+    except KeyboardInterrupt:
+        print(f"\n🛑 Stopped after {state.requests} payloads")
+    finally:
+        httpd.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -1,16 +1,19 @@
 #!/usr/bin/env python3
 """
 PlatzPilot Server Launcher
-Runs both the data collection service and API server concurrently.
+Runs the data collection service and the API server as separate supervised processes.
 """
 
+import json
+import logging
 import sys
-import threading
 import time
-import signal
-import subprocess
 import os
-from pathlib import Path
+import urllib.request
+
+from tools.config import AppConfig
+from tools.log import setup_logger
+from tools.supervisor import ManagedProcess, Supervisor
 
 def run_data_collector():
     """Run the main data collection service."""
@@ -23,101 +26,108 @@ def run_data_collector():
         print("🛑 Data collection service stopped")
     except Exception as e:
         print(f"❌ Data collection service error: {e}")
+        sys.exit(1)
 
-def run_api_server(host='0.0.0.0', port=8080):
+def run_api_server(host='0.0.0.0', port=8080, workers=None):
     """Run the API server."""
     print(f"🌐 Starting API server on {host}:{port}...")
     try:
         # Import and run the API server
         from api_server import run_server
-        run_server(host=host, port=port)
+        run_server(host=host, port=port, workers=workers)
     except KeyboardInterrupt:
         print("🛑 API server stopped")
     except Exception as e:
         print(f"❌ API server error: {e}")
+        sys.exit(1)
+
+def api_health_check(host, port, timeout=3.0):
+    """Return a health check that asks the API's /api/health endpoint."""
+    probe_host = '127.0.0.1' if host in ('0.0.0.0', '') else host
+    url = f"http://{probe_host}:{port}/api/health"
+
+    def check():
+        with urllib.request.urlopen(url, timeout=timeout) as response:
+            return response.status == 200
 
-def signal_handler(signum, frame):
-    """Handle shutdown signals gracefully."""
-    print(f"\n🛑 Received signal {signum}, shutting down services...")
-    sys.exit(0)
+    return check
+
+def collector_health_check(heartbeat_path, max_age):
+    """Return a health check that requires a collector heartbeat newer than `max_age` seconds."""
+    def check():
+        try:
+            with open(heartbeat_path, 'r') as f:
+                heartbeat = json.load(f)
+        except (OSError, ValueError):
+            return False
+        return time.time() - heartbeat.get('time', 0) <= max_age
+
+    return check
 
 def main():
     """Main launcher function."""
     import argparse
-    
+
     parser = argparse.ArgumentParser(description='PlatzPilot Server Launcher')
     parser.add_argument('--host', default='0.0.0.0', help='Host to bind API server to (default: 0.0.0.0)')
     parser.add_argument('--port', type=int, default=8080, help='Port to bind API server to (default: 8080)')
+    parser.add_argument('--workers', type=int, default=None, help='Number of API worker processes (default: from config.json)')
     parser.add_argument('--data-only', action='store_true', help='Run only data collection service')
     parser.add_argument('--api-only', action='store_true', help='Run only API server')
-    
+    parser.add_argument('--report-interval', type=float, default=300, help='Seconds between resource usage reports (0 disables)')
+    parser.add_argument('--drain-timeout', type=float, default=30, help='Seconds to let services finish on shutdown')
+
     args = parser.parse_args()
-    
+
     print("🚀 Starting PlatzPilot Server")
     print("=" * 50)
-    
-    # Register signal handlers
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
-    
+
     # Check if we're in the right directory
     if not os.path.exists('config.json'):
         print("❌ Error: config.json not found. Please run from the server directory.")
         sys.exit(1)
-    
-    # Create threads for services
-    data_thread = None
-    api_thread = None
-    
+
+    config = AppConfig('config.json')
+    setup_logger(name="supervisor", level=logging.INFO, logger_dir=config.logger_config)
+    supervisor = Supervisor(report_interval=args.report_interval, drain_timeout=args.drain_timeout)
+    services_started = []
+
     if not args.api_only:
-        data_thread = threading.Thread(target=run_data_collector, name="DataCollector", daemon=True)
-    
+        heartbeat_path = os.path.join(config.ring_buffer_config, config.heartbeat_file)
+        # A cycle may legitimately take a while (slow upstream, retries), so allow two missed intervals
+        max_age = 2 * config.fetch_interval + 120
+        supervisor.add(ManagedProcess(
+            "DataCollector", run_data_collector,
+            health_check=collector_health_check(heartbeat_path, max_age),
+            start_grace=max_age
+        ))
+        services_started.append("📡 Data collection")
+
+    if not args.data_only:
+        supervisor.add(ManagedProcess(
+            "APIServer", run_api_server, args=(args.host, args.port, args.workers),
+            health_check=api_health_check(args.host, args.port),
+            start_grace=10
+        ))
+        services_started.append(f"🌐 API server: http://{args.host}:{args.port}")
+
+    print("✅ Services starting under supervision:")
+    for service in services_started:
+        print(f"   {service}")
+
     if not args.data_only:
-        api_thread = threading.Thread(target=lambda: run_api_server(args.host, args.port), name="APIServer", daemon=True)
-    
+        print(f"🔍 Health check: http://{args.host}:{args.port}/api/health")
+        print(f"📋 Library data: http://{args.host}:{args.port}/api/libraries")
+
+    print("\nPress Ctrl+C to stop all services")
+
     try:
-        # Start services
-        services_started = []
-        
-        if data_thread:
-            data_thread.start()
-            services_started.append("📡 Data collection")
-            time.sleep(2)  # Give data collector a head start
-        
-        if api_thread:
-            api_thread.start()
-            services_started.append(f"🌐 API server: http://{args.host}:{args.port}")
-        
-        print("✅ Services started successfully!")
-        for service in services_started:
-            print(f"   {service}")
-        
-        if api_thread:
-            print(f"🔍 Health check: http://{args.host}:{args.port}/api/health")
-            print(f"📋 Library data: http://{args.host}:{args.port}/api/libraries")
-        
-        print("\nPress Ctrl+C to stop all services")
-        
-        # Keep main thread alive
-        while True:
-            if data_thread and not data_thread.is_alive():
-                print("⚠️ Data collection thread died, restarting...")
-                data_thread = threading.Thread(target=run_data_collector, name="DataCollector", daemon=True)
-                data_thread.start()
-            
-            if api_thread and not api_thread.is_alive():
-                print("⚠️ API server thread died, restarting...")
-                api_thread = threading.Thread(target=lambda: run_api_server(args.host, args.port), name="APIServer", daemon=True)
-                api_thread.start()
-            
-            time.sleep(10)  # Check every 10 seconds
-            
-    except KeyboardInterrupt:
-        print("\n🛑 Shutting down all services...")
+        # Restarts crashed/unhealthy services with backoff; returns after SIGTERM/SIGINT drained them
+        supervisor.run()
     except Exception as e:
         print(f"\n❌ Launcher error: {e}")
     finally:
         print("👋 PlatzPilot Server stopped")
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
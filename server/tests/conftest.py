@@ -0,0 +1,30 @@
+import json
+import logging
+import os
+import sys
+
+import pytest
+
+SERVER_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Tests import the server modules the way the scripts do, with server/ on the path
+sys.path.insert(0, SERVER_DIR)
+
+
+@pytest.fixture
+def config_data():
+    """A fresh copy of the shipped config.json."""
+    with open(os.path.join(SERVER_DIR, "config.json")) as f:
+        return json.load(f)
+
+
+@pytest.fixture
+def collector(tmp_path, monkeypatch, config_data):
+    """Collector on a copy of config.json in an empty working directory, which receives its state files."""
+    from main import Collector
+
+    monkeypatch.chdir(tmp_path)
+    with open("config.json", "w") as f:
+        json.dump(config_data, f)
+    collector = Collector("config.json")
+    collector._members["logger"] = logging.getLogger("tests")
+    return collector
@@ -0,0 +1,59 @@
+"""Checks of config.json validation and reloading."""
+import json
+import os
+
+import pytest
+
+from tools.config import AppConfig, ConfigError
+
+
+def write(path, data):
+    with open(path, "w") as f:
+        json.dump(data, f)
+    # A rewrite within the same timestamp tick must still count as a change
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 1_000_000))
+
+
+def test_shipped_config_is_valid(config_data):
+    config = AppConfig("config.json", config_data)
+    assert config.fetch_interval == 300
+    assert config.forecast_config["season_length"] == 288
+    assert config.forecast_config["weekly_season_length"] == 2016
+
+
+def test_every_problem_is_reported_together(config_data):
+    config_data["other"]["fetch_interval"] = "5"
+    config_data["logging"]["level"] = "LOUD"
+    with pytest.raises(ConfigError) as error:
+        AppConfig("config.json", config_data)
+    assert len(error.value.problems) == 2
+    assert "other.fetch_interval must be an integer, got '5'" in error.value.problems
+
+
+@pytest.mark.parametrize("interval", [60, 600, 3600])
+def test_fetch_interval_must_be_one_slot(config_data, interval):
+    config_data["other"]["fetch_interval"] = interval
+    with pytest.raises(ConfigError, match="other.fetch_interval must be 300"):
+        AppConfig("config.json", config_data)
+
+
+def test_reload_applies_a_valid_change(collector, config_data):
+    assert collector.sites
+    config_data["other"]["max_forecast"] = 6
+    write("config.json", config_data)
+
+    assert collector.reload_config()
+    assert collector.config.forecast_config["max_forecast"] == 6
+
+
+def test_reload_keeps_the_current_config_when_the_interval_changes(collector, config_data):
+    assert collector.sites
+    current = collector.config
+    config_data["other"]["fetch_interval"] = 600
+    config_data["other"]["max_forecast"] = 6
+    write("config.json", config_data)
+
+    assert not collector.reload_config()
+    assert collector.config is current
+    # Not retried until the file changes again
+    assert not collector.check_config()
@@ -0,0 +1,81 @@
+"""Checks of the SeatFinder payload decoder and how the collector handles what it rejects."""
+import json
+import random
+from datetime import datetime, timedelta
+
+import pytest
+
+from tools.config import AppConfig
+from tools.decoder import DecodeError, SeatFinderDecoder, orjson
+from tools.synthetic import MALFORMED_VARIANTS, malformed_body, scenario_body, synthetic_payload, to_jsonp
+
+WHEN = datetime(2026, 10, 19, 12, 0)  # A Monday, every location open
+
+
+@pytest.fixture
+def config(config_data):
+    return AppConfig("config.json", config_data)
+
+
+@pytest.fixture(params=[False, True] if orjson is not None else [False], ids=lambda fast: "orjson" if fast else "json")
+def decoder(request, config):
+    return SeatFinderDecoder(config.location_codes, use_orjson=request.param)
+
+
+def test_counts_are_in_column_order(config, decoder):
+    payload = synthetic_payload(config, WHEN, history=3)
+    reading = decoder.decode(to_jsonp(payload).encode('utf-8'))
+
+    expected = [payload[0]["seatestimate"][code][0]["free_seats"] for code in config.location_codes]
+    assert reading.free.tolist() == expected
+    assert not reading.closed.any()
+    assert reading.reading_time == "2026-10-19 12:00:00.000000"
+
+
+@pytest.mark.parametrize("variant", MALFORMED_VARIANTS)
+def test_malformed_payloads_are_rejected(config, decoder, variant):
+    with pytest.raises(DecodeError):
+        decoder.decode(malformed_body(config, WHEN, random.Random(0), variant=variant))
+
+
+@pytest.mark.parametrize("date", ["2026-10-19 12:00:00", "2026-10-19T12:00:00.000000", "2026-13-45 12:00:00.000000",
+                                  None])
+def test_reading_times_must_be_dates_in_the_upstream_format(config, decoder, date):
+    payload = synthetic_payload(config, WHEN)
+    code = config.location_codes[1]
+    payload[0]["seatestimate"][code][0]["timestamp"]["date"] = date
+
+    with pytest.raises(DecodeError) as error:
+        decoder.decode(payload)
+    assert error.value.path == f"[0].seatestimate.{code}[0].timestamp.date"
+
+
+def test_all_closed_payload_is_a_reading_without_time(config, decoder):
+    reading = decoder.decode(scenario_body(config, WHEN, random.Random(0), "empty"))
+
+    assert reading.reading_time is None
+    assert reading.closed.all()
+    assert not reading.free.any()
+
+
+def test_all_closed_cycle_still_advances_the_ring_buffer(collector, monkeypatch):
+    site = collector.primary
+    collector.process_payload(to_jsonp(synthetic_payload(site.config, WHEN)))
+    pointer = site.ring_buffer.pointer
+
+    # Stored at the fetch time, one slot later
+    monkeypatch.setattr(collector, "now", lambda: (WHEN + timedelta(minutes=5)).timestamp())
+    collector.process_payload(scenario_body(site.config, WHEN, random.Random(0), "empty"))
+    assert site.ring_buffer.pointer == (pointer + 1) % site.ring_buffer.capacity
+    assert not site.ring_buffer.counts[site.ring_buffer.pointer].any()
+
+
+def test_collect_reports_malformed_and_failed_payloads_without_raising(collector, monkeypatch):
+    site = collector.primary
+    body = malformed_body(site.config, WHEN, random.Random(0), variant="bad_timestamp")
+    monkeypatch.setattr(collector, "fetch", lambda site=None: body)
+    assert collector.run_cycle() == {site.name: "malformed"}
+
+    monkeypatch.setattr(collector, "fetch", lambda site=None: json.dumps(synthetic_payload(site.config, WHEN)))
+    monkeypatch.setattr(type(site), "process_payload", lambda self, body, fetched_at=None: 1 / 0)
+    assert collector.run_cycle() == {site.name: "error"}
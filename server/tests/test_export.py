@@ -0,0 +1,62 @@
+"""Checks of the streamed history export."""
+import io
+import zipfile
+from datetime import timedelta
+
+import numpy as np
+import pytest
+
+from tools.export import export
+from tools.storage import RingBufferStore
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+CODES = ["A", "B"]
+
+
+class AppendingOutput(io.BytesIO):
+    """Output that lets the collector append one reading once the export starts writing."""
+
+    def __init__(self, writer):
+        super().__init__()
+        self.writer = writer
+
+    def write(self, data):
+        if self.writer is not None:
+            self.writer, writer = None, self.writer
+            writer()
+        return super().write(data)
+
+
+def append(store, k):
+    when = store.start_time + timedelta(minutes=5 * k, seconds=1)
+    store.append([k, 100 + k], when.strftime(DATE_FORMAT))
+
+
+@pytest.mark.parametrize("archived", [False, True], ids=["ring_only", "archive"])
+@pytest.mark.parametrize("fmt", ["npy", "npz"])
+def test_rows_appended_during_an_export_match_the_header(tmp_path, fmt, archived):
+    archive_dir = str(tmp_path / "archive") if archived else None
+    collector = RingBufferStore(str(tmp_path / "data"), capacity=8, num_buildings=2, archive_dir=archive_dir)
+    for k in range(10):
+        append(collector, k)
+    store = RingBufferStore(str(tmp_path / "data"), num_buildings=2, capacity=8, archive_dir=archive_dir,
+                            read_only=True)
+
+    # The header is written after the rows are counted; the append lands between the passes
+    out = AppendingOutput(lambda: append(collector, 10))
+    rows = export(store, CODES, fmt, out)
+
+    expected = list(range(10)) if archived else list(range(2, 10))
+    assert rows == len(expected)
+    out.seek(0)
+    if fmt == "npy":
+        loaded = np.load(out)
+        assert loaded["A"].tolist() == expected
+        assert loaded["B"].tolist() == [100 + k for k in expected]
+    else:
+        with zipfile.ZipFile(out) as archive:
+            assert sorted(archive.namelist()) == ["A.npy", "B.npy", "codes.npy", "timestamp.npy"]
+        loaded = np.load(out)
+        assert loaded["A"].tolist() == expected
+        assert loaded["B"].tolist() == [100 + k for k in expected]
+        assert len(loaded["timestamp"]) == len(expected)
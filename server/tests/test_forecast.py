@@ -0,0 +1,78 @@
+"""Checks of the forecast models."""
+import numpy as np
+
+from tools import forecast as forecast_module
+from tools.forecast import ForecastManager, HoltWintersOnline, OnDemandForecaster
+from tools.snapshot import Snapshot
+from tools.storage import RingBufferStore
+
+
+def test_first_forecast_step_uses_the_seasonal_slot_of_the_next_observation():
+    model = HoltWintersOnline(season_length=4, max_seats=100)
+    model.level = 50.0
+    model.seasonal = np.array([0.0, 10.0, 20.0, 30.0])
+    model.n = 5
+
+    # The next observation is number 5, seasonal slot 1; the forecast used to start at slot 2
+    assert model.forecast(steps=4) == [60.0, 70.0, 80.0, 50.0]
+
+
+def closed_and_open_manager(tmp_path):
+    """Ring buffer with one reading of 40 seats for two buildings, and their (fresh) models."""
+    store = RingBufferStore(str(tmp_path / "data"), capacity=16, num_buildings=2)
+    manager = ForecastManager(store, str(tmp_path / "models"), [100, 100], max_forecast=4, num_buildings=2,
+                              season_length=4, model_types=[HoltWintersOnline.model_type] * 2)
+    # Monday 09:50
+    store.append([40, 40], "2026-10-19 09:50:00.000000")
+    return manager
+
+
+def test_closed_building_only_moves_on_to_the_next_period(tmp_path):
+    manager = closed_and_open_manager(tmp_path)
+    closed, opened = manager.models
+    before = [(model.n, model.level, model.trend, model.seasonal.copy()) for model in manager.models]
+
+    manager.update_and_forecast(is_closed=[True, False])
+
+    n, level, trend, seasonal = before[0]
+    assert (closed.n, closed.level, closed.trend) == (n + 1, level, trend)
+    assert np.array_equal(closed.seasonal, seasonal)
+    assert opened.n == before[1][0] + 1
+    assert opened.level != before[1][1]
+
+
+def test_closed_steps_are_zero_and_closed_buildings_are_not_forecast(tmp_path, monkeypatch):
+    manager = closed_and_open_manager(tmp_path)
+    manager.update_and_forecast()
+    forecast_rows = []
+    batch = forecast_module.forecast_models
+    monkeypatch.setattr(forecast_module, "forecast_models",
+                        lambda models, steps: forecast_rows.append(len(models)) or batch(models, steps))
+
+    # Steps are 09:55, 10:00, 10:05 and 10:10; the second building only opens on Sundays
+    schedules = [{"Monday": [("10:00", "10:10")]}, {"Sunday": [("10:00", "18:00")]}]
+    forecasts = manager.forecast(4, schedules)
+
+    assert forecast_rows == [1]
+    assert (forecasts[0] > 0).tolist() == [False, True, True, False]
+    assert not forecasts[1].any()
+
+
+class PublishedStates:
+    def __init__(self, payload):
+        self.snapshot = Snapshot(1, 0.0, 2, payload)
+
+    def read(self):
+        return self.snapshot
+
+
+def test_on_demand_forecasts_are_masked_like_the_published_ones(tmp_path):
+    manager = closed_and_open_manager(tmp_path)
+    manager.update_and_forecast()
+    schedules = [{"Monday": [("10:00", "10:10")]}, {"Sunday": [("10:00", "18:00")]}]
+    forecaster = OnDemandForecaster(PublishedStates(manager.pack_states("2026-10-19 09:50:00.000000", schedules)))
+
+    on_demand = forecaster.forecast(4).predictions
+    assert np.array_equal(on_demand, manager.forecast(4, schedules))
+    assert (on_demand[0] > 0).tolist() == [False, True, True, False]
+    assert not on_demand[1].any()
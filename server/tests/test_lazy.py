@@ -0,0 +1,38 @@
+"""Checks of lazily created members."""
+from api_server import SiteResources
+from tools.config import AppConfig
+from tools.lazy import LazyMembers
+from tools.profiles import OccupancyProfiles
+from tools.timing import PhaseTimer
+
+
+class Members(LazyMembers):
+    def __init__(self):
+        super().__init__()
+        self.timer = PhaseTimer()
+
+
+def test_a_member_created_as_none_is_kept():
+    members = Members()
+    calls = []
+
+    for _ in range(3):
+        assert members._lazy("nothing", lambda: calls.append(1)) is None
+    assert calls == [1]
+    assert [name for name, _ in members.timer.phases] == ["nothing"]
+
+
+def test_profiles_are_neither_created_nor_timed_before_the_collector_writes_them(tmp_path, monkeypatch,
+                                                                                   config_data):
+    monkeypatch.chdir(tmp_path)
+    config = AppConfig("config.json", config_data)
+    site = SiteResources(config.site_name, config.site(config.site_name), PhaseTimer())
+
+    for _ in range(3):
+        assert site.profiles is None
+    assert site.timer.phases == []
+
+    OccupancyProfiles(config.ring_buffer_config, config.forecast_config["max_seats_list"], **config.profile_config)
+    profiles = site.profiles
+    assert profiles is not None and site.profiles is profiles
+    assert [name for name, _ in site.timer.phases] == [f"{config.site_name}.profiles"]
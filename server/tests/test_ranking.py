@@ -0,0 +1,44 @@
+"""Checks of the top-k ranking over the published snapshot."""
+import json
+
+from tools.ranking import RankingIndex
+from tools.snapshot import Snapshot
+
+
+class FixedReader:
+    def __init__(self, document):
+        self.snapshot = Snapshot(1, 0.0, None, json.dumps(document).encode('utf-8'))
+
+    def read(self):
+        return self.snapshot
+
+
+def entry(code, free, predictions, is_closed=False):
+    return {"code": code, "long_name": f"Library {code}", "available_seats": 100,
+            "free_seats_currently": free, "predictions": predictions, "is_closed": is_closed}
+
+
+def ranked(index, **query):
+    _, entries = index.query(**query)
+    return [json.loads(body) for body in entries]
+
+
+def test_codes_come_from_the_entries_not_their_positions():
+    # Entries in a different order than the configured grouping, one location missing
+    document = {"north": [entry("B", 10, [40]), "C", entry("A", 30, [5])]}
+    index = RankingIndex(FixedReader(document), {"north": ["A", "B", "C"]}, {"A": 50, "B": 200})
+
+    now = ranked(index, by="free", k=5)
+    assert [(row["code"], row["free_seats"], row["max_seats"]) for row in now] == [("A", 30, 50), ("B", 10, 200)]
+
+    later = ranked(index, by="free", horizon=1, k=5, group="north")
+    assert [row["code"] for row in later] == ["B", "A"]
+
+
+def test_open_filter_and_ratio():
+    document = {"north": [entry("A", 30, [30], is_closed=True), entry("B", 20, [20])]}
+    index = RankingIndex(FixedReader(document), {"north": ["A", "B"]}, {"A": 300, "B": 40})
+
+    assert [row["code"] for row in ranked(index, by="ratio")] == ["B", "A"]
+    assert [row["code"] for row in ranked(index, open_filter=True)] == ["B"]
+    assert [row["code"] for row in ranked(index, open_filter=False)] == ["A"]
@@ -0,0 +1,59 @@
+"""Checks of the ring buffer's on-disk format."""
+import os
+from datetime import timedelta
+
+import numpy as np
+
+from tools.storage import RingBufferStore
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+
+def fill(store, values):
+    """Append one reading per value (the same for every building), 5 minutes apart."""
+    for k, value in enumerate(values):
+        when = store.start_time + timedelta(minutes=5 * k, seconds=1)
+        store.append([value] * store.num_buildings, when.strftime(DATE_FORMAT))
+
+
+def test_uint8_counts_are_widened_on_load(tmp_path):
+    old = np.arange(16, dtype=np.uint8).reshape(8, 2)
+    old.tofile(tmp_path / "counts.dat")
+
+    store = RingBufferStore(str(tmp_path), capacity=8, num_buildings=2)
+
+    assert store.counts.dtype == np.uint16
+    assert os.path.getsize(tmp_path / "counts.dat") == old.size * 2
+    assert np.array_equal(store.counts, old)
+
+
+def test_counts_above_uint8_are_kept_and_out_of_range_ones_clipped(tmp_path):
+    store = RingBufferStore(str(tmp_path), capacity=8, num_buildings=1)
+    fill(store, [270, 70000, -3])
+
+    assert store.counts[:3, 0].tolist() == [270, 65535, 0]
+
+
+def test_pointer_is_the_slot_just_written(tmp_path):
+    store = RingBufferStore(str(tmp_path), capacity=8, num_buildings=2)
+    fill(store, [10, 11, 12])
+
+    assert store.pointer == 2
+
+
+def test_get_recent_ends_with_the_newest_reading(tmp_path):
+    # get_recent used to treat the pointer as the next free slot and returned [11] here,
+    # so the models were fed the previous reading
+    store = RingBufferStore(str(tmp_path), capacity=8, num_buildings=2)
+    fill(store, [10, 11, 12])
+
+    assert store.get_recent(1)[1][:, 0].tolist() == [12]
+    assert store.get_recent(3)[1][:, 0].tolist() == [10, 11, 12]
+
+
+def test_get_all_runs_from_oldest_to_newest_across_the_wrap(tmp_path):
+    # get_all used to start at the newest slot: [6, 3, 4, 5]
+    store = RingBufferStore(str(tmp_path), capacity=4, num_buildings=1)
+    fill(store, [1, 2, 3, 4, 5, 6])
+
+    assert store.get_all()[1][:, 0].tolist() == [3, 4, 5, 6]
@@ -0,0 +1,114 @@
+"""Checks of the binary /api/libraries form."""
+import json
+
+import pytest
+
+from api_server import prefers_wire
+from tools import wire
+from tools.snapshot import Snapshot
+
+
+def entry(code, free, predictions, is_closed=False):
+    return {"code": code, "long_name": f"Library {code}", "available_seats": 200, "sub_locations": [],
+            "opening_hours": {"Monday": [["08:00", "20:00"]]},
+            "free_seats_currently": free, "predictions": predictions, "is_closed": is_closed}
+
+
+def document(free=12, predictions=(10.4, 9.6, 8.0)):
+    return {"north": [entry("A", free, list(predictions)), "B"],
+            "south": [entry("C", 0, [0.0, 0.0, 0.0], is_closed=True)]}
+
+
+def test_round_trip_with_metadata():
+    body = wire.encode(document(), version=7, published_at=1760868000.5)
+    decoded, info = wire.decode(body)
+
+    expected = document(predictions=(10, 10, 8))
+    assert decoded == expected
+    assert isinstance(decoded["north"][0]["predictions"][0], int)
+    assert decoded["north"][1] == "B"
+    assert (info["version"], info["published_at"]) == (7, 1760868000.5)
+    assert body[5] & wire.FLAG_INT16
+
+
+def test_arrays_only_body_needs_the_metadata_it_refers_to():
+    _, info = wire.decode(wire.encode(document()))
+    body = wire.encode(document(free=30), include_metadata=False)
+
+    with pytest.raises(ValueError, match=wire.metadata_id_hex(info["metadata_id"])):
+        wire.decode(body)
+    decoded, _ = wire.decode(body, info["metadata"])
+    assert decoded["north"][0]["free_seats_currently"] == 30
+
+
+def test_counts_beyond_int16_are_sent_as_int32():
+    body = wire.encode(document(free=40000, predictions=(-1, 70000, 5)))
+    decoded, _ = wire.decode(body)
+
+    assert not body[5] & wire.FLAG_INT16
+    assert decoded["north"][0]["free_seats_currently"] == 40000
+    assert decoded["north"][0]["predictions"] == [-1, 70000, 5]
+
+
+def test_metadata_id_only_follows_the_static_fields():
+    same_statics = (document(), document(free=3, predictions=(1, 2, 3)))
+    ids = {wire.decode(wire.encode(doc))[1]["metadata_id"] for doc in same_statics}
+    assert len(ids) == 1
+
+    renamed = document()
+    renamed["north"][0]["long_name"] = "Renamed"
+    assert wire.decode(wire.encode(renamed))[1]["metadata_id"] not in ids
+
+
+@pytest.mark.parametrize("body", [b"", b"PPWF", b"XXXX" + bytes(wire._HEADER.size)])
+def test_other_bodies_are_rejected(body):
+    with pytest.raises(ValueError):
+        wire.decode(body)
+
+
+class VersionedReader:
+    def __init__(self):
+        self.snapshot = None
+
+    def publish(self, version, doc):
+        self.snapshot = Snapshot(version, 1760868000.0, None, json.dumps(doc).encode("utf-8"))
+
+    def read(self):
+        return self.snapshot
+
+
+def test_index_serves_arrays_only_to_clients_holding_the_current_metadata():
+    reader = VersionedReader()
+    index = wire.WireIndex(reader)
+    assert index.lookup() is None
+
+    reader.publish(1, document())
+    _, full = index.lookup()
+    _, info = wire.decode(full)
+    held = wire.metadata_id_hex(info["metadata_id"])
+    assert index.lookup(held)[1] == wire.encode(document(), 1, 1760868000.0, include_metadata=False)
+    assert index.lookup("00000000")[1] == full
+
+    reader.publish(2, document(free=50))
+    _, arrays = index.lookup(held)
+    decoded, info = wire.decode(arrays, info["metadata"])
+    assert info["version"] == 2
+    assert decoded["north"][0]["free_seats_currently"] == 50
+
+
+@pytest.mark.parametrize("accept, binary", [
+    (None, False),
+    ("*/*", False),
+    ("application/x-platzpilot", True),
+    ("application/x-platzpilot;q=0", False),
+    ("application/x-platzpilot-wire;q=0", False),
+    ("application/x-platzpilot-wire", False),
+    ("application/json, application/x-platzpilot;q=0.5", False),
+    ("application/x-platzpilot;q=0.5, application/json;q=0.5", True),
+    ("application/x-platzpilot, application/json;q=0.9", True),
+    ("application/x-platzpilot;q=0.8, */*;q=0.1", True),
+    ("application/x-platzpilot;q=0.1, application/*;q=0.8", False),
+    ("Application/X-Platzpilot ; Q=1", True),
+])
+def test_binary_form_follows_the_accept_q_values(accept, binary):
+    assert prefers_wire(accept) is binary
@@ -1,45 +1,371 @@
 import json
+import os
+import re
+from types import MappingProxyType
+from urllib.parse import unquote
+
+DEFAULT_SITE = "karlsruhe"
+SITE_NAME = re.compile(r"^[A-Za-z0-9_-]+$")
+# Same names as tools/forecast.MODEL_TYPES; not imported from there so loading the config does not import NumPy
+MODEL_NAMES = ("holt_winters", "double_seasonal")
+LOG_LEVELS = ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL")
+# Directories that get the site name appended for additional sites, so sites never share state
+SITE_DIRECTORIES = ("ring_buffer_save_dir", "archive_dir", "forecast_model_dir")
+# One ring buffer slot per fetch: the seasonal models, opening-hour masks and profiles assume 5-minute slots
+SLOT_SECONDS = 300
+_REQUIRED = object()
+_KINDS = {int: "an integer", float: "a number", bool: "true or false", str: "a string"}
+
+
+class ConfigError(ValueError):
+    """
+    Raised when config.json cannot be parsed or fails validation.
+
+    Attributes:
+        path (str): The file that was loaded.
+        problems (list[str]): Every problem found, e.g. "other.fetch_interval must be an integer, got '5'".
+    """
+
+    def __init__(self, path, problems):
+        self.path = path
+        self.problems = list(problems)
+        super().__init__(f"{path}: " + "; ".join(self.problems))
+
+
+def _frozen(value):
+    """Read-only copy of a parsed JSON value: objects become mappingproxies, arrays tuples."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _frozen(item) for key, item in value.items()})
+    if isinstance(value, list):
+        return tuple(_frozen(item) for item in value)
+    return value
+
+
+def file_stamp(path):
+    """(mtime, size) of `path`, or None if it does not exist; a reload is due when it differs from `AppConfig.stamp`."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def column_map(old_codes, new_codes):
+    """Old column of every location in `new_codes`, -1 for locations that are new."""
+    index = {code: i for i, code in enumerate(old_codes)}
+    return [index.get(code, -1) for code in new_codes]
+
+
+class _Checker:
+    """Collects validation problems instead of stopping at the first one."""
+
+    def __init__(self):
+        self.problems = []
+
+    def section(self, data, name, required=False):
+        value = data.get(name)
+        if value is None and not required:
+            return {}
+        if not isinstance(value, dict):
+            self.problems.append(f'"{name}" must be an object' if value is not None else f'"{name}" is missing')
+            return {}
+        return value
+
+    def get(self, section, path, key, kind, default=_REQUIRED, minimum=None, optional=False):
+        value = section.get(key, default)
+        if value is _REQUIRED:
+            self.problems.append(f"{path}.{key} is missing")
+            return None
+        if value is None and optional:
+            return None
+        if kind is float:
+            valid = isinstance(value, (int, float)) and not isinstance(value, bool)
+        else:
+            valid = isinstance(value, kind) and not (kind is int and isinstance(value, bool))
+        if not valid or (minimum is not None and value < minimum):
+            bound = f" >= {minimum}" if minimum is not None else ""
+            self.problems.append(f"{path}.{key} must be {_KINDS[kind]}{bound}, got {value!r}")
+            return default if default is not _REQUIRED else None
+        return value
 
 
 class AppConfig:
-    def __init__(self, config_path):
-        with open(config_path, 'r') as f:
-            self.data = json.load(f)
+    """
+    Validated, read-only view of config.json.
+
+    The file is checked once when it is loaded; every problem is reported together in a
+    `ConfigError`. Sections are compiled up front with their defaults applied, together with
+    the index maps derived from the location order, so lookups in the collection cycle and in
+    request handlers are plain attribute reads. Instances are immutable (slotted, sections are
+    mappingproxies and tuples): a reload builds a new instance and swaps it in whole, and code
+    still holding the old one keeps a consistent view.
+
+    Args:
+        config_path (str): Path of config.json.
+        data (dict): Already parsed config (used for sites); `config_path` then only names it in errors.
+    Attributes:
+        path (str): The loaded file.
+        stamp (tuple): (mtime, size) of the file before it was read (see `file_stamp`).
+        data (Mapping): The parsed file, read-only.
+        location_codes (tuple[str]): Codes in the column order of the ring buffer, models and max_seats_list.
+        location_index (Mapping[str, int]): Location code -> column.
+        group_slots (Mapping[str, tuple[str, int]]): Location code -> (group, position in the group).
+        max_seats (Mapping[str, int]): Location code -> seats.
+    Raises:
+        ConfigError: If the file is not valid JSON or fails validation.
+    """
+
+    __slots__ = (
+        "path", "stamp", "data", "_sites",
+        "site_name", "site_names", "location_number", "location_codes", "location_index", "group_slots",
+        "max_seats", "formatting_grouping", "fetch_url", "fetch_interval", "max_forecast_horizon",
+        "ring_buffer_config", "logger_config", "json_save_file", "snapshot_file", "model_snapshot_file",
+        "archive_dir", "recommendations_file", "heartbeat_file", "forecast_model_types", "forecast_config",
+        "recommendation_config", "profile_config", "api_config", "api_limits", "collector_config",
+        "tracing_config", "logging_config",
+    )
+
+    def __init__(self, config_path, data=None):
+        stamp = None
+        if data is None:
+            stamp = file_stamp(config_path)
+            try:
+                with open(config_path, 'r') as f:
+                    data = json.load(f)
+            except json.JSONDecodeError as e:
+                raise ConfigError(config_path, [f"not valid JSON: {e}"]) from e
+        if not isinstance(data, dict):
+            raise ConfigError(config_path, ["must contain a JSON object"])
+
+        check = _Checker()
+        values = self._compile(data, check)
+        sites = self._compile_sites(config_path, data, values["site_name"], check)
+        if check.problems:
+            raise ConfigError(config_path, check.problems)
+
+        values.update(path=config_path, stamp=stamp, data=_frozen(data), _sites=sites,
+                      site_names=(values["site_name"],) + tuple(sites))
+        for name, value in values.items():
+            object.__setattr__(self, name, value)
+
+    def __setattr__(self, name, value):
+        raise AttributeError(f"AppConfig is read-only; reload it to change {name!r}")
 
-    @property
-    def ring_buffer_config(self):
-        return self.data["save_files"]["ring_buffer_save_dir"]
+    def __repr__(self):
+        return f"AppConfig({self.path!r}, site={self.site_name!r})"
 
-    @property
-    def logger_config(self):
-        return self.data["save_files"]["log_dir"]
+    @staticmethod
+    def _compile(data, check):
+        library = check.section(data, "library_info", required=True)
+        files = check.section(data, "save_files", required=True)
+        other = check.section(data, "other", required=True)
+        forecast = check.section(data, "forecast")
+        recommendations = check.section(data, "recommendations")
+        profiles = check.section(data, "profiles")
+        api = check.section(data, "api")
+        limits = check.section(api, "limits")
+        collector = check.section(data, "collector")
+        tracing = check.section(data, "tracing")
+        logging_section = check.section(data, "logging")
+
+        site_name = check.get(library, "library_info", "site", str, DEFAULT_SITE)
+        if not SITE_NAME.match(site_name):
+            check.problems.append(f"library_info.site {site_name!r} may only contain letters, digits, '-' and '_'")
+        number = check.get(library, "library_info", "number_of_locations", int, minimum=1) or 0
+        fetch_url = check.get(other, "other", "seats_url", str) or ""
+
+        codes = library.get("locations")
+        if codes is None:
+            # Older configs: fall back to the order requested in the SeatFinder URL
+            match = re.search(r"location%5B0%5D=([^&]+)", fetch_url)
+            codes = unquote(match.group(1)).split(",") if match else []
+        if not isinstance(codes, list) or not all(isinstance(code, str) and code for code in codes):
+            check.problems.append("library_info.locations must be a list of location codes")
+            codes = []
+        elif len(set(codes)) != len(codes):
+            check.problems.append("library_info.locations lists a location more than once")
+        if codes and len(codes) != number:
+            check.problems.append(f"library_info.locations has {len(codes)} codes for {number} locations")
+        location_index = {code: i for i, code in enumerate(codes)}
+
+        seats = library.get("max_seats_list")
+        if not isinstance(seats, list) or len(seats) != number or \
+                not all(isinstance(n, int) and not isinstance(n, bool) and n >= 0 for n in seats):
+            check.problems.append(f"library_info.max_seats_list must hold {number} seat counts")
+            seats = [0] * number
+
+        grouping = library.get("grouping")
+        group_slots = {}
+        if not isinstance(grouping, dict) or not all(isinstance(places, list) for places in grouping.values()):
+            check.problems.append("library_info.grouping must map group names to lists of location codes")
+            grouping = {}
+        for group, places in grouping.items():
+            for position, code in enumerate(places):
+                if code not in location_index:
+                    check.problems.append(f"library_info.grouping.{group} lists unknown location {code!r}")
+                elif code in group_slots:
+                    check.problems.append(f"location {code!r} is in groups {group_slots[code][0]} and {group}")
+                else:
+                    group_slots[code] = (group, position)
+
+        default_model = check.get(forecast, "forecast", "default_model", str, "holt_winters")
+        overrides = forecast.get("models", {})
+        if not isinstance(overrides, dict):
+            check.problems.append("forecast.models must map location codes to model names")
+            overrides = {}
+        # Codes without a location are allowed: sites inherit the top-level overrides
+        for code, model in [("default_model", default_model)] + list(overrides.items()):
+            if model not in MODEL_NAMES:
+                check.problems.append(f"unknown forecast model {model!r} for {code}, expected one of "
+                                      f"{', '.join(MODEL_NAMES)}")
+        model_types = tuple(overrides.get(codes[i], default_model) if i < len(codes) else default_model
+                            for i in range(number))
+
+        fetch_interval = check.get(other, "other", "fetch_interval", int) or SLOT_SECONDS
+        if fetch_interval != SLOT_SECONDS:
+            # Also rejects reloads that change it: stored history and model states are laid out per slot
+            check.problems.append(f"other.fetch_interval must be {SLOT_SECONDS} (one ring buffer slot), "
+                                  f"got {fetch_interval}")
+        ring_buffer_dir = check.get(files, "save_files", "ring_buffer_save_dir", str)
+        thresholds = recommendations.get("thresholds", [1, 5, 10, 25])
+        if not isinstance(thresholds, list) or not thresholds or \
+                not all(isinstance(n, int) and not isinstance(n, bool) and n >= 1 for n in thresholds):
+            check.problems.append("recommendations.thresholds must be a list of positive seat counts")
+        level = check.get(logging_section, "logging", "level", str, "INFO")
+        if level not in LOG_LEVELS:
+            check.problems.append(f"logging.level must be one of {', '.join(LOG_LEVELS)}, got {level!r}")
 
-    @property
-    def forecast_config(self):
         return {
-            "model_dir": self.data["save_files"]["forecast_model_dir"],
-            "max_seats_list": self.data["library_info"]["max_seats_list"],
-            "max_forecast": self.data["other"]["max_forecast"],
-            "num_buildings": self.data["library_info"]["number_of_locations"],
-            "season_length": 288  # Ein Tag
+            "site_name": site_name,
+            "location_number": number,
+            "location_codes": tuple(codes),
+            "location_index": MappingProxyType(location_index),
+            "group_slots": MappingProxyType(group_slots),
+            "max_seats": MappingProxyType(dict(zip(codes, seats))),
+            "formatting_grouping": _frozen(grouping),
+            "fetch_url": fetch_url,
+            "fetch_interval": fetch_interval,
+            "max_forecast_horizon": check.get(forecast, "forecast", "max_horizon", int, 288, minimum=1),
+            "ring_buffer_config": ring_buffer_dir,
+            "logger_config": check.get(files, "save_files", "log_dir", str),
+            "json_save_file": check.get(files, "save_files", "json_save_file", str),
+            "snapshot_file": check.get(files, "save_files", "snapshot_file", str, "seat_finder_data.snap"),
+            "model_snapshot_file": check.get(files, "save_files", "model_snapshot_file", str,
+                                             "forecast_models.snap"),
+            # None disables archiving
+            "archive_dir": check.get(files, "save_files", "archive_dir", str, None, optional=True),
+            "recommendations_file": check.get(files, "save_files", "recommendations_file", str,
+                                              "recommendations.snap"),
+            "heartbeat_file": check.get(files, "save_files", "heartbeat_file", str, "collector.heartbeat"),
+            "forecast_model_types": model_types,
+            "forecast_config": MappingProxyType({
+                "model_dir": check.get(files, "save_files", "forecast_model_dir", str),
+                "max_seats_list": tuple(seats),
+                "max_forecast": check.get(other, "other", "max_forecast", int, minimum=1),
+                "num_buildings": number,
+                "season_length": 86400 // SLOT_SECONDS,  # Ein Tag
+                "weekly_season_length": 7 * 86400 // SLOT_SECONDS,  # Eine Woche
+                "persist_every": check.get(other, "other", "model_persist_every", int, 1, minimum=1),
+                "model_types": model_types,
+                "codes": tuple(codes)
+            }),
+            "recommendation_config": MappingProxyType({
+                "thresholds": _frozen(thresholds),
+                "horizon": check.get(recommendations, "recommendations", "horizon", int, 144, minimum=1),
+                "max_windows": check.get(recommendations, "recommendations", "max_windows", int, 3, minimum=1)
+            }),
+            "profile_config": MappingProxyType({
+                "bins": check.get(profiles, "profiles", "bins", int, 20, minimum=1),
+                "window_weeks": check.get(profiles, "profiles", "window_weeks", float, 12, minimum=1)
+            }),
+            "api_config": MappingProxyType({
+                "workers": check.get(api, "api", "workers", int, 1, minimum=1),
+                "reuse_port": check.get(api, "api", "reuse_port", bool, False),
+                "max_exports": check.get(api, "api", "max_exports", int, 2, minimum=1),
+                "config_poll_seconds": check.get(api, "api", "config_poll_seconds", float, 5, minimum=0)
+            }),
+            # Admission control of the API server (see tools/ratelimit.py); requests_per_second 0 disables it
+            "api_limits": MappingProxyType({
+                "requests_per_second": check.get(limits, "api.limits", "requests_per_second", float, 5, minimum=0),
+                "burst": check.get(limits, "api.limits", "burst", float, 20, minimum=1),
+                "max_clients": check.get(limits, "api.limits", "max_clients", int, 10000, minimum=1),
+                "max_active": check.get(limits, "api.limits", "max_active", int, 16, minimum=1),
+                "max_queued": check.get(limits, "api.limits", "max_queued", int, 64, minimum=0),
+                "queue_timeout": check.get(limits, "api.limits", "queue_timeout", float, 2, minimum=0),
+                "max_connections": check.get(limits, "api.limits", "max_connections", int, 256, minimum=1),
+                "trust_forwarded_for": check.get(limits, "api.limits", "trust_forwarded_for", bool, False)
+            }),
+            "collector_config": MappingProxyType({
+                "site_workers": check.get(collector, "collector", "site_workers", int, 8, minimum=1),
+                "http_pool_size": check.get(collector, "collector", "http_pool_size", int, 16, minimum=1),
+                "config_poll_seconds": check.get(collector, "collector", "config_poll_seconds", float, 5, minimum=0)
+            }),
+            "tracing_config": MappingProxyType({
+                "cycles": check.get(tracing, "tracing", "cycles", int, 288, minimum=1),
+                "slow_cycle_seconds": check.get(tracing, "tracing", "slow_cycle_seconds", float, 30, minimum=0,
+                                                optional=True),
+                "profile_cycles": check.get(tracing, "tracing", "profile_cycles", int, 5, minimum=1)
+            }),
+            "logging_config": MappingProxyType({
+                "level": level,
+                "use_queue": check.get(logging_section, "logging", "use_queue", bool, False),
+                "access_log_sample_every": check.get(logging_section, "logging", "access_log_sample_every", int, 1,
+                                                     minimum=0),
+                "access_log_aggregate_seconds": check.get(logging_section, "logging", "access_log_aggregate_seconds",
+                                                          float, 0, minimum=0)
+            })
         }
 
-    @property
-    def fetch_url(self):
-        return self.data["other"]["seats_url"]
+    @staticmethod
+    def _compile_sites(config_path, data, primary, check):
+        """
+        Configs of the additional sites in "sites".
+
+        `library_info` is taken from a site entry as a whole (codes, seats and groups only make
+        sense together); every other section of the entry is overlaid key by key on the top-level
+        one, so a site usually only sets `library_info` and `other.seats_url`. Unless the entry sets
+        them, the data, archive and model state directories are the top-level ones plus the site
+        name, so sites never share a ring buffer or forecast state. Logging stays shared.
+        """
+        entries = data.get("sites", {})
+        if not isinstance(entries, dict):
+            check.problems.append('"sites" must map site names to site configs')
+            return {}
 
-    @property
-    def location_number(self):
-        return self.data["library_info"]["number_of_locations"]
+        sites = {}
+        for name, overrides in entries.items():
+            if name == primary:
+                continue
+            if not SITE_NAME.match(name) or not isinstance(overrides, dict):
+                check.problems.append(f"sites.{name}: site names may only contain letters, digits, '-' and '_' "
+                                      f"and each site must be an object")
+                continue
+            site_data = {section: dict(values) if isinstance(values, dict) else values
+                         for section, values in data.items() if section != "sites"}
+            for section, values in overrides.items():
+                if section != "library_info" and isinstance(values, dict) and isinstance(site_data.get(section), dict):
+                    site_data[section].update(values)
+                else:
+                    site_data[section] = values
 
-    @property
-    def json_save_file(self):
-        return self.data["save_files"]["json_save_file"]
+            own_files = overrides.get("save_files", {})
+            for key in SITE_DIRECTORIES:
+                if key not in own_files and site_data["save_files"].get(key):
+                    site_data["save_files"][key] = os.path.join(site_data["save_files"][key], name)
+            site_data["library_info"] = dict(site_data["library_info"], site=name)
+            try:
+                sites[name] = AppConfig(config_path, data=site_data)
+            except ConfigError as e:
+                check.problems.extend(f"sites.{name}: {problem}" for problem in e.problems)
+        return sites
 
-    @property
-    def fetch_interval(self):
-        return self.data["other"]["fetch_interval"]
+    def site(self, name=None):
+        """
+        Config of site `name`; the primary site (and `name=None`) is this config itself.
 
-    @property
-    def formatting_grouping(self):
-        return self.data["library_info"]["grouping"]
\ No newline at end of file
+        Raises:
+            KeyError: If `name` is not a configured site.
+        """
+        if name is None or name == self.site_name:
+            return self
+        return self._sites[name]
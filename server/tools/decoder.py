@@ -0,0 +1,183 @@
+"""
+SeatFinder response decoding, compiled once per site from its configured locations.
+
+The response is JSONP: `callback([{"seatestimate": {...}}, {"location": {...}}]);`. The decoder
+parses the JSON between the parentheses in place (no sliced copy of the body; with orjson, when
+it is installed, straight from the response bytes), then validates it against the site's
+location list and writes the seat counts into preallocated NumPy arrays in column order.
+Anything that does not fit raises a DecodeError that says where in the response the problem is,
+so the collector can skip the cycle with a precise log line.
+"""
+import json
+import re
+from datetime import datetime
+
+import numpy as np
+
+try:
+    import orjson
+except ImportError:  # Optional: the standard library parser is used instead
+    orjson = None
+
+_WHITESPACE = re.compile(r'\s*')
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+# Shape of DATE_FORMAT; only strings of this shape sort chronologically
+_DATE_SHAPE = re.compile(r'\d{4}-\d\d-\d\d \d\d:\d\d:\d\d\.\d{6}')
+_DECODER = json.JSONDecoder()
+
+
+class DecodeError(ValueError):
+    """
+    A SeatFinder response that does not have the expected shape.
+
+    Attributes:
+        path (str): Where in the response, e.g. "[0].seatestimate.LSG[0].free_seats"; "" for the body as a whole.
+        reason (str): What is wrong there.
+    """
+
+    def __init__(self, path, reason):
+        self.path = path
+        self.reason = reason
+        super().__init__(f"{path}: {reason}" if path else reason)
+
+
+class Reading:
+    """
+    One decoded response.
+
+    The arrays belong to the decoder and are overwritten by its next `decode()`; copy them to keep them.
+
+    Attributes:
+        reading_time (str): Newest reading time over all locations (DATE_FORMAT); None if every
+            location is closed.
+        free (np.ndarray): Latest free seats per column (int64), 0 for closed locations.
+        closed (np.ndarray): Whether each location sent no reading (bool).
+        locations (dict): Location code -> the response's "location" list of that code (validated).
+    """
+
+    __slots__ = ("reading_time", "free", "closed", "locations")
+
+    def __init__(self, reading_time, free, closed, locations):
+        self.reading_time = reading_time
+        self.free = free
+        self.closed = closed
+        self.locations = locations
+
+
+def parse_body(body, loads=None):
+    """
+    Parse the JSON inside the JSONP padding of `body` (bytes or str) without slicing it out first.
+
+    Args:
+        loads (callable): Parser accepting a memoryview or str (orjson.loads); None uses the standard library.
+    Raises:
+        DecodeError: If the body is empty, has no callback wrapper or is not valid JSON.
+    """
+    if loads is None and isinstance(body, (bytes, bytearray)):
+        try:
+            body = body.decode('utf-8')
+        except UnicodeDecodeError as e:
+            raise DecodeError("", f"not valid UTF-8: {e}") from e
+    is_bytes = isinstance(body, (bytes, bytearray))
+    start = body.find(b'(' if is_bytes else '(')
+    end = body.rfind(b')' if is_bytes else ')')
+    if start < 0 or end <= start + 1:
+        raise DecodeError("", "empty response body" if not body.strip() else "no JSONP callback wrapper")
+
+    try:
+        if loads is not None:
+            return loads(memoryview(body)[start + 1:end] if is_bytes else body[start + 1:end])
+        data, stop = _DECODER.raw_decode(body, _WHITESPACE.match(body, start + 1).end())
+    except ValueError as e:
+        raise DecodeError("", f"not valid JSON: {e}") from e
+    if _WHITESPACE.match(body, stop).end() != end:
+        raise DecodeError("", "unexpected data after the JSON payload")
+    return data
+
+
+class SeatFinderDecoder:
+    """
+    Decoder for the responses of one site, built from its location list.
+
+    The code -> column map and the output arrays are created once; `decode()` then only
+    walks the parsed response and fills the arrays. Only the newest reading of each location
+    is read; the older ones the configured URL asks for are parsed but not walked.
+
+    Args:
+        codes (list[str]): Location codes in column order (`AppConfig.location_codes`).
+        use_orjson (bool): Parse with orjson if it is installed.
+    """
+
+    def __init__(self, codes, use_orjson=True):
+        self.codes = tuple(codes)
+        self.columns = {code: i for i, code in enumerate(self.codes)}
+        self.loads = orjson.loads if use_orjson and orjson is not None else None
+        self.free = np.zeros(len(self.codes), dtype=np.int64)
+        self.closed = np.ones(len(self.codes), dtype=bool)
+
+    def decode(self, body):
+        """
+        Decode a response body (bytes or str), or an already parsed response.
+
+        Returns:
+            Reading: Counts in column order.
+        Raises:
+            DecodeError: If the response does not match the expected shape or the site's locations.
+        """
+        data = body if isinstance(body, list) else parse_body(body, self.loads)
+        if not isinstance(data, list) or len(data) < 2 or not all(isinstance(part, dict) for part in data[:2]):
+            raise DecodeError("", "expected a list of two objects")
+
+        estimates = data[0].get("seatestimate")
+        if not isinstance(estimates, dict):
+            raise DecodeError("[0].seatestimate", "expected an object")
+        if estimates.keys() != self.columns.keys():
+            missing = [code for code in self.codes if code not in estimates]
+            unexpected = [code for code in estimates if code not in self.columns]
+            raise DecodeError("[0].seatestimate", f"locations do not match the config "
+                                                  f"(missing: {missing}, unexpected: {unexpected})")
+
+        free, closed = self.free, self.closed
+        newest = newest_code = None
+        for code, readings in estimates.items():
+            column = self.columns[code]
+            if not isinstance(readings, list) or not readings:
+                free[column] = 0
+                closed[column] = True
+                continue
+
+            latest = readings[0]
+            seats = latest.get("free_seats") if isinstance(latest, dict) else None
+            if not isinstance(seats, (int, float)) or isinstance(seats, bool) or not -2 ** 31 < seats < 2 ** 31:
+                raise DecodeError(f"[0].seatestimate.{code}[0].free_seats", f"expected a seat count, got {seats!r}")
+            try:
+                reading_time = latest["timestamp"]["date"]
+            except (KeyError, TypeError):
+                reading_time = None
+            if not isinstance(reading_time, str) or not _DATE_SHAPE.fullmatch(reading_time):
+                raise DecodeError(f"[0].seatestimate.{code}[0].timestamp.date",
+                                  f"expected a date like 2025-01-31 14:05:00.000000, got {reading_time!r}")
+            if newest is None or reading_time > newest:
+                newest, newest_code = reading_time, code
+            free[column] = seats
+            closed[column] = False
+        if newest is not None:
+            # The shape check lets through dates like 2025-13-45; only the one passed on is parsed
+            try:
+                datetime.strptime(newest, DATE_FORMAT)
+            except ValueError as e:
+                raise DecodeError(f"[0].seatestimate.{newest_code}[0].timestamp.date", str(e)) from e
+
+        locations = data[1].get("location")
+        if not isinstance(locations, dict):
+            raise DecodeError("[1].location", "expected an object")
+        metadata = {}
+        for code in self.codes:
+            entries = locations.get(code)
+            if not isinstance(entries, list) or not entries or not isinstance(entries[0], dict):
+                raise DecodeError(f"[1].location.{code}", "expected a non-empty list of objects")
+            if not isinstance(entries[0].get("opening_hours"), dict):
+                raise DecodeError(f"[1].location.{code}[0].opening_hours", "expected an object")
+            metadata[code] = entries
+
+        return Reading(newest, free, closed, metadata)
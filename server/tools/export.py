@@ -0,0 +1,108 @@
+"""
+Streaming export of the occupancy history (archive plus ring buffer).
+
+Every format is written chunk by chunk to a binary file-like object, so memory stays
+bounded by `chunk_rows` no matter how much history is exported:
+
+- csv: `timestamp,<code>,...` with one row per reading
+- npy: one structured array with a `timestamp` (datetime64[ms]) field and one uint16 field per code
+- npz: columnar; `timestamp.npy`, one `<code>.npy` per location and `codes.npy` (column order),
+  loadable with `np.load`
+"""
+import io
+import zipfile
+
+import numpy as np
+
+FORMATS = ("csv", "npy", "npz")
+CONTENT_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "npy": "application/octet-stream",
+    "npz": "application/zip",
+}
+
+
+def _npy_header(dtype, rows):
+    """Header bytes of a .npy file holding `rows` elements of `dtype`."""
+    buffer = io.BytesIO()
+    header = {'descr': np.lib.format.dtype_to_descr(np.dtype(dtype)), 'fortran_order': False, 'shape': (rows,)}
+    np.lib.format.write_array_header_2_0(buffer, header)
+    return buffer.getvalue()
+
+
+def count_rows(store, start_ms=None, end_ms=None, chunk_rows=4096, view=None):
+    return sum(len(times) for times, _ in store.iter_history(start_ms, end_ms, chunk_rows, view))
+
+
+def write_csv(store, codes, out, start_ms=None, end_ms=None, chunk_rows=4096, view=None):
+    out.write(("timestamp," + ",".join(codes) + "\n").encode('utf-8'))
+    rows = 0
+    for times, counts in store.iter_history(start_ms, end_ms, chunk_rows, view):
+        stamps = np.datetime_as_string(times.astype('datetime64[ms]'), unit='s')
+        lines = [f"{stamp},{','.join(map(str, row))}" for stamp, row in zip(stamps, counts.tolist())]
+        out.write(("\n".join(lines) + "\n").encode('utf-8'))
+        rows += len(lines)
+    return rows
+
+
+def write_npy(store, codes, out, start_ms=None, end_ms=None, chunk_rows=4096, view=None):
+    dtype = np.dtype([('timestamp', '<M8[ms]')] + [(code, '<u2') for code in codes])
+    # The header's row count must match every later pass, so all of them read one view
+    view = view if view is not None else store.history_view()
+    rows = count_rows(store, start_ms, end_ms, chunk_rows, view)
+    out.write(_npy_header(dtype, rows))
+    for times, counts in store.iter_history(start_ms, end_ms, chunk_rows, view):
+        chunk = np.zeros(len(times), dtype=dtype)
+        chunk['timestamp'] = times.astype('datetime64[ms]')
+        for i, code in enumerate(codes):
+            chunk[code] = counts[:, i]
+        out.write(chunk.tobytes())
+    return rows
+
+
+def write_npz(store, codes, out, start_ms=None, end_ms=None, chunk_rows=4096, view=None):
+    # The header's row count must match every later pass, so all of them read one view
+    view = view if view is not None else store.history_view()
+    rows = count_rows(store, start_ms, end_ms, chunk_rows, view)
+    # ZipFile streams to unseekable outputs (e.g. a chunked HTTP response) using data descriptors
+    with zipfile.ZipFile(out, 'w', zipfile.ZIP_STORED) as archive:
+        with archive.open('codes.npy', 'w') as f:
+            np.lib.format.write_array(f, np.array(codes))
+
+        # One pass per column keeps the file columnar without holding more than a chunk in memory
+        columns = [('timestamp', '<M8[ms]', None)] + [(code, '<u2', i) for i, code in enumerate(codes)]
+        for name, dtype, column in columns:
+            with archive.open(f'{name}.npy', 'w', force_zip64=True) as f:
+                f.write(_npy_header(dtype, rows))
+                for times, counts in store.iter_history(start_ms, end_ms, chunk_rows, view):
+                    values = times.astype('datetime64[ms]') if column is None else counts[:, column]
+                    f.write(np.ascontiguousarray(values, dtype=dtype).tobytes())
+    return rows
+
+
+WRITERS = {"csv": write_csv, "npy": write_npy, "npz": write_npz}
+
+
+def export(store, codes, fmt, out, start=None, end=None, chunk_rows=4096):
+    """
+    Stream the history of `store` between `start` and `end` (datetimes, inclusive) to `out`.
+
+    The history is read from one `history_view()` taken at the call, so rows appended by the
+    collector meanwhile do not change what is written.
+
+    Returns:
+        int: Number of rows written.
+    Raises:
+        ValueError: For an unknown format.
+    """
+    if fmt not in WRITERS:
+        raise ValueError(f"format must be one of {', '.join(FORMATS)}")
+    start_ms = int(np.datetime64(start, 'ms').astype(np.int64)) if start else None
+    if end:
+        end_ms = int(np.datetime64(end, 'ms').astype(np.int64))
+    elif store.last_reading is not None:
+        end_ms = int(np.datetime64(store.last_reading, 'ms').astype(np.int64))
+    else:
+        end_ms = None
+    return WRITERS[fmt](store, list(codes)[:store.num_buildings], out, start_ms, end_ms, chunk_rows,
+                        store.history_view())
@@ -1,40 +1,55 @@
-import json
 import requests
 import logging
-from typing import Any, Dict, List, Union
 from requests.adapters import HTTPAdapter
 from requests.exceptions import RequestException, HTTPError, Timeout
 
+from tools.tracing import span
+
 logger = logging.getLogger("seat_tracker")
 
 
 class FetchSeatsError(Exception):
-    """Raised when fetching or parsing seat‐occupancy data fails."""
+    """Raised when fetching seat‐occupancy data fails."""
+
+
+def create_session(retries: int = 3, pool_size: int = 10) -> requests.Session:
+    """
+    Session with retries and a connection pool of `pool_size` connections per host.
+
+    Thread-safe for concurrent GETs, so one session can serve every site of a collector
+    and keep its connections alive between cycles.
+    """
+    session = requests.Session()
+    adapter = HTTPAdapter(max_retries=retries, pool_connections=pool_size, pool_maxsize=pool_size)
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    return session
 
 
-def fetch_seats(
+def fetch_body(
         url: str,
         *,
         timeout: float = 5.0,
         retries: int = 3,
-        backoff_factor: float = 0.3
-) -> Union[Dict[str, Any], List[Any]]:
+        session: requests.Session = None
+) -> bytes:
     """
-    Fetch seat‐occupancy JSONP from `url`, strip the padding, parse JSON, and clean it.
+    Fetch the raw response body from `url`, for decoding with `tools.decoder.SeatFinderDecoder`.
+
+    Without `session`, a new session (and connection) is used for this request only.
 
     Raises
     ------
     FetchSeatsError
-        On network errors, invalid HTTP status, parse failures, or cleanup errors.
+        On network errors, invalid HTTP status or an empty body.
     """
-    session = requests.Session()
-    adapter = HTTPAdapter(max_retries=retries)
-    session.mount("http://", adapter)
-    session.mount("https://", adapter)
+    if session is None:
+        session = create_session(retries)
 
     try:
-        resp = session.get(url, timeout=timeout)
-        resp.raise_for_status()
+        with span("fetch.http"):
+            resp = session.get(url, timeout=timeout)
+            resp.raise_for_status()
     except Timeout as e:
         logger.error("Timeout after %ss fetching %s", timeout, url)
         raise FetchSeatsError(f"Timeout fetching {url}") from e
@@ -45,24 +60,8 @@ def fetch_seats(
         logger.error("Network error fetching %s: %s", url, e)
         raise FetchSeatsError("Network error") from e
 
-    text = resp.text.strip()
-    if not text:
+    if not resp.content.strip():
         logger.error("Empty response from %s", url)
         raise FetchSeatsError("Empty response body")
+    return resp.content
 
-    try:
-        start = text.find("(")
-        end = text.rfind(")")
-        if start < 0 or end < 0 or end <= start + 1:
-            raise ValueError("No JSONP callback wrapper found")
-        json_str = text[start + 1: end].strip().rstrip(";")
-        data = json.loads(json_str)
-    except (ValueError, json.JSONDecodeError) as e:
-        logger.error("Failed to extract/parse JSON: %s", e)
-        raise FetchSeatsError("Invalid JSONP format") from e
-
-    if not isinstance(data, (dict, list)):
-        logger.error("Expected dict or list, got %s", type(data))
-        raise FetchSeatsError("Unexpected JSON structure")
-
-    return data
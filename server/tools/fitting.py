@@ -0,0 +1,183 @@
+"""
+Offline fitting of the Holt-Winters smoothing parameters against ring buffer history.
+
+`smoothing_errors` runs the same recursion as `HoltWintersOnline.update` for a
+whole grid of (alpha, beta, gamma) and all buildings at once: every state
+array carries a (parameter set, building) shape, so one pass over the history
+scores every combination. `fit_parameters` picks the best set per building
+and can fan buildings out over a process pool.
+"""
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+
+import numpy as np
+
+from tools.forecast import HoltWintersOnline, PARAMS_FILE
+
+DEFAULT_GRID = {
+    "alpha": (0.02, 0.05, 0.1, 0.2, 0.3, 0.5, 0.7),
+    "beta": (0.0, 0.005, 0.02, 0.05, 0.1),
+    "gamma": (0.05, 0.1, 0.15, 0.25, 0.4, 0.6),
+}
+
+
+def param_grid(alphas, betas, gammas):
+    """All (alpha, beta, gamma) combinations as an array of shape (P, 3)."""
+    a, b, g = np.meshgrid(alphas, betas, gammas, indexing='ij')
+    return np.stack([a.ravel(), b.ravel(), g.ravel()], axis=1)
+
+
+def initial_components(y, season_length):
+    """`HoltWintersOnline.initialize` for every column of `y` (shape (T, B)) at once."""
+    season1 = y[:season_length]
+    season2 = y[season_length:2 * season_length]
+    avg1 = season1.mean(axis=0)
+    avg2 = season2.mean(axis=0)
+    trend = (avg2 - avg1) / season_length
+    level = avg1 + trend / 2
+
+    detrended1 = season1 - (level - trend / 2)
+    detrended2 = season2 - (level + season_length * trend + trend / 2)
+    seasonal = 0.5 * (detrended1 + detrended2)
+    seasonal -= seasonal.mean(axis=0)
+    return level, trend, seasonal
+
+
+def smoothing_errors(y, alpha, beta, gamma, max_seats, season_length=288, horizon=1):
+    """
+    Mean squared `horizon`-step-ahead forecast error of Holt-Winters for many parameter sets.
+
+    The first two seasons initialize the components (as in `HoltWintersOnline.initialize`),
+    the rest of the history is replayed through the update equations and scored.
+
+    Args:
+        y (ndarray): History of shape (T, B), oldest first.
+        alpha, beta, gamma (ndarray): Shape (P, 1) for a grid shared by all buildings,
+            or (P, B) for per-building parameters.
+        max_seats (ndarray): Shape (B,); observations and forecasts are clipped to [0, max_seats].
+        season_length (int): Periods per season.
+        horizon (int): Steps ahead that are scored (1 to season_length).
+    Returns:
+        ndarray: Mean squared error of shape (P, B).
+    """
+    max_seats = np.asarray(max_seats, dtype=np.float64)
+    y = np.clip(np.asarray(y, dtype=np.float64), 0, max_seats)
+    steps, buildings = y.shape
+    start = 2 * season_length
+    if not 1 <= horizon <= season_length:
+        raise ValueError(f"horizon must be between 1 and {season_length}")
+    if steps <= start + horizon:
+        raise ValueError(f"Need more than {start + horizon} observations, got {steps}")
+
+    level0, trend0, seasonal0 = initial_components(y, season_length)
+    shape = np.broadcast_shapes(np.shape(alpha), np.shape(beta), np.shape(gamma), (1, buildings))
+    level = np.broadcast_to(level0, shape).copy()
+    trend = np.broadcast_to(trend0, shape).copy()
+    # Seasonal slot first so each update touches one contiguous (P, B) block
+    seasonal = np.broadcast_to(seasonal0[:, None, :], (season_length,) + shape).copy()
+    pending = np.zeros((horizon,) + shape)  # forecasts for the next `horizon` observations
+    sse = np.zeros(shape)
+
+    for t in range(start, steps):
+        obs = y[t]
+        if t >= start + horizon:
+            error = obs - pending[t % horizon]
+            sse += error * error
+
+        slot = t % season_length
+        prev_level = level
+        prev_seasonal = seasonal[slot].copy()
+        level = alpha * (obs - prev_seasonal) + (1 - alpha) * (prev_level + trend)
+        trend = beta * (level - prev_level) + (1 - beta) * trend
+        seasonal[slot] = gamma * (obs - level) + (1 - gamma) * prev_seasonal
+
+        # Forecast for observation t + horizon, bounded like HoltWintersOnline.forecast
+        target_slot = (t + horizon) % season_length
+        np.clip(level + horizon * trend + seasonal[target_slot], 0, max_seats, out=pending[t % horizon])
+
+    return sse / (steps - start - horizon)
+
+
+def _fit_columns(y, max_seats, grid, current, season_length, horizon):
+    """Score `grid` plus the `current` per-building parameters on a block of buildings."""
+    alpha = np.concatenate([grid[:, 0:1].repeat(y.shape[1], axis=1), current[None, :, 0]])
+    beta = np.concatenate([grid[:, 1:2].repeat(y.shape[1], axis=1), current[None, :, 1]])
+    gamma = np.concatenate([grid[:, 2:3].repeat(y.shape[1], axis=1), current[None, :, 2]])
+    return smoothing_errors(y, alpha, beta, gamma, max_seats, season_length, horizon)
+
+
+def fit_parameters(y, max_seats, current, grid=None, season_length=288, horizon=1, workers=1):
+    """
+    Best grid parameters per building, scored against the parameters currently in use.
+
+    Args:
+        y (ndarray): History of shape (T, B), oldest first.
+        max_seats (sequence): Seat capacity per building.
+        current (ndarray): Parameters in use, shape (B, 3) as (alpha, beta, gamma).
+        grid (ndarray): Candidate parameter sets of shape (P, 3) (default: DEFAULT_GRID).
+        workers (int): Processes to spread buildings over; 1 runs in-process.
+    Returns:
+        dict: `params` (B, 3), `rmse` (B,) of the best set and `current_rmse` (B,).
+    """
+    if grid is None:
+        grid = param_grid(DEFAULT_GRID["alpha"], DEFAULT_GRID["beta"], DEFAULT_GRID["gamma"])
+    y = np.asarray(y, dtype=np.float64)
+    max_seats = np.asarray(max_seats, dtype=np.float64)
+    current = np.asarray(current, dtype=np.float64)
+
+    blocks = [idx for idx in np.array_split(np.arange(y.shape[1]), max(1, workers)) if len(idx)]
+    if len(blocks) == 1:
+        mse = _fit_columns(y, max_seats, grid, current, season_length, horizon)
+    else:
+        with ProcessPoolExecutor(max_workers=len(blocks)) as pool:
+            parts = pool.map(_fit_columns,
+                             [y[:, idx] for idx in blocks],
+                             [max_seats[idx] for idx in blocks],
+                             [grid] * len(blocks),
+                             [current[idx] for idx in blocks],
+                             [season_length] * len(blocks),
+                             [horizon] * len(blocks))
+            mse = np.concatenate(list(parts), axis=1)
+
+    best = np.argmin(mse[:-1], axis=0)
+    return {
+        "params": grid[best],
+        "rmse": np.sqrt(mse[best, np.arange(y.shape[1])]),
+        "current_rmse": np.sqrt(mse[-1]),
+    }
+
+
+def write_fitted_params(model_dir, codes, params, rmse, current_rmse, horizon, apply):
+    """
+    Atomically write the fitted parameters where ForecastManager picks them up.
+
+    Buildings where `apply` is False are written as null and keep their parameters.
+    """
+    buildings = []
+    for i, code in enumerate(codes):
+        if not apply[i]:
+            buildings.append(None)
+            continue
+        alpha, beta, gamma = (float(v) for v in params[i])
+        buildings.append({
+            "code": code,
+            "model": HoltWintersOnline.model_type,
+            "alpha": alpha,
+            "beta": beta,
+            "gamma": gamma,
+            "rmse": round(float(rmse[i]), 3),
+            "previous_rmse": round(float(current_rmse[i]), 3)
+        })
+
+    path = os.path.join(model_dir, PARAMS_FILE)
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'w') as f:
+        json.dump({
+            "fitted_at": datetime.now().isoformat(),
+            "horizon": horizon,
+            "buildings": buildings
+        }, f, indent=2)
+    os.replace(tmp_path, path)
+    return path
@@ -1,6 +1,15 @@
 import numpy as np
+import io
 import json
 import os
+import threading
+from collections import OrderedDict
+
+from tools.hours import week_slots, weekly_masks
+from tools.tracing import span
+
+STATE_FILE = 'building_{}_state.json'
+PARAMS_FILE = 'fitted_params.json'  # Written by fit_models.py, picked up by ForecastManager
 
 
 class HoltWintersOnline:
@@ -19,6 +28,8 @@ class HoltWintersOnline:
         n (int): Number of observations processed
     """
 
+    model_type = 'holt_winters'
+
     def __init__(self, season_length=288, alpha=0.2, beta=0.02, gamma=0.15, max_seats=100):
         self.season_length = season_length
         self.alpha = alpha
@@ -71,27 +82,191 @@ class HoltWintersOnline:
 
         self.n += 1
 
+    def skip(self):
+        """Move on to the next period without an observation (the building is closed)"""
+        self.n += 1
+
+    def reset(self, level, n):
+        """Flat fallback when there is too little history to initialize from"""
+        self.level = level
+        self.trend = 0
+        self.seasonal = np.zeros(self.season_length)
+        self.n = n
+
     def forecast(self, steps=12):
         """Generate forecast with bounds enforcement"""
-        forecasts = []
-        current_season_idx = self.n % self.season_length
+        return self.forecast_batch([self], steps)[0].tolist()
+
+    @staticmethod
+    def forecast_batch(models, steps):
+        """Forecasts for several models with the same season length, shape (len(models), steps)"""
+        horizon = np.arange(1, steps + 1)
+        level = np.array([m.level for m in models])[:, None]
+        trend = np.array([m.trend for m in models])[:, None]
+        seasonal = np.stack([m.seasonal for m in models])
+        # Step i forecasts observation n + i - 1, whose seasonal slot is (n + i - 1) % season_length
+        idx = (np.array([m.n for m in models])[:, None] + horizon - 1) % seasonal.shape[1]
+        forecasts = level + horizon * trend + np.take_along_axis(seasonal, idx, axis=1)
+        # Clip forecast to physical bounds [0, max_seats]
+        return np.clip(forecasts, 0, np.array([m.max_seats for m in models])[:, None])
+
+    def get_state(self):
+        """Get current model state for persistence"""
+        return {
+            'model': self.model_type,
+            'level': self.level,
+            'trend': self.trend,
+            'seasonal': self.seasonal.tolist(),
+            'n': self.n,
+            'alpha': self.alpha,
+            'beta': self.beta,
+            'gamma': self.gamma
+        }
+
+    def set_state(self, state):
+        """Restore model state from persisted data"""
+        self.level = state['level']
+        self.trend = state['trend']
+        self.seasonal = np.array(state['seasonal'])
+        self.n = state['n']
+        # States written before parameter fitting existed keep the current parameters
+        self.alpha = state.get('alpha', self.alpha)
+        self.beta = state.get('beta', self.beta)
+        self.gamma = state.get('gamma', self.gamma)
 
-        for i in range(1, steps + 1):
-            seasonal_idx = (current_season_idx + i) % self.season_length
-            forecast = self.level + i * self.trend + self.seasonal[seasonal_idx]
-            # Clip forecast to physical bounds [0, max_seats]
-            bounded_forecast = max(0, min(forecast, self.max_seats))
-            forecasts.append(bounded_forecast)
+    def set_params(self, alpha, beta, gamma):
+        """Replace the smoothing parameters, keeping the fitted components"""
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
 
-        return forecasts
+
+class DoubleSeasonalOnline:
+    """
+    Online exponential smoothing with additive trend, a daily and a weekly seasonal component
+    (Taylor's double-seasonal Holt-Winters). The weekly component carries what distinguishes
+    e.g. a Saturday from a Friday on top of the shared daily shape.
+
+    Seasonal slots follow the ring buffer: `n % weekly_length` is the ring buffer slot of the
+    next observation, so `align()` can skip slots that were never fetched.
+
+    Attributes:
+        season_length (int): Periods per day (288 for 5-min intervals)
+        weekly_length (int): Periods per week (2016), a multiple of season_length
+        alpha (float): Level smoothing parameter
+        beta (float): Trend smoothing parameter
+        gamma (float): Daily seasonal smoothing parameter
+        delta (float): Weekly seasonal smoothing parameter
+        level (float): Current level component
+        trend (float): Current trend component
+        seasonal (ndarray): Daily seasonal components
+        weekly (ndarray): Weekly seasonal components (deviation from the daily shape)
+        n (int): Number of periods processed
+    """
+
+    model_type = 'double_seasonal'
+
+    def __init__(self, season_length=288, weekly_length=2016, alpha=0.2, beta=0.01, gamma=0.1, delta=0.3,
+                 max_seats=100):
+        if weekly_length % season_length:
+            raise ValueError("weekly_length must be a multiple of season_length")
+        self.season_length = season_length
+        self.weekly_length = weekly_length
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+        self.delta = delta
+        self.max_seats = max_seats
+        self.level = 0.0
+        self.trend = 0.0
+        self.seasonal = np.zeros(season_length)
+        self.weekly = np.zeros(weekly_length)
+        self.n = 0
+
+    def initialize(self, y, first_slot=0):
+        """
+        Initialize from one week of history (oldest first) whose first value was stored in
+        ring buffer slot `first_slot`. Level is the weekly mean, the daily component the mean
+        day and the weekly component what is left per slot, so no refit over the history is needed.
+        """
+        if len(y) != self.weekly_length:
+            raise ValueError("Need exactly one week of history for initialization")
+
+        # Reorder so index k holds ring buffer slot k
+        week = np.roll(np.asarray(y, dtype=np.float64), first_slot)
+        days = week.reshape(-1, self.season_length)
+
+        self.level = float(week.mean())
+        self.trend = 0.0
+        self.seasonal = days.mean(axis=0) - self.level
+        self.weekly = (days - self.level - self.seasonal).ravel()
+        # The next observation goes into the slot after the newest one, i.e. first_slot
+        self.n = self.weekly_length + first_slot
+
+    def reset(self, level, n):
+        """Flat fallback when there is too little history to initialize from"""
+        self.level = level
+        self.trend = 0
+        self.seasonal = np.zeros(self.season_length)
+        self.weekly = np.zeros(self.weekly_length)
+        self.n = n
+
+    def align(self, slot):
+        """Advance to ring buffer `slot`, skipping periods that were never observed"""
+        self.n += (slot - self.n) % self.weekly_length
+
+    def update(self, y):
+        """Update model with a new observation (clipped to bounds)"""
+        y_clipped = max(0, min(y, self.max_seats))
+        t = self.n % self.season_length
+        w = self.n % self.weekly_length
+        prev_level = self.level
+        prev_seasonal = self.seasonal[t]
+        prev_weekly = self.weekly[w]
+
+        self.level = self.alpha * (y_clipped - prev_seasonal - prev_weekly) + \
+            (1 - self.alpha) * (prev_level + self.trend)
+        self.trend = self.beta * (self.level - prev_level) + (1 - self.beta) * self.trend
+        self.seasonal[t] = self.gamma * (y_clipped - self.level - prev_weekly) + (1 - self.gamma) * prev_seasonal
+        self.weekly[w] = self.delta * (y_clipped - self.level - prev_seasonal) + (1 - self.delta) * prev_weekly
+
+        self.n += 1
+
+    def skip(self):
+        """Move on to the next period without an observation (the building is closed)"""
+        self.n += 1
+
+    def forecast(self, steps=12):
+        """Generate forecast with bounds enforcement"""
+        return self.forecast_batch([self], steps)[0].tolist()
+
+    @staticmethod
+    def forecast_batch(models, steps):
+        """Forecasts for several models with the same season lengths, shape (len(models), steps)"""
+        horizon = np.arange(1, steps + 1)
+        level = np.array([m.level for m in models])[:, None]
+        trend = np.array([m.trend for m in models])[:, None]
+        seasonal = np.stack([m.seasonal for m in models])
+        weekly = np.stack([m.weekly for m in models])
+        periods = np.array([m.n for m in models])[:, None] + horizon - 1
+        forecasts = level + horizon * trend + \
+            np.take_along_axis(seasonal, periods % seasonal.shape[1], axis=1) + \
+            np.take_along_axis(weekly, periods % weekly.shape[1], axis=1)
+        return np.clip(forecasts, 0, np.array([m.max_seats for m in models])[:, None])
 
     def get_state(self):
         """Get current model state for persistence"""
         return {
+            'model': self.model_type,
             'level': self.level,
             'trend': self.trend,
             'seasonal': self.seasonal.tolist(),
-            'n': self.n
+            'weekly': self.weekly.tolist(),
+            'n': self.n,
+            'alpha': self.alpha,
+            'beta': self.beta,
+            'gamma': self.gamma,
+            'delta': self.delta
         }
 
     def set_state(self, state):
@@ -99,7 +274,195 @@ class HoltWintersOnline:
         self.level = state['level']
         self.trend = state['trend']
         self.seasonal = np.array(state['seasonal'])
+        self.weekly = np.array(state['weekly'])
         self.n = state['n']
+        self.alpha = state.get('alpha', self.alpha)
+        self.beta = state.get('beta', self.beta)
+        self.gamma = state.get('gamma', self.gamma)
+        self.delta = state.get('delta', self.delta)
+
+    def set_params(self, alpha, beta, gamma, delta=None):
+        """Replace the smoothing parameters, keeping the fitted components"""
+        self.alpha = alpha
+        self.beta = beta
+        self.gamma = gamma
+        if delta is not None:
+            self.delta = delta
+
+
+MODEL_TYPES = {
+    HoltWintersOnline.model_type: HoltWintersOnline,
+    DoubleSeasonalOnline.model_type: DoubleSeasonalOnline,
+}
+
+
+def forecast_models(models, steps):
+    """Forecasts for a mixed list of models, one vectorized batch per model type; shape (len(models), steps)"""
+    forecasts = np.zeros((len(models), steps))
+    for model_class in MODEL_TYPES.values():
+        idx = [i for i, m in enumerate(models) if isinstance(m, model_class)]
+        if idx:
+            forecasts[idx] = model_class.forecast_batch([models[i] for i in idx], steps)
+    return forecasts
+
+
+def open_steps(week, last_reading, steps, interval_minutes=5):
+    """
+    Open flags of shape (buildings, steps) for the `steps` periods after `last_reading`.
+
+    Args:
+        week (ndarray): Stacked weekly masks (`tools.hours.weekly_masks`).
+        last_reading (datetime or str): Time of the latest reading.
+    """
+    first = week_slots(np.datetime64(last_reading, 'm'), interval_minutes) + 1
+    return week[:, (first + np.arange(steps)) % week.shape[1]]
+
+
+def forecast_open(models, is_open):
+    """
+    Rounded forecasts of `models` for the steps of `is_open` (buildings, steps): steps at which a
+    building is closed are 0, and buildings closed over the whole horizon are not forecast at all.
+    """
+    steps = is_open.shape[1]
+    forecasts = np.zeros((len(models), steps))
+    rows = np.flatnonzero(is_open.any(axis=1))
+    if len(rows):
+        forecasts[rows] = forecast_models([models[i] for i in rows], steps)
+    return np.where(is_open, forecasts, 0).round()
+
+
+def pack_models(models, reading_time='', schedules=None, interval_minutes=5):
+    """
+    Serialize what forecasting needs from `models` (no smoothing parameters) into one .npz blob,
+    so other processes can forecast any horizon from the collector's current state.
+
+    `schedules` (opening hours per building, see `ForecastManager.forecast`) are included so those
+    forecasts are masked the same way as the published ones.
+    """
+    types = list(MODEL_TYPES)
+    weekly_rows = [i for i, m in enumerate(models) if isinstance(m, DoubleSeasonalOnline)]
+    buffer = io.BytesIO()
+    np.savez(
+        buffer,
+        model_type=np.array([types.index(m.model_type) for m in models], dtype=np.int8),
+        level=np.array([m.level for m in models], dtype=np.float64),
+        trend=np.array([m.trend for m in models], dtype=np.float64),
+        n=np.array([m.n for m in models], dtype=np.int64),
+        max_seats=np.array([m.max_seats for m in models], dtype=np.float64),
+        seasonal=np.stack([m.seasonal for m in models]).astype(np.float64),
+        weekly_rows=np.array(weekly_rows, dtype=np.int64),
+        weekly=np.stack([models[i].weekly for i in weekly_rows]).astype(np.float64) if weekly_rows
+        else np.zeros((0, 0)),
+        reading_time=np.array(reading_time),
+        schedules=np.array(json.dumps(schedules) if schedules is not None else ''),
+        interval_minutes=np.array(interval_minutes, dtype=np.int64)
+    )
+    return buffer.getvalue()
+
+
+def unpack_models(payload):
+    """Rebuild the models serialized by `pack_models`; returns (models, reading_time, schedules, interval_minutes)"""
+    types = list(MODEL_TYPES)
+    with np.load(io.BytesIO(payload), allow_pickle=False) as data:
+        seasonal = data['seasonal']
+        weekly = dict(zip(data['weekly_rows'].tolist(), data['weekly']))
+        models = []
+        for i, type_index in enumerate(data['model_type'].tolist()):
+            model_type = types[type_index]
+            if model_type == DoubleSeasonalOnline.model_type:
+                model = DoubleSeasonalOnline(seasonal.shape[1], len(weekly[i]), max_seats=data['max_seats'][i])
+                model.weekly = weekly[i]
+            else:
+                model = HoltWintersOnline(seasonal.shape[1], max_seats=data['max_seats'][i])
+            model.level = float(data['level'][i])
+            model.trend = float(data['trend'][i])
+            model.n = int(data['n'][i])
+            model.seasonal = seasonal[i]
+            models.append(model)
+        # Absent from states published before schedules were packed
+        schedules = str(data['schedules']) if 'schedules' in data.files else ''
+        interval_minutes = int(data['interval_minutes']) if 'interval_minutes' in data.files else 5
+        return models, str(data['reading_time']), json.loads(schedules) if schedules else None, interval_minutes
+
+
+class ForecastResult:
+    """Forecasts for all buildings at one horizon, computed from one published model-state version."""
+
+    __slots__ = ('version', 'published_at', 'reading_time', 'model_types', 'predictions')
+
+    def __init__(self, version, published_at, reading_time, model_types, predictions):
+        self.version = version
+        self.published_at = published_at
+        self.reading_time = reading_time
+        self.model_types = model_types
+        self.predictions = predictions
+
+
+class OnDemandForecaster:
+    """
+    Forecasts any horizon from the model states the collector publishes (see `pack_models`).
+
+    The states are unpacked only when a forecast is requested for a new version, and the
+    forecasts for all buildings are computed in one batch per (version, horizon) and reused
+    until the collector publishes again. Like the published predictions, they are 0 outside
+    the opening hours the collector packed with the states.
+
+    Attributes:
+        reader (SnapshotReader): Reader of the collector's model snapshot.
+        max_horizon (int): Longest horizon that may be requested.
+        cache_size (int): Number of horizons kept per version.
+    """
+
+    def __init__(self, reader, max_horizon=288, cache_size=32):
+        self.reader = reader
+        self.max_horizon = max_horizon
+        self.cache_size = cache_size
+        self._lock = threading.Lock()
+        self._version = None
+        self._models = None
+        self._reading_time = None
+        self._schedules = None
+        self._interval_minutes = 5
+        self._cache = OrderedDict()
+
+    def forecast(self, horizon):
+        """
+        ForecastResult for `horizon` steps, or None while no model state has been published.
+
+        Raises:
+            ValueError: If `horizon` is outside 1..max_horizon.
+        """
+        if not 1 <= horizon <= self.max_horizon:
+            raise ValueError(f"horizon must be between 1 and {self.max_horizon}")
+        snapshot = self.reader.read()
+        if snapshot is None:
+            return None
+
+        key = (snapshot.version, horizon)
+        with self._lock:
+            result = self._cache.get(key)
+            if result is not None:
+                self._cache.move_to_end(key)
+                return result
+
+            if self._version != snapshot.version:
+                self._models, self._reading_time, self._schedules, self._interval_minutes = \
+                    unpack_models(snapshot.payload)
+                self._version = snapshot.version
+                self._cache.clear()
+
+            if self._schedules is None or not self._reading_time:
+                predictions = forecast_models(self._models, horizon).round()
+            else:
+                week = weekly_masks(self._schedules, self._interval_minutes)
+                predictions = forecast_open(self._models, open_steps(week, self._reading_time, horizon,
+                                                                     self._interval_minutes))
+            result = ForecastResult(snapshot.version, snapshot.published_at, self._reading_time,
+                                    [m.model_type for m in self._models], predictions)
+            self._cache[key] = result
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+            return result
 
 
 class ForecastManager:
@@ -108,54 +471,105 @@ class ForecastManager:
         and handles model persistence.
         """
 
-    def __init__(self, ring_buffer, model_dir, max_seats_list, max_forecast=12, num_buildings=22, season_length=288):
+    def __init__(self, ring_buffer, model_dir, max_seats_list, max_forecast=12, num_buildings=22, season_length=288,
+                 persist_every=1, model_types=None, weekly_season_length=2016, codes=None):
         self.ring_buffer = ring_buffer
+        self.codes = list(codes or [])  # Location code per building; matches fitted parameters to buildings
         self.model_dir = model_dir
         self.num_buildings = num_buildings
         self.season_length = season_length
         self.max_seats_list = max_seats_list  # List of max seats per library
         self.max_forecast = max_forecast
+        self.persist_every = max(1, persist_every)  # Write model states every N updates
+        self._updates = 0
+        self.weekly_season_length = weekly_season_length
+        self.model_types = list(model_types or [HoltWintersOnline.model_type] * num_buildings)
 
         # Create models with individual max_seats
         self.models = [
-            HoltWintersOnline(
-                season_length,
-                max_seats=max_seats_list[i]
-            ) for i in range(num_buildings)
+            self._create_model(self.model_types[i], max_seats_list[i])
+            for i in range(num_buildings)
         ]
 
         os.makedirs(model_dir, exist_ok=True)
         self.state_files = [
-            os.path.join(model_dir, f'building_{i}_state.json')
+            os.path.join(model_dir, STATE_FILE.format(i))
             for i in range(num_buildings)
         ]
-
-        self._initialize_models()
-
-    def _initialize_models(self):
-        _, counts = self.ring_buffer.get_all()
-
-        for i, model in enumerate(self.models):
+        self.params_file = os.path.join(model_dir, PARAMS_FILE)
+        self._params_mtime = None
+        self._schedules = None  # Opening hours behind `_open_week`, rebuilt when they change
+        self._open_week = None
+
+        self._initialize_models(range(num_buildings))
+        self._load_fitted_params()
+
+    def _create_model(self, model_type, max_seats):
+        if model_type == DoubleSeasonalOnline.model_type:
+            return DoubleSeasonalOnline(self.season_length, self.weekly_season_length, max_seats=max_seats)
+        if model_type == HoltWintersOnline.model_type:
+            return HoltWintersOnline(self.season_length, max_seats=max_seats)
+        raise ValueError(f"Unknown forecast model type {model_type!r}, expected one of {', '.join(MODEL_TYPES)}")
+
+    def _initialize_models(self, buildings):
+        counts = None
+
+        for i in buildings:
+            model = self.models[i]
             state_file = self.state_files[i]
 
+            state = None
             if os.path.exists(state_file):
                 with open(state_file, 'r') as f:
                     state = json.load(f)
+
+            # A state of another model type (the config changed) is re-initialized from history
+            if state is not None and state.get('model', HoltWintersOnline.model_type) == model.model_type:
                 model.set_state(state)
             else:
+                if counts is None:
+                    # Only needed for buildings without a usable persisted state
+                    _, counts = self.ring_buffer.get_all()
                 try:
                     # Initialize with clipped historical data
                     clipped_data = np.clip(counts[:, i], 0, model.max_seats)
-                    model.initialize(clipped_data)
+                    if isinstance(model, DoubleSeasonalOnline):
+                        if self.ring_buffer.capacity != self.weekly_season_length:
+                            raise ValueError("Ring buffer does not hold exactly one week")
+                        model.initialize(clipped_data, (self.ring_buffer.pointer + 1) % self.ring_buffer.capacity)
+                    else:
+                        model.initialize(clipped_data)
                     self._save_model_state(i)
                 except ValueError:
                     # Fallback with bounded average
                     clipped_data = np.clip(counts[:, i], 0, model.max_seats)
                     avg = np.mean(clipped_data) if len(clipped_data) > 0 else 0
-                    model.level = avg
-                    model.trend = 0
-                    model.seasonal = np.zeros(self.season_length)
-                    model.n = len(counts)
+                    model.reset(avg, len(counts))
+
+    def _load_fitted_params(self):
+        """Apply parameters from fit_models.py when the params file is new or has changed"""
+        try:
+            mtime = os.stat(self.params_file).st_mtime
+        except FileNotFoundError:
+            return False
+        if mtime == self._params_mtime:
+            return False
+
+        with open(self.params_file, 'r') as f:
+            fitted = json.load(f)
+        self._params_mtime = mtime
+
+        index = {code: i for i, code in enumerate(self.codes)}
+        for i, params in enumerate(fitted.get('buildings', [])):
+            if params is None:
+                continue
+            # Matched by code, so parameters fitted before the locations changed still reach their building
+            i = index.get(params['code'], -1) if 'code' in params and index else i
+            # Parameters are only meaningful for the model type they were fitted for
+            if 0 <= i < self.num_buildings and \
+                    params.get('model', HoltWintersOnline.model_type) == self.models[i].model_type:
+                self.models[i].set_params(params['alpha'], params['beta'], params['gamma'])
+        return True
 
     def _save_model_state(self, building_idx):
         """Save model state to disk"""
@@ -163,23 +577,124 @@ class ForecastManager:
         with open(self.state_files[building_idx], 'w') as f:
             json.dump(state, f)
 
-    def update_and_forecast(self):
-        """Update models with latest data and generate forecast_list"""
-        # Get most recent observation
-        _, counts = self.ring_buffer.get_recent(1)
-        latest_counts = counts[0]
+    def persist(self):
+        """Write every model state to disk."""
+        for i in range(len(self.models)):
+            self._save_model_state(i)
 
-        forecast_list = []
+    def remap_buildings(self, mapping, max_seats_list, model_types, codes=None):
+        """
+        Follow a change of the configured locations without losing the models of the ones kept.
+
+        Args:
+            mapping (list[int]): Previous building index of every new building, -1 for new ones
+                (see `tools.config.column_map`). The ring buffer must already hold the new layout.
+            max_seats_list (list[int]): Seats per new building.
+            model_types (list[str]): Model type per new building; a building whose type changed
+                gets a new model.
+            codes (list[str]): Location code per new building.
+        """
+        old_models, old_count = self.models, self.num_buildings
+        self.num_buildings = len(mapping)
+        self.max_seats_list = max_seats_list
+        self.model_types = list(model_types)
+        self.codes = list(codes or [])
+
+        fresh = []
+        self.models = []
+        for i, previous in enumerate(mapping):
+            model = old_models[previous] if previous >= 0 else None
+            if model is None or model.model_type != self.model_types[i]:
+                model = self._create_model(self.model_types[i], max_seats_list[i])
+                fresh.append(i)
+            model.max_seats = max_seats_list[i]
+            self.models.append(model)
+
+        # State files are per index, so every kept model is written at its new position
+        self.state_files = [os.path.join(self.model_dir, STATE_FILE.format(i)) for i in range(self.num_buildings)]
+        for i in range(self.num_buildings):
+            if i in fresh:
+                if os.path.exists(self.state_files[i]):
+                    os.remove(self.state_files[i])
+            else:
+                self._save_model_state(i)
+        for i in range(self.num_buildings, old_count):
+            stale = os.path.join(self.model_dir, STATE_FILE.format(i))
+            if os.path.exists(stale):
+                os.remove(stale)
+        self._initialize_models(fresh)
+
+    def open_steps(self, steps, schedules):
+        """
+        Open flags of shape (buildings, steps) for the `steps` periods after the latest reading.
 
-        for i, model in enumerate(self.models):
-            # Update model with latest observation
-            model.update(latest_counts[i])
+        Args:
+            schedules (list[dict]): `convert_opening_hours` schedule per building; the weekly mask
+                is kept until they change.
+        """
+        interval_minutes = self.interval_minutes
+        if schedules != self._schedules or len(self._open_week) != self.num_buildings:
+            self._open_week = weekly_masks(schedules, interval_minutes)
+            self._schedules = schedules
+        return open_steps(self._open_week, self.ring_buffer.last_reading, steps, interval_minutes)
 
-            # Generate forecast for this building
-            building_forecast = model.forecast(steps=self.max_forecast)
-            forecast_list.append(building_forecast)
+    @property
+    def interval_minutes(self):
+        return int(self.ring_buffer.interval.total_seconds() // 60)
 
-            # Persist model state (consider doing this less frequently in production)
-            self._save_model_state(i)
+    def forecast(self, steps, schedules=None):
+        """
+        Forecasts of `steps` periods for all buildings from the current state, without updating.
+
+        With `schedules`, steps at which a building is closed are 0 and buildings that stay
+        closed over the whole horizon are not forecast at all.
+        """
+        if schedules is None or self.ring_buffer.last_reading is None:
+            return forecast_models(self.models, steps).round()
+
+        return forecast_open(self.models, self.open_steps(steps, schedules))
+
+    def pack_states(self, reading_time='', schedules=None):
+        """Current model states and opening hours for the API's on-demand forecasts (see `pack_models`)"""
+        return pack_models(self.models, reading_time, schedules, self.interval_minutes)
+
+    def update_and_forecast(self, is_closed=None, schedules=None):
+        """
+        Update models with latest data and generate forecast_list
+
+        Args:
+            is_closed (sequence[bool]): Buildings without a reading this period; their models are
+                not updated with the stored 0, only moved on to the next period.
+            schedules (list[dict]): Opening hours per building, see `forecast()`.
+        """
+        # Get most recent observation
+        _, counts = self.ring_buffer.get_recent(1)
+        latest_counts = counts[0]
+        closed = [False] * self.num_buildings if is_closed is None else list(is_closed)
+
+        self._updates += 1
+        # Newly fitted parameters are written into the state files right away
+        persist = self._load_fitted_params() or self._updates % self.persist_every == 0
+        align = self.ring_buffer.capacity == self.weekly_season_length
+
+        with span("forecast.update"):
+            for i, model in enumerate(self.models):
+                # Weekly seasonal slots follow the ring buffer slot of the reading
+                if align and isinstance(model, DoubleSeasonalOnline):
+                    model.align(self.ring_buffer.pointer)
+
+                # Update model with latest observation; keep the seasonal position while closed
+                if closed[i]:
+                    model.skip()
+                else:
+                    model.update(latest_counts[i])
+
+        # Persist model states (every `persist_every` updates)
+        if persist:
+            with span("forecast.persist"):
+                for i in range(len(self.models)):
+                    self._save_model_state(i)
 
-        return np.array(forecast_list).round()
+        # Generate forecasts for the buildings open within the horizon, in one batch per model type
+        with span("forecast.predict"):
+            return self.forecast(self.max_forecast, schedules)
@@ -1,16 +1,22 @@
 from datetime import datetime
-from copy import deepcopy
+from functools import lru_cache
 import calendar
 import logging
 
 logger = logging.getLogger("seat_tracker")
 
 
+@lru_cache(maxsize=1024)
+def _parse_time_range(start_date, end_date):
+    # The same weekly dates come back every cycle, so strptime only runs when the week changes
+    start = datetime.strptime(start_date, "%Y-%m-%d %H:%M:%S.%f")
+    end = datetime.strptime(end_date, "%Y-%m-%d %H:%M:%S.%f")
+    return start.strftime("%H:%M"), end.strftime("%H:%M"), start
+
+
 def extract_time_range(interval):
     try:
-        start = datetime.strptime(interval[0]["date"], "%Y-%m-%d %H:%M:%S.%f")
-        end = datetime.strptime(interval[1]["date"], "%Y-%m-%d %H:%M:%S.%f")
-        return start.strftime("%H:%M"), end.strftime("%H:%M"), start
+        return _parse_time_range(interval[0]["date"], interval[1]["date"])
     except (KeyError, ValueError, TypeError, IndexError):
         return None, None, None
 
@@ -45,34 +51,36 @@ def convert_opening_hours(opening_hours):
     return weekly_schedule
 
 
-def replace_place_with_dict(data: dict[str, list[str]], place: str, new_entry: dict) -> str | None:
-    """
-    Looks in dict `data` for the value `place`, replaces it in the list
-    with the dict `new_entry`.
+def json_handler(location_dict, forecasts, number_of_free_seats, is_closed_flag, config):
     """
-    for codeword, places in data.items():
-        if place in places:
-            idx = places.index(place)
-            places[idx] = new_entry
+    Group the locations of one payload as configured in `library_info.grouping`.
 
+    `number_of_free_seats` and `forecasts` are in column order (`config.location_index`); every
+    entry goes to its precomputed position in its group (`config.group_slots`). A location
+    missing from the payload keeps its code in place of the entry; every other entry
+    carries it as "code".
+    """
+    combined = {group: list(places) for group, places in config.formatting_grouping.items()}
+    columns = config.location_index
 
-def json_handler(location_dict, forecasts, number_of_free_seats, is_closed_flag, config):
-    combined = deepcopy(config.formatting_grouping)
-
-    counting_locations = 0
     for key, loc_list in location_dict.items():
+        slot = config.group_slots.get(key)
+        if slot is None:
+            continue
+        column = columns[key]
         first_loc_entry = loc_list[0]
         first_loc_entry = first_loc_entry.copy()
 
         first_loc_entry.pop("name", None)
         first_loc_entry.pop("timestamp", None)
         first_loc_entry.pop("super_location", None)
+        first_loc_entry["code"] = key
         first_loc_entry["opening_hours"] = convert_opening_hours(first_loc_entry.get("opening_hours"))
-        first_loc_entry["free_seats_currently"] = number_of_free_seats[counting_locations]
-        first_loc_entry["predictions"] = forecasts[counting_locations].tolist()
+        first_loc_entry["free_seats_currently"] = number_of_free_seats[column]
+        first_loc_entry["predictions"] = forecasts[column].tolist()
         first_loc_entry["is_closed"] = is_closed_flag[key]
 
-        replace_place_with_dict(combined, key, first_loc_entry)
-        counting_locations += 1
+        group, position = slot
+        combined[group][position] = first_loc_entry
 
     return combined
@@ -0,0 +1,78 @@
+"""
+Opening hours as boolean masks on the ring buffer's time grid.
+
+Schedules come from `formatting.convert_opening_hours` ({weekday name: [(start, end), ...]}).
+Each distinct schedule is turned into a week-long mask once and cached; masks for any
+sequence of timestamps are then a single fancy-index into the stacked weekly masks.
+"""
+import calendar
+from functools import lru_cache
+
+import numpy as np
+
+DAY_NAMES = tuple(calendar.day_name)
+
+# 1970-01-05 was a Monday: slot 0 of the week
+_WEEK_START = np.datetime64('1970-01-05T00:00', 'm')
+
+
+def _minutes(hhmm):
+    hours, minutes = hhmm.split(":")
+    return int(hours) * 60 + int(minutes)
+
+
+def _schedule_key(schedule):
+    return tuple(tuple((start, end) for start, end in schedule.get(day, ())) for day in DAY_NAMES)
+
+
+@lru_cache(maxsize=256)
+def _weekly_mask(schedule_key, interval_minutes):
+    slots_per_day = 1440 // interval_minutes
+    slot_start = np.arange(slots_per_day) * interval_minutes
+    mask = np.zeros((7, slots_per_day), dtype=bool)
+
+    if not any(schedule_key):
+        # No opening hours published: treat as open rather than hiding the location
+        mask[:] = True
+    for day, intervals in enumerate(schedule_key):
+        for start, end in intervals:
+            start_min = _minutes(start)
+            end_min = 1440 if end == "23:59" else _minutes(end)
+            if end_min > start_min:
+                mask[day] |= (slot_start >= start_min) & (slot_start < end_min)
+            else:
+                # Runs past midnight into the next day
+                mask[day] |= slot_start >= start_min
+                mask[(day + 1) % 7] |= slot_start < end_min
+
+    mask = mask.ravel()
+    mask.flags.writeable = False
+    return mask
+
+
+def weekly_mask(schedule, interval_minutes=5):
+    """Open flags for every `interval_minutes` slot of a week, Monday 00:00 first (cached per schedule)."""
+    return _weekly_mask(_schedule_key(schedule), interval_minutes)
+
+
+@lru_cache(maxsize=32)
+def _weekly_masks(schedule_keys, interval_minutes):
+    masks = np.stack([_weekly_mask(key, interval_minutes) for key in schedule_keys])
+    masks.flags.writeable = False
+    return masks
+
+
+def weekly_masks(schedules, interval_minutes=5):
+    """Stacked weekly masks, shape (len(schedules), slots per week) (cached per set of schedules)."""
+    return _weekly_masks(tuple(_schedule_key(schedule) for schedule in schedules), interval_minutes)
+
+
+def week_slots(times, interval_minutes=5):
+    """Slot-of-week index (Monday 00:00 is 0) for an array of datetime64 local times."""
+    minutes = (np.asarray(times, dtype='datetime64[m]') - _WEEK_START).astype(np.int64)
+    return (minutes // interval_minutes) % (7 * 1440 // interval_minutes)
+
+
+def open_mask(schedules, times, interval_minutes=5):
+    """Open flags of shape (len(schedules), len(times)) for all locations at once."""
+    return weekly_masks(schedules, interval_minutes)[:, week_slots(times, interval_minutes)]
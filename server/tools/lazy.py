@@ -0,0 +1,33 @@
+import threading
+
+_MISSING = object()
+
+
+class LazyMembers:
+    """
+    Mixin for objects whose members are created on first use.
+
+    A member is created once, under a lock, even when several threads ask for it at
+    the same time, and its creation is recorded as a phase of `self.timer` (a
+    PhaseTimer). Whatever the factory returns is kept, None included. Removing a member
+    from `_members` (under `_init_lock`) makes the next access create it again.
+    """
+
+    def __init__(self):
+        self._init_lock = threading.RLock()
+        self._members = {}
+
+    def _phase(self, name):
+        """Timer phase name for creating member `name`."""
+        return name
+
+    def _lazy(self, name, factory):
+        member = self._members.get(name, _MISSING)
+        if member is _MISSING:
+            with self._init_lock:
+                member = self._members.get(name, _MISSING)
+                if member is _MISSING:
+                    with self.timer.phase(self._phase(name)):
+                        member = factory()
+                    self._members[name] = member
+        return member
@@ -1,6 +1,34 @@
+import atexit
 import logging
 import os
-from logging.handlers import RotatingFileHandler
+import queue
+import threading
+import time
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
+
+_listeners = []
+
+
+def stop_listeners():
+    """Flush and stop all background log writers (also registered with atexit)."""
+    while _listeners:
+        _, listener = _listeners.pop()
+        listener.stop()
+
+
+def _restart_listeners_in_child():
+    # Threads do not survive fork() and the inherited queue may hold the parent's
+    # pending records or a lock taken by its writer thread, so start from scratch
+    for i, (handler, listener) in enumerate(_listeners):
+        handler.queue = queue.SimpleQueue()
+        fresh = QueueListener(handler.queue, *listener.handlers,
+                              respect_handler_level=listener.respect_handler_level)
+        fresh.start()
+        _listeners[i] = (handler, fresh)
+
+
+if hasattr(os, "register_at_fork"):
+    os.register_at_fork(after_in_child=_restart_listeners_in_child)
 
 
 def setup_logger(
@@ -10,7 +38,8 @@ def setup_logger(
     max_bytes: int = 10 * 1024 * 1024,
     backup_count: int = 5,
     fmt: str = "%(asctime)s [%(levelname)s] %(name)s: %(message)s",
-    datefmt: str = "%Y-%m-%d %H:%M:%S"
+    datefmt: str = "%Y-%m-%d %H:%M:%S",
+    use_queue: bool = False
 ) -> logging.Logger:
     """
     Configures and returns a logger.
@@ -31,6 +60,9 @@ def setup_logger(
         Log message format.
     datefmt : str
         Date format in log messages.
+    use_queue : bool
+        If True, records are put on an in-memory queue and written to the
+        console and file handlers by a background QueueListener thread.
 
     Returns
     -------
@@ -47,13 +79,85 @@ def setup_logger(
     ch = logging.StreamHandler()
     ch.setLevel(level)
     ch.setFormatter(logging.Formatter(fmt, datefmt))
-    logger.addHandler(ch)
 
     os.makedirs(logger_dir, exist_ok=True)
     fh = RotatingFileHandler(os.path.join(logger_dir, "seat_tracker.log"), maxBytes=max_bytes, backupCount=backup_count)
     fh.setLevel(level)
     fh.setFormatter(logging.Formatter(fmt, datefmt))
-    logger.addHandler(fh)
+
+    if use_queue:
+        log_queue = queue.SimpleQueue()
+        # The stock prepare() merges the arguments into the message in the calling thread, so a
+        # record shows its arguments as they were when it was logged, not when it is written
+        qh = QueueHandler(log_queue)
+        logger.addHandler(qh)
+        listener = QueueListener(log_queue, ch, fh, respect_handler_level=True)
+        listener.start()
+        if not _listeners:
+            atexit.register(stop_listeners)
+        _listeners.append((qh, listener))
+    else:
+        logger.addHandler(ch)
+        logger.addHandler(fh)
 
     return logger
 
+
+def set_level(logger, level):
+    """Change the level of a logger from `setup_logger`, including its handlers and queue listener."""
+    logger.setLevel(level)
+    for handler in logger.handlers:
+        handler.setLevel(level)
+        for queue_handler, listener in _listeners:
+            if queue_handler is handler:
+                for target in listener.handlers:
+                    target.setLevel(level)
+
+
+class AccessLogSampler:
+    """
+    Thins out per-request access logging.
+
+    Every `sample_every`-th request is logged in full. If `aggregate_seconds`
+    is set, a summary line with request counts per status code is emitted
+    once per interval instead of (or in addition to) the sampled lines.
+
+    Attributes:
+        logger (logging.Logger): Logger the access lines are written to.
+        sample_every (int): Log one in N requests; 0 disables per-request lines.
+        aggregate_seconds (float): Summary interval; 0 disables the summary.
+    """
+
+    def __init__(self, logger, sample_every=1, aggregate_seconds=0):
+        self.logger = logger
+        self.sample_every = sample_every
+        self.aggregate_seconds = aggregate_seconds
+        self._lock = threading.Lock()
+        self._seen = 0
+        self._status_counts = {}
+        self._window_start = time.monotonic()
+
+    def record(self, client, line, status=None):
+        """Count one request and log it if it falls on the sampling grid."""
+        summary = None
+        with self._lock:
+            self._seen += 1
+            sampled = self.sample_every > 0 and self._seen % self.sample_every == 0
+
+            if self.aggregate_seconds > 0:
+                self._status_counts[status] = self._status_counts.get(status, 0) + 1
+                now = time.monotonic()
+                if now - self._window_start >= self.aggregate_seconds:
+                    summary = (now - self._window_start, self._status_counts)
+                    self._status_counts = {}
+                    self._window_start = now
+
+        if sampled and self.logger.isEnabledFor(logging.INFO):
+            self.logger.info("%s - %s", client, line)
+        if summary is not None:
+            elapsed, counts = summary
+            self.logger.info(
+                "access summary: %d requests in %.0fs (%s)",
+                sum(counts.values()), elapsed,
+                ", ".join(f"{code}: {n}" for code, n in sorted(counts.items(), key=lambda kv: str(kv[0])))
+            )
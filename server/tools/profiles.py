@@ -0,0 +1,277 @@
+"""
+Typical occupancy per building, weekday and time of day, maintained incrementally.
+
+Every reading updates one slot of the week (Monday 00:00 is slot 0, see tools/hours.py) per
+open building: a sample weight, the mean of free seats and a histogram of the occupied share
+of seats. Older weeks fade out geometrically, so a profile follows the semester instead of
+averaging over all time. The arrays are memmaps next to the ring buffer and independent of
+it, so profiles keep accumulating across the ring buffer's one-week wrap.
+"""
+import json
+import os
+from datetime import datetime
+
+import numpy as np
+
+from tools.hours import DAY_NAMES, week_slots
+
+QUANTILES = (0.1, 0.25, 0.5, 0.75, 0.9)
+META_FILE = 'profiles.json'
+
+
+def _layout(num_buildings, interval_minutes, bins):
+    return {"buildings": num_buildings, "interval_minutes": interval_minutes, "bins": bins}
+
+
+def has_profiles(storage_dir, num_buildings, interval_minutes=5, bins=20):
+    """Whether `storage_dir` holds profiles of this layout, i.e. a read-only OccupancyProfiles can map them."""
+    try:
+        with open(os.path.join(storage_dir, META_FILE), 'r') as f:
+            meta = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return all(meta.get(key) == value for key, value in _layout(num_buildings, interval_minutes, bins).items())
+
+
+class OccupancyProfiles:
+    """
+    Decayed per-slot statistics of the occupied share of seats.
+
+    Args:
+        storage_dir (str): Directory of the profile files (the site's ring buffer directory).
+        max_seats (list[int]): Seats per building; the occupied share is 1 - free / max_seats.
+        interval_minutes (int): Slot width.
+        bins (int): Histogram bins over [0, 1] of the occupied share.
+        window_weeks (float): Weight of a week falls by 1 / window_weeks per week, so a profile
+            effectively covers the last `window_weeks` weeks.
+        read_only (bool): Map existing files read-only (API side).
+    Attributes:
+        weight (np.memmap): Decayed number of samples, shape (buildings, slots per week).
+        mean_free (np.memmap): Decayed mean of free seats, same shape.
+        hist (np.memmap): Decayed histogram of the occupied share, shape (buildings, slots, bins).
+        last_reading (datetime): Newest reading included, None before the first update.
+    """
+
+    def __init__(self, storage_dir, max_seats, interval_minutes=5, bins=20, window_weeks=12, read_only=False):
+        self.max_seats = np.maximum(np.asarray(max_seats, dtype=np.float32), 1)
+        self.num_buildings = len(max_seats)
+        self.interval_minutes = interval_minutes
+        self.slots = 7 * 1440 // interval_minutes
+        self.bins = bins
+        self.decay = 1.0 - 1.0 / window_weeks
+        self.window_weeks = window_weeks
+        self.read_only = read_only
+        self.meta_file = os.path.join(storage_dir, META_FILE)
+        self.last_reading = None
+
+        meta = self._load_metadata()
+        layout = _layout(self.num_buildings, interval_minutes, bins)
+        fresh = any(meta.get(key) != value for key, value in layout.items())
+        if fresh and read_only:
+            raise FileNotFoundError(f"No profiles with layout {layout} in {storage_dir}")
+        if not fresh and meta.get("last_reading"):
+            self.last_reading = datetime.fromisoformat(meta["last_reading"])
+
+        if not read_only:
+            os.makedirs(storage_dir, exist_ok=True)
+        self.files = {name: os.path.join(storage_dir, f'profile_{name}.dat') for name in ('weight', 'free', 'hist')}
+        self._map('r' if read_only else ('w+' if fresh else 'r+'))
+        if fresh:
+            # A changed layout (number of locations, interval or bins) starts the profiles over
+            self._save_metadata()
+
+    def _map(self, mode):
+        shape = (self.num_buildings, self.slots)
+        self.weight = np.memmap(self.files['weight'], np.float32, mode, shape=shape)
+        self.mean_free = np.memmap(self.files['free'], np.float32, mode, shape=shape)
+        self.hist = np.memmap(self.files['hist'], np.float32, mode, shape=shape + (self.bins,))
+
+    def _load_metadata(self):
+        self._meta_mtime = os.path.getmtime(self.meta_file) if os.path.exists(self.meta_file) else None
+        if self._meta_mtime is None:
+            return {}
+        with open(self.meta_file, 'r') as f:
+            return json.load(f)
+
+    def refresh(self):
+        """Pick up `last_reading` after the collector's latest update (read-only instances)."""
+        if os.path.getmtime(self.meta_file) != self._meta_mtime:
+            last_reading = self._load_metadata().get("last_reading")
+            self.last_reading = datetime.fromisoformat(last_reading) if last_reading else None
+
+    def _save_metadata(self):
+        meta = {
+            "buildings": self.num_buildings,
+            "interval_minutes": self.interval_minutes,
+            "bins": self.bins,
+            "window_weeks": self.window_weeks,
+            "last_reading": self.last_reading.isoformat() if self.last_reading else None
+        }
+        tmp_path = f"{self.meta_file}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump(meta, f)
+        os.replace(tmp_path, self.meta_file)
+
+    def remap_buildings(self, mapping, max_seats):
+        """
+        Keep the profiles of the locations that stay when the configured locations change.
+
+        Args:
+            mapping (list[int]): Previous row of every new building, -1 for new ones
+                (see `tools.config.column_map`).
+            max_seats (list[int]): Seats per new building.
+        """
+        rows = np.asarray(mapping, dtype=np.int64)
+        kept = rows >= 0
+        arrays = {'weight': self.weight, 'free': self.mean_free, 'hist': self.hist}
+        del self.weight, self.mean_free, self.hist
+        for name, old in arrays.items():
+            remapped = np.zeros((len(rows),) + old.shape[1:], dtype=np.float32)
+            remapped[kept] = old[rows[kept]]
+            tmp_path = self.files[name] + '.tmp'
+            remapped.tofile(tmp_path)
+            os.replace(tmp_path, self.files[name])
+
+        self.num_buildings = len(rows)
+        self.max_seats = np.maximum(np.asarray(max_seats, dtype=np.float32), 1)
+        self._map('r+')
+        self._save_metadata()
+
+    def update(self, reading_time, free_seats, is_open):
+        """
+        Add one reading of every building to its slot of the week.
+
+        Closed buildings are skipped (they report 0 free seats), as is a reading that is
+        not newer than the last one included.
+
+        Args:
+            reading_time (datetime): Local reading time.
+            free_seats (list[int]): Free seats per building.
+            is_open (list[bool]): Whether each building is open.
+        Returns:
+            bool: Whether the reading was included.
+        """
+        if self.last_reading is not None and reading_time <= self.last_reading:
+            return False
+
+        slot = int(week_slots(np.datetime64(reading_time, 'm'), self.interval_minutes))
+        buildings = np.flatnonzero(np.asarray(is_open, dtype=bool))
+        free = np.asarray(free_seats, dtype=np.float32)[buildings]
+        occupied = np.clip(1.0 - free / self.max_seats[buildings], 0.0, 1.0)
+        bins = np.minimum((occupied * self.bins).astype(np.int64), self.bins - 1)
+
+        weight = self.weight[buildings, slot] * self.decay + 1.0
+        self.weight[buildings, slot] = weight
+        self.mean_free[buildings, slot] += (free - self.mean_free[buildings, slot]) / weight
+        self.hist[buildings, slot] *= self.decay
+        self.hist[buildings, slot, bins] += 1.0
+
+        self.last_reading = reading_time
+        self.weight.flush()
+        self.mean_free.flush()
+        self.hist.flush()
+        self._save_metadata()
+        return True
+
+    def profile(self, building, weekday=None, resolution_minutes=60, quantiles=QUANTILES):
+        """
+        Profile of one building, aggregated to `resolution_minutes`.
+
+        Args:
+            building (int): Building index.
+            weekday (int): 0 (Monday) to 6, or None for the whole week.
+            resolution_minutes (int): Multiple of the slot width that divides a day.
+            quantiles (tuple[float]): Quantiles of the occupied share to report.
+        Returns:
+            dict: {"slot_start": minutes since Monday 00:00 per row, "samples", "mean_free",
+            "quantiles": array of shape (rows, len(quantiles))}; rows without samples are NaN.
+        Raises:
+            ValueError: For an unsupported resolution or weekday.
+        """
+        step, remainder = divmod(resolution_minutes, self.interval_minutes)
+        if remainder or step < 1 or 1440 % resolution_minutes:
+            raise ValueError(f"resolution must be a multiple of {self.interval_minutes} minutes that divides a day")
+        if weekday is not None and not 0 <= weekday < 7:
+            raise ValueError("weekday must be between 0 (Monday) and 6")
+
+        per_day = 1440 // self.interval_minutes
+        first, last = (0, self.slots) if weekday is None else (weekday * per_day, (weekday + 1) * per_day)
+        weight = np.asarray(self.weight[building, first:last], dtype=np.float64).reshape(-1, step)
+        mean_free = np.asarray(self.mean_free[building, first:last], dtype=np.float64).reshape(-1, step)
+        hist = np.asarray(self.hist[building, first:last], dtype=np.float64).reshape(-1, step, self.bins).sum(axis=1)
+
+        samples = weight.sum(axis=1)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            free = (weight * mean_free).sum(axis=1) / samples
+            cumulative = np.cumsum(hist, axis=1)
+            total = cumulative[:, -1:]
+            values = np.empty((len(hist), len(quantiles)))
+            for j, q in enumerate(quantiles):
+                target = q * total
+                index = np.minimum((cumulative < target).sum(axis=1), self.bins - 1)
+                below = np.where(index > 0, cumulative[np.arange(len(hist)), index - 1], 0.0)
+                inside = (target[:, 0] - below) / hist[np.arange(len(hist)), index]
+                values[:, j] = (index + np.clip(np.nan_to_num(inside), 0.0, 1.0)) / self.bins
+        empty = samples <= 0
+        free[empty] = np.nan
+        values[empty] = np.nan
+
+        return {
+            "slot_start": first * self.interval_minutes + np.arange(len(samples)) * resolution_minutes,
+            "samples": samples,
+            "mean_free": free,
+            "quantiles": values
+        }
+
+
+def parse_weekday(value):
+    """Weekday index from a name ("tuesday", "Tue") or a number 0 (Monday) to 6; None stays None."""
+    if value is None:
+        return None
+    if value.isdigit():
+        return int(value)
+    for index, name in enumerate(DAY_NAMES):
+        if name.lower().startswith(value.lower()) and len(value) >= 2:
+            return index
+    raise ValueError(f"Unknown weekday {value!r}")
+
+
+def parse_minutes(value):
+    """Minutes after midnight of "HH:MM"; None stays None."""
+    if value is None:
+        return None
+    hours, _, minutes = value.partition(":")
+    result = int(hours) * 60 + int(minutes or 0)
+    if not 0 <= result < 1440:
+        raise ValueError(f"Time {value!r} is outside of a day")
+    return result
+
+
+def profile_document(profiles, code, building, max_seats, weekday=None, resolution_minutes=60, at=None,
+                     quantiles=QUANTILES):
+    """JSON-ready profile of one location, grouped by weekday name; `at` (minutes after midnight) keeps one row per day."""
+    result = profiles.profile(building, weekday, resolution_minutes, quantiles)
+    days = {}
+    for i, start in enumerate(result["slot_start"].tolist()):
+        day, minute = divmod(int(start), 1440)
+        if at is not None and not minute <= at < minute + resolution_minutes:
+            continue
+        samples = float(result["samples"][i])
+        entry = {"time": f"{minute // 60:02d}:{minute % 60:02d}", "samples": round(samples, 2)}
+        if samples > 0:
+            free = float(result["mean_free"][i])
+            entry["mean_free_seats"] = round(free, 1)
+            entry["mean_occupancy"] = round(min(1.0, max(0.0, 1.0 - free / max_seats)), 3) if max_seats else None
+            entry["occupancy_quantiles"] = {
+                f"p{round(q * 100)}": round(float(value), 3) for q, value in zip(quantiles, result["quantiles"][i])
+            }
+        days.setdefault(DAY_NAMES[day], []).append(entry)
+
+    return {
+        "code": code,
+        "max_seats": max_seats,
+        "resolution_minutes": resolution_minutes,
+        "window_weeks": profiles.window_weeks,
+        "last_reading": profiles.last_reading.isoformat() if profiles.last_reading else None,
+        "profile": days
+    }
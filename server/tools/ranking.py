@@ -0,0 +1,109 @@
+import json
+import threading
+
+METRICS = ("free", "ratio")
+OPEN_FILTERS = (None, True, False)
+
+
+class RankingIndex:
+    """
+    Top-k availability index over the published libraries snapshot.
+
+    For every metric (absolute free seats or free ratio against max seats), horizon
+    (0 is the current reading, 1..n the snapshot's prediction steps), group and open
+    filter, the locations are sorted once when a new snapshot version is seen. Every
+    location's result entry is encoded once per horizon. A query is then a dict lookup
+    plus joining the first k entries.
+
+    Attributes:
+        reader (SnapshotReader): Reader of the libraries snapshot.
+        grouping (dict[str, list[str]]): Group name -> location codes (config `grouping`).
+        max_seats (dict[str, int]): Seats per location code (config `max_seats_list`).
+    """
+
+    def __init__(self, reader, grouping, max_seats):
+        self.reader = reader
+        self.grouping = grouping
+        self.max_seats = max_seats
+        self._lock = threading.Lock()
+        self._version = None
+        self._orders = {}
+        self._encoded = []
+        self.horizons = 0
+
+    def _rebuild(self, payload):
+        document = json.loads(payload)
+        rows = []
+        for group, entries in document.items():
+            for entry in entries:
+                if not isinstance(entry, dict):
+                    # Location missing from the payload: only its code is published
+                    continue
+                code = entry["code"]
+                free = [entry.get("free_seats_currently") or 0] + list(entry.get("predictions") or [])
+                free = [int(round(value)) for value in free]
+                seats = self.max_seats.get(code) or entry.get("available_seats") or 0
+                rows.append((code, group, entry, free, seats))
+
+        horizons = min(len(row[3]) for row in rows) if rows else 0
+        encoded = []
+        for code, group, entry, free, seats in rows:
+            encoded.append([
+                json.dumps({
+                    "code": code,
+                    "name": entry.get("long_name"),
+                    "group": group,
+                    "free_seats": free[h],
+                    "max_seats": seats,
+                    "free_ratio": round(free[h] / seats, 3) if seats else 0.0,
+                    "is_closed": entry.get("is_closed", False)
+                }, ensure_ascii=False).encode('utf-8')
+                for h in range(horizons)
+            ])
+
+        orders = {}
+        for h in range(horizons):
+            keys = {
+                "free": [row[3][h] for row in rows],
+                "ratio": [row[3][h] / row[4] if row[4] else 0.0 for row in rows]
+            }
+            for metric in METRICS:
+                ranked = sorted(range(len(rows)), key=lambda i: keys[metric][i], reverse=True)
+                for group in [None] + list(self.grouping):
+                    for open_filter in OPEN_FILTERS:
+                        orders[(metric, h, group, open_filter)] = [
+                            i for i in ranked
+                            if (group is None or rows[i][1] == group)
+                            and (open_filter is None or rows[i][2].get("is_closed", False) != open_filter)
+                        ]
+
+        self._orders = orders
+        self._encoded = encoded
+        self.horizons = horizons
+
+    def query(self, by="free", horizon=0, k=5, group=None, open_filter=None):
+        """
+        (Snapshot, list of encoded entries) for the top `k` locations, best first.
+
+        Returns None while no snapshot has been published.
+
+        Raises:
+            ValueError: For an unknown metric or group, or a horizon the snapshot does not cover.
+        """
+        if by not in METRICS:
+            raise ValueError(f"by must be one of {', '.join(METRICS)}")
+        if group is not None and group not in self.grouping:
+            raise ValueError(f"Unknown group {group!r}")
+
+        snapshot = self.reader.read()
+        if snapshot is None:
+            return None
+
+        with self._lock:
+            if self._version != snapshot.version:
+                self._rebuild(snapshot.payload)
+                self._version = snapshot.version
+            if not 0 <= horizon < self.horizons:
+                raise ValueError(f"horizon must be between 0 and {self.horizons - 1}")
+            order = self._orders[(by, horizon, group, open_filter)]
+            return snapshot, [self._encoded[i][horizon] for i in order[:max(0, k)]]
@@ -0,0 +1,157 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+
+
+class TokenBucketLimiter:
+    """
+    Per-client token buckets with bounded memory.
+
+    Each client may make `burst` requests at once and `rate` requests per second on
+    average. Buckets live in an LRU-ordered dict; once `max_clients` are tracked, the
+    least recently seen client is forgotten (it starts again with a full bucket).
+
+    Attributes:
+        rate (float): Tokens added per second.
+        burst (float): Bucket size.
+        max_clients (int): Number of buckets kept.
+    """
+
+    def __init__(self, rate=5.0, burst=20.0, max_clients=10000, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_clients = max_clients
+        self.clock = clock
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()
+
+    def acquire(self, client):
+        """
+        Take one token for `client`.
+
+        Returns:
+            float: 0.0 if the request is allowed, else the seconds until a token is available.
+        """
+        now = self.clock()
+        with self._lock:
+            bucket = self._buckets.get(client)
+            if bucket is None:
+                bucket = self._buckets[client] = [self.burst, now]
+                if len(self._buckets) > self.max_clients:
+                    self._buckets.popitem(last=False)
+            else:
+                self._buckets.move_to_end(client)
+                bucket[0] = min(self.burst, bucket[0] + (now - bucket[1]) * self.rate)
+                bucket[1] = now
+
+            if bucket[0] >= 1.0:
+                bucket[0] -= 1.0
+                return 0.0
+            return (1.0 - bucket[0]) / self.rate
+
+    def __len__(self):
+        return len(self._buckets)
+
+
+class ConcurrencyLimiter:
+    """
+    Caps the requests processed at once and the number waiting for a slot.
+
+    A request beyond `max_active` waits up to `queue_timeout` seconds for a slot,
+    unless `max_queued` requests are already waiting; then it is rejected at once.
+
+    Attributes:
+        max_active (int): Requests processed concurrently.
+        max_queued (int): Requests allowed to wait for a slot.
+        queue_timeout (float): Longest wait for a slot in seconds.
+    """
+
+    def __init__(self, max_active=16, max_queued=64, queue_timeout=2.0):
+        self.max_active = max_active
+        self.max_queued = max_queued
+        self.queue_timeout = queue_timeout
+        self._condition = threading.Condition()
+        self.active = 0
+        self.queued = 0
+
+    def acquire(self):
+        """Take a slot; returns False if the request should be shed."""
+        with self._condition:
+            if self.active < self.max_active:
+                self.active += 1
+                return True
+            if self.queued >= self.max_queued:
+                return False
+
+            self.queued += 1
+            try:
+                deadline = time.monotonic() + self.queue_timeout
+                while self.active >= self.max_active:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        return False
+                    self._condition.wait(remaining)
+                self.active += 1
+                return True
+            finally:
+                self.queued -= 1
+
+    def release(self):
+        with self._condition:
+            self.active -= 1
+            self._condition.notify()
+
+
+class RequestLimits:
+    """
+    Admission control for the API: per-client rate limit, then the concurrency limit.
+
+    Attributes:
+        clients (TokenBucketLimiter): Per-client buckets, or None when rate limiting is disabled.
+        concurrency (ConcurrencyLimiter): Global slots.
+        counters (dict[str, int]): Admitted and rejected requests since start.
+    """
+
+    def __init__(self, clients, concurrency):
+        self.clients = clients
+        self.concurrency = concurrency
+        self._lock = threading.Lock()
+        self.counters = {"admitted": 0, "rate_limited": 0, "overloaded": 0, "connections_shed": 0}
+
+    def count(self, name):
+        with self._lock:
+            self.counters[name] += 1
+
+    def admit(self, client, concurrent=True):
+        """
+        Admit one request of `client`; `concurrent=False` skips the concurrency limit
+        (for long-running requests that are limited elsewhere).
+
+        Returns:
+            tuple[int, int]: (0, 0) if admitted (call `release()` afterwards if `concurrent`),
+            else (HTTP status, Retry-After seconds) to reject with.
+        """
+        if self.clients is not None:
+            wait = self.clients.acquire(client)
+            if wait > 0:
+                self.count("rate_limited")
+                return 429, max(1, math.ceil(wait))
+        if concurrent and not self.concurrency.acquire():
+            self.count("overloaded")
+            return 503, max(1, math.ceil(self.concurrency.queue_timeout))
+        self.count("admitted")
+        return 0, 0
+
+    def release(self):
+        self.concurrency.release()
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self.counters)
+        stats.update({
+            "active": self.concurrency.active,
+            "queued": self.concurrency.queued,
+            "tracked_clients": len(self.clients) if self.clients is not None else 0
+        })
+        return stats
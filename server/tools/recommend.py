@@ -0,0 +1,102 @@
+"""
+"Best time to go" recommendations, computed once per published snapshot.
+
+Combines the current reading, a long forecast and the opening hours of every
+location, plus the configured groups, into one (entity, step) matrix and finds
+for every seat threshold the next windows in which enough seats are predicted
+to be free while the location is open.
+"""
+from datetime import timedelta
+
+import numpy as np
+
+from tools.hours import open_mask
+
+
+def _windows(ok):
+    """
+    Runs of True along the last axis of `ok` (entities, thresholds, steps).
+
+    Returns:
+        tuple: (entity, threshold, start, end) index arrays with `end` exclusive,
+        ordered by entity, threshold and start.
+    """
+    padded = np.zeros(ok.shape[:-1] + (ok.shape[-1] + 2,), dtype=np.int8)
+    padded[..., 1:-1] = ok
+    edges = np.diff(padded, axis=-1)
+    entity, threshold, start = np.nonzero(edges == 1)
+    end = np.nonzero(edges == -1)[2]
+    return entity, threshold, start, end
+
+
+def recommendations(codes, max_seats, free_now, closed_now, forecasts, schedules, reading_time, groups,
+                    thresholds=(1, 5, 10, 25), interval_minutes=5, max_windows=3):
+    """
+    Next windows with at least `threshold` free seats for every location and group.
+
+    Args:
+        codes (list[str]): Location codes in column order.
+        max_seats (sequence): Seats per location.
+        free_now (sequence): Current free seats per location.
+        closed_now (sequence[bool]): Whether a location currently reports no data.
+        forecasts (ndarray): Forecast free seats of shape (locations, steps), step 1 first.
+        schedules (list[dict]): `convert_opening_hours` schedule per location.
+        reading_time (datetime): Time of the current reading (step 0).
+        groups (dict[str, list[str]]): Group name -> member codes (config `grouping`).
+        thresholds (sequence[int]): Free-seat thresholds to find windows for.
+        max_windows (int): Windows reported per threshold.
+    Returns:
+        dict: Entity name -> recommendation entry, for locations and groups.
+    """
+    steps = forecasts.shape[1] + 1
+    times = np.datetime64(reading_time, 'm') + np.arange(steps) * np.timedelta64(interval_minutes, 'm')
+
+    is_open = open_mask(schedules, times, interval_minutes)
+    is_open[:, 0] &= ~np.asarray(closed_now, dtype=bool)
+    free = np.column_stack([np.asarray(free_now, dtype=np.float64), forecasts])
+    free = np.where(is_open, free, 0)
+
+    # Groups are sums over their members, added as extra rows
+    group_names = list(groups)
+    membership = np.array([[code in groups[name] for code in codes] for name in group_names],
+                          dtype=np.float64).reshape(len(group_names), len(codes))
+    names = list(codes) + group_names
+    kinds = ["library"] * len(codes) + ["group"] * len(group_names)
+    seats = np.concatenate([np.asarray(max_seats, dtype=np.float64), membership @ np.asarray(max_seats)])
+    free = np.vstack([free, membership @ free])
+    is_open = np.vstack([is_open, (membership @ is_open) > 0])
+
+    thresholds = np.asarray(thresholds)
+    ok = (free[:, None, :] >= thresholds[None, :, None]) & is_open[:, None, :]
+    entity, threshold, start, end = _windows(ok)
+
+    best_step = np.argmax(np.where(is_open, free, -1), axis=1)
+    best_free = free[np.arange(len(names)), best_step]
+
+    def at(step):
+        return reading_time + timedelta(minutes=int(step) * interval_minutes)
+
+    result = {}
+    for i, name in enumerate(names):
+        result[name] = {
+            "kind": kinds[i],
+            "max_seats": int(seats[i]),
+            "open_now": bool(is_open[i, 0]),
+            "free_seats_now": int(free[i, 0]),
+            "best": {
+                "time": at(best_step[i]).isoformat(),
+                "free_seats": int(best_free[i])
+            } if is_open[i].any() else None,
+            "windows": {str(t): [] for t in thresholds.tolist()}
+        }
+
+    for e, k, s, t in zip(entity.tolist(), threshold.tolist(), start.tolist(), end.tolist()):
+        windows = result[names[e]]["windows"][str(thresholds[k])]
+        if len(windows) < max_windows:
+            windows.append({
+                "start": at(s).isoformat(),
+                # None: still going at the end of the forecast horizon
+                "end": at(t).isoformat() if t < steps else None,
+                "starts_in_minutes": s * interval_minutes
+            })
+    return result
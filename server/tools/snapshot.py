@@ -0,0 +1,220 @@
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+
+# magic, sequence, payload length, entry count, publish time (epoch seconds)
+_HEADER = struct.Struct('<4sQQId')
+_MAGIC = b'PPSN'
+_MIN_SIZE = 64 * 1024
+
+
+class SnapshotWriter:
+    """
+    Publishes snapshot bytes into a memory-mapped file that any number of
+    reader processes can map concurrently.
+
+    The header carries a sequence counter used as a seqlock: it is odd while
+    a write is in progress and even once the payload is complete, so readers
+    never act on a torn payload. The published version is sequence // 2.
+
+    Attributes:
+        path (str): Path of the snapshot file.
+        version (int): Version of the most recently published snapshot.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+        size = os.fstat(self._fd).st_size
+        if size < _HEADER.size:
+            size = _MIN_SIZE
+            os.ftruncate(self._fd, size)
+        self._map = mmap.mmap(self._fd, size)
+
+        magic, seq, _, _, _ = _HEADER.unpack_from(self._map, 0)
+        if magic != _MAGIC:
+            seq = 0
+            _HEADER.pack_into(self._map, 0, _MAGIC, 0, 0, 0, 0.0)
+        elif seq & 1:
+            # A write was interrupted by a crash; drop the torn payload
+            seq += 1
+            _HEADER.pack_into(self._map, 0, _MAGIC, seq, 0, 0, 0.0)
+        self._seq = seq
+
+    @property
+    def version(self):
+        return self._seq // 2
+
+    def _ensure_size(self, needed):
+        size = len(self._map)
+        if needed <= size:
+            return
+        while size < needed:
+            size *= 2
+        os.ftruncate(self._fd, size)
+        self._map.resize(size)
+
+    def publish(self, payload: bytes, entries: int = 0):
+        """
+        Write `payload` as the new snapshot and bump the version.
+
+        Args:
+            payload (bytes): Serialized snapshot (e.g. compact JSON).
+            entries (int): Number of top-level entries, stored for cheap metadata.
+        Returns:
+            int: The newly published version.
+        """
+        self._ensure_size(_HEADER.size + len(payload))
+        _, _, length, count, published = _HEADER.unpack_from(self._map, 0)
+
+        self._seq += 1
+        _HEADER.pack_into(self._map, 0, _MAGIC, self._seq, length, count, published)
+        self._map[_HEADER.size:_HEADER.size + len(payload)] = payload
+        self._seq += 1
+        _HEADER.pack_into(self._map, 0, _MAGIC, self._seq, len(payload), entries, time.time())
+        self._map.flush()
+        return self.version
+
+    def close(self):
+        self._map.close()
+        os.close(self._fd)
+
+
+class Snapshot:
+    """A published snapshot as seen by a reader."""
+
+    __slots__ = ('version', 'published_at', 'entries', 'payload')
+
+    def __init__(self, version, published_at, entries, payload):
+        self.version = version
+        self.published_at = published_at
+        self.entries = entries
+        self.payload = payload
+
+
+class SnapshotReader:
+    """
+    Read side of SnapshotWriter.
+
+    Only the fixed-size header is read on every call; the payload is copied
+    out of the shared mapping once per new version and reused until the
+    writer publishes again. Safe to share between the threads of a process.
+    """
+
+    def __init__(self, path: str, retries: int = 100):
+        self.path = path
+        self.retries = retries
+        self._fd = None
+        self._map = None
+        self._current = None
+        self._lock = threading.Lock()
+
+    def _open(self):
+        if self._map is not None:
+            return True
+        try:
+            self._fd = os.open(self.path, os.O_RDONLY)
+        except FileNotFoundError:
+            return False
+        size = os.fstat(self._fd).st_size
+        if size < _HEADER.size:
+            os.close(self._fd)
+            self._fd = None
+            return False
+        self._map = mmap.mmap(self._fd, size, access=mmap.ACCESS_READ)
+        return True
+
+    def _remap(self):
+        self._map.close()
+        self._map = mmap.mmap(self._fd, os.fstat(self._fd).st_size, access=mmap.ACCESS_READ)
+
+    def read(self):
+        """
+        Return the latest complete Snapshot, or None if nothing was published yet.
+
+        Raises:
+            RuntimeError: If no consistent snapshot could be read within `retries` attempts.
+        """
+        # Remapping replaces the mapping other threads would be reading from
+        with self._lock:
+            return self._read()
+
+    def _read(self):
+        if not self._open():
+            return None
+
+        for _ in range(self.retries):
+            magic, seq, length, entries, published = _HEADER.unpack_from(self._map, 0)
+            if magic != _MAGIC or seq == 0 or (length == 0 and not seq & 1):
+                return None
+            if seq & 1:
+                time.sleep(0.001)
+                continue
+
+            version = seq // 2
+            if self._current is not None and self._current.version == version:
+                return self._current
+
+            if _HEADER.size + length > len(self._map):
+                self._remap()
+                continue
+
+            payload = self._map[_HEADER.size:_HEADER.size + length]
+            if _HEADER.unpack_from(self._map, 0)[1] != seq:
+                continue
+
+            self._current = Snapshot(version, published, entries, payload)
+            return self._current
+
+        raise RuntimeError(f"Could not read a consistent snapshot from {self.path}")
+
+    def close(self):
+        with self._lock:
+            if self._map is not None:
+                self._map.close()
+                os.close(self._fd)
+                self._map = None
+                self._fd = None
+
+
+class EntryIndex:
+    """
+    Per-entry view of a JSON snapshot shaped like {"entries": {name: entry}, ...common fields}.
+
+    The payload is parsed and every entry (merged with the common fields) encoded once per
+    published version, so a lookup is a dict access returning ready-to-send bytes.
+    """
+
+    def __init__(self, reader):
+        self.reader = reader
+        self._lock = threading.Lock()
+        self._version = None
+        self._entries = {}
+
+    def lookup(self, name=None):
+        """
+        (Snapshot, body bytes) for entry `name`, or for the whole payload when `name` is None.
+
+        Returns None if nothing was published yet, and (snapshot, None) for an unknown name.
+        """
+        snapshot = self.reader.read()
+        if snapshot is None:
+            return None
+        if name is None:
+            return snapshot, snapshot.payload
+
+        with self._lock:
+            if self._version != snapshot.version:
+                document = json.loads(snapshot.payload)
+                common = {key: value for key, value in document.items() if key != "entries"}
+                self._entries = {
+                    key: json.dumps(dict(common, name=key, **entry), ensure_ascii=False,
+                                    separators=(',', ':')).encode('utf-8')
+                    for key, entry in document.get("entries", {}).items()
+                }
+                self._version = snapshot.version
+            return snapshot, self._entries.get(name)
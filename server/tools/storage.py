@@ -4,6 +4,8 @@ import numpy as np
 from datetime import datetime, timedelta
 from math import floor
 
+from tools.tracing import span
+
 class RingBufferStore:
     """
     A ring buffer ring_buffer using NumPy memmap for fixed-size storage of time series data,
@@ -12,10 +14,12 @@ class RingBufferStore:
     Attributes:
         capacity (int): Number of time slots (e.g., 2016 for one-week at 5-min intervals).
         num_buildings (int): Number of building columns (22).
-        counts_file (str): Path to memmap file for counts (uint8).
-        pointer_file (str): Path to file storing the current write pointer and start time.
+        counts_file (str): Path to memmap file for counts (uint16; older uint8 files are migrated).
+        slot_times_file (str): Path to memmap file with the reading time of every slot (epoch ms, 0 = never written).
+        pointer_file (str): Path to file storing the current write pointer, start time and last reading.
         start_time (datetime): UTC datetime marking buffer index 0.
         interval (timedelta): Fixed sampling interval between entries.
+        archive (OccupancyArchive): Append-only copy of every record, or None.
     """
     def __init__(
         self,
@@ -23,21 +27,40 @@ class RingBufferStore:
         capacity: int = 2016,
         num_buildings: int = 22,
         interval_minutes: int = 5,
-        dtype_counts: np.dtype = np.uint8,
+        dtype_counts: np.dtype = np.uint16,
+        archive_dir: str = None,
+        read_only: bool = False,
     ):
-        os.makedirs(storage_dir, exist_ok=True)
+        if not read_only:
+            os.makedirs(storage_dir, exist_ok=True)
         self.capacity = capacity
         self.num_buildings = num_buildings
         self.interval = timedelta(minutes=interval_minutes)
+        self.read_only = read_only
         self.counts_file = os.path.join(storage_dir, 'counts.dat')
+        self.slot_times_file = os.path.join(storage_dir, 'slot_times.dat')
         self.pointer_file = os.path.join(storage_dir, 'pointer.json')
 
         # Initialize memmap for counts and pointer/start metadata
         self._init_memmap(dtype_counts)
         self._load_metadata()
+        self.archive = OccupancyArchive(archive_dir, num_buildings, dtype_counts, read_only) if archive_dir else None
 
     def _init_memmap(self, dtype_counts):
+        if self.read_only:
+            expected = self.capacity * self.num_buildings * np.dtype(dtype_counts).itemsize
+            if os.path.exists(self.counts_file) and os.path.getsize(self.counts_file) != expected:
+                # The collector has not yet followed a change of the configured locations
+                raise ValueError(f"{self.counts_file} does not hold {self.num_buildings} locations")
+            self.counts = np.memmap(self.counts_file, dtype=dtype_counts, mode='r',
+                                    shape=(self.capacity, self.num_buildings))
+            self.slot_times = np.memmap(self.slot_times_file, dtype=np.int64, mode='r', shape=(self.capacity,)) \
+                if os.path.exists(self.slot_times_file) else np.zeros(self.capacity, dtype=np.int64)
+            self._backfill_slot_times = False
+            return
+
         # counts memmap
+        self._migrate_counts(dtype_counts)
         if not os.path.exists(self.counts_file):
             arr = np.memmap(
                 self.counts_file,
@@ -54,24 +77,85 @@ class RingBufferStore:
             shape=(self.capacity, self.num_buildings)
         )
 
+        # reading time per slot, so exports get exact timestamps and can skip stale slots
+        self._backfill_slot_times = not os.path.exists(self.slot_times_file) and os.path.exists(self.pointer_file)
+        if not os.path.exists(self.slot_times_file):
+            arr = np.memmap(self.slot_times_file, dtype=np.int64, mode='w+', shape=(self.capacity,))
+            arr[:] = 0
+            arr.flush()
+        self.slot_times = np.memmap(self.slot_times_file, dtype=np.int64, mode='r+', shape=(self.capacity,))
+
+    def _migrate_counts(self, dtype_counts):
+        """Widen a counts file written with a smaller dtype (uint8 cannot hold the 270-seat locations)."""
+        if not os.path.exists(self.counts_file):
+            return
+        cells = self.capacity * self.num_buildings
+        size = os.path.getsize(self.counts_file)
+        itemsize = np.dtype(dtype_counts).itemsize
+        if size == cells * itemsize or size % cells or size // cells > itemsize:
+            return
+
+        old = np.fromfile(self.counts_file, dtype=np.dtype(f'u{size // cells}'))
+        tmp_file = self.counts_file + '.tmp'
+        old.astype(dtype_counts).tofile(tmp_file)
+        os.replace(tmp_file, self.counts_file)
+
     def _load_metadata(self):
         if os.path.exists(self.pointer_file):
             with open(self.pointer_file, 'r') as f:
                 data = json.load(f)
                 self.pointer = data.get('pointer', 0)
                 self.start_time = datetime.fromisoformat(data['start_time'])
+                last_reading = data.get('last_reading')
+                self.last_reading = datetime.fromisoformat(last_reading) if last_reading else None
+            if self._backfill_slot_times:
+                self._backfill()
+        elif self.read_only:
+            raise FileNotFoundError(f"No ring buffer metadata at {self.pointer_file}")
         else:
             # initialize pointer and start_time at first run
             self.pointer = 0
             self.start_time = datetime.now()
+            self.last_reading = None
             self._save_metadata()
 
+    def _backfill(self):
+        """Reconstruct slot times for buffers written before they were recorded."""
+        # The newest slot is the pointer; anchor it at the last write of the metadata file
+        anchor = self.last_reading or datetime.fromtimestamp(os.path.getmtime(self.pointer_file))
+        steps = floor((anchor - self.start_time) / self.interval)
+        steps -= (steps - self.pointer) % self.capacity
+        newest = np.datetime64(self.start_time + steps * self.interval, 'ms')
+
+        age = (self.pointer - np.arange(self.capacity)) % self.capacity
+        times = newest - age * np.timedelta64(self.interval, 'ms')
+        # Slots before start_time were never written
+        written = times >= np.datetime64(self.start_time, 'ms')
+        self.slot_times[:] = np.where(written, times.astype(np.int64), 0)
+        self.slot_times.flush()
+
     def _save_metadata(self):
-        with open(self.pointer_file, 'w') as f:
+        # Written atomically: the API reads it from other processes while exporting
+        tmp_file = self.pointer_file + '.tmp'
+        with open(tmp_file, 'w') as f:
             json.dump({
                 'pointer': self.pointer,
-                'start_time': self.start_time.isoformat()
+                'start_time': self.start_time.isoformat(),
+                'last_reading': self.last_reading.isoformat() if self.last_reading else None
             }, f)
+        os.replace(tmp_file, self.pointer_file)
+
+    def _slot_times(self, first_slot: int, n: int):
+        """
+        Timestamps of `n` consecutive slots starting at `first_slot`, computed in one vectorized step
+        on the interval grid that ends at the newest reading.
+        """
+        slots = (np.arange(first_slot, first_slot + n) % self.capacity)
+        newest = int(self.slot_times[self.pointer])
+        if newest == 0:
+            return np.datetime64(self.start_time, 'ms') + slots * np.timedelta64(self.interval, 'ms')
+        age = (self.pointer - slots) % self.capacity
+        return np.datetime64(newest, 'ms') - age * np.timedelta64(self.interval, 'ms')
 
     def append(self, counts: list, reading_time):
         """
@@ -79,11 +163,47 @@ class RingBufferStore:
         Args:
             counts (list[int]): List of length num_buildings with seat counts.
         """
-        self.pointer = (floor((datetime.strptime(reading_time,"%Y-%m-%d %H:%M:%S.%f")-self.start_time).total_seconds()/300)) % self.capacity
-        self.counts[self.pointer, :] = counts
-        self._save_metadata()
-        # flush changes
-        self.counts.flush()
+        reading = datetime.strptime(reading_time, "%Y-%m-%d %H:%M:%S.%f")
+        elapsed = (reading - self.start_time).total_seconds()
+        self.pointer = floor(elapsed / self.interval.total_seconds()) % self.capacity
+        # Clip into the storable range instead of failing the whole cycle on an out-of-range reading
+        limit = np.iinfo(self.counts.dtype).max
+        row = np.clip(np.asarray(counts, dtype=np.int64), 0, limit).astype(self.counts.dtype)
+        timestamp = int(np.datetime64(reading, 'ms').astype(np.int64))
+        self.counts[self.pointer, :] = row
+        self.slot_times[self.pointer] = timestamp
+        self.last_reading = reading
+        with span("store.flush"):
+            self._save_metadata()
+            # flush changes
+            self.counts.flush()
+            self.slot_times.flush()
+        if self.archive is not None:
+            with span("store.archive"):
+                self.archive.append(timestamp, row)
+
+    def remap_columns(self, mapping):
+        """
+        Rewrite the buffer (and archive) for a new set of locations.
+
+        Args:
+            mapping (list[int]): Previous column of every new column, -1 for new locations
+                (see `tools.config.column_map`); their history starts out as zeros.
+        """
+        columns = np.asarray(mapping, dtype=np.int64)
+        counts = np.zeros((self.capacity, len(columns)), dtype=self.counts.dtype)
+        kept = columns >= 0
+        counts[:, kept] = self.counts[:, columns[kept]]
+
+        tmp_file = self.counts_file + '.tmp'
+        counts.tofile(tmp_file)
+        del self.counts
+        os.replace(tmp_file, self.counts_file)
+        self.num_buildings = len(columns)
+        self.counts = np.memmap(self.counts_file, dtype=counts.dtype, mode='r+',
+                                shape=(self.capacity, self.num_buildings))
+        if self.archive is not None:
+            self.archive.remap_columns(columns)
 
     def get_all(self):
         """
@@ -92,14 +212,12 @@ class RingBufferStore:
             timestamps: np.ndarray of dtype datetime64[ms] shape (capacity,)
             counts: np.ndarray of shape (capacity, num_buildings)
         """
-        # reorder counts
-        idx = (np.arange(self.pointer, self.pointer + self.capacity) % self.capacity)
+        # reorder counts: the pointer marks the newest slot, so the oldest one follows it
+        first = (self.pointer + 1) % self.capacity
+        idx = (np.arange(first, first + self.capacity) % self.capacity)
         cnts = self.counts[idx]
         # infer timestamps
-        times = np.array([
-            np.datetime64(self.start_time + i * self.interval, 'ms')
-            for i in range(self.capacity)
-        ])
+        times = self._slot_times(first, self.capacity)
         return times, cnts
 
     def get_recent(self, n: int):
@@ -111,8 +229,8 @@ class RingBufferStore:
         """
         if n > self.capacity:
             raise ValueError("n exceeds buffer capacity")
-        idx_end = (self.pointer - 1) % self.capacity
-        idx_start = (self.pointer - n) % self.capacity
+        idx_end = self.pointer
+        idx_start = (self.pointer - n + 1) % self.capacity
         if idx_start <= idx_end:
             cnts = self.counts[idx_start:idx_end+1]
         else:
@@ -121,11 +239,163 @@ class RingBufferStore:
                 self.counts[:idx_end+1]
             ))
         # infer timestamps for these indices
-        times = np.array([
-            np.datetime64(
-                self.start_time + ((i % self.capacity) * self.interval),
-                'ms'
-            )
-            for i in range(idx_start, idx_start + n)
-        ])
+        times = self._slot_times(idx_start, n)
         return times, cnts
+
+    def get_written(self):
+        """
+        Copy of the slots written within the current buffer window, oldest first.
+        Unlike get_all, slots that were skipped (failed fetches) or never written are left out.
+        Returns:
+            timestamps: np.ndarray of epoch milliseconds (int64), the actual reading times
+            counts: np.ndarray of shape (n, num_buildings)
+        """
+        first = (self.pointer + 1) % self.capacity
+        idx = (np.arange(first, first + self.capacity) % self.capacity)
+        times = np.array(self.slot_times[idx])
+        newest = times[-1]
+        window = self.capacity * int(self.interval.total_seconds() * 1000)
+        written = (times != 0) & (times > newest - window)
+        return times[written], np.array(self.counts[idx[written]])
+
+    def history_view(self):
+        """
+        The stored history as of now, for `iter_history` calls that must all yield the same rows.
+
+        The ring buffer part is copied (at most `capacity` rows) and the archive is limited to the
+        records it holds now, so rows the collector appends later are not part of the view.
+        Returns:
+            tuple: (ring timestamps, ring counts, archive bounds or None)
+        """
+        ring_times, ring_counts = self.get_written()
+        bounds = self.archive.bounds() if self.archive is not None else None
+        return ring_times, ring_counts, bounds
+
+    def iter_history(self, start_ms=None, end_ms=None, chunk_rows=4096, view=None):
+        """
+        Every stored record in time order, from the archive and the ring buffer, in bounded chunks.
+
+        Each call takes a new `history_view()` unless one is given; exports that read the history
+        in several passes pass the same view to each of them.
+        Yields:
+            (timestamps, counts): epoch-millisecond int64 array and (n, num_buildings) array
+        """
+        ring_times, ring_counts, bounds = view if view is not None else self.history_view()
+
+        def ring_part(select):
+            keep = select
+            if start_ms is not None:
+                keep = keep & (ring_times >= start_ms)
+            if end_ms is not None:
+                keep = keep & (ring_times <= end_ms)
+            idx = np.nonzero(keep)[0]
+            for i in range(0, len(idx), chunk_rows):
+                yield ring_times[idx[i:i + chunk_rows]], ring_counts[idx[i:i + chunk_rows]]
+
+        if bounds is None:
+            yield from ring_part(np.ones(len(ring_times), dtype=bool))
+            return
+
+        # Ring rows older than the archive (written before it was enabled), the archive, then newer ring rows
+        yield from ring_part(ring_times < bounds[0])
+        archive_end = bounds[1] if end_ms is None else min(end_ms, bounds[1])
+        yield from self.archive.iter_chunks(start_ms, archive_end, chunk_rows)
+        yield from ring_part(ring_times > bounds[1])
+
+
+class OccupancyArchive:
+    """
+    Append-only monthly files of (timestamp, counts) records, so history outlives the one-week ring buffer.
+
+    Records are fixed-size, so files are read back through memmaps in bounded chunks. A record
+    whose reading time is not newer than the last archived one (an unchanged upstream reading
+    fetched again) is skipped.
+
+    Attributes:
+        archive_dir (str): Directory holding `counts-YYYY-MM.bin` files.
+        dtype (np.dtype): Record layout: int64 epoch milliseconds followed by the counts.
+        last_timestamp (int): Reading time of the newest archived record (0 if empty).
+    """
+
+    def __init__(self, archive_dir, num_buildings=22, dtype_counts=np.uint16, read_only=False):
+        self.archive_dir = archive_dir
+        self.dtype = np.dtype([('timestamp', '<i8'), ('counts', dtype_counts, (num_buildings,))])
+        if not read_only:
+            os.makedirs(archive_dir, exist_ok=True)
+        files = self.files()
+        self.last_timestamp = 0
+        if files:
+            if not read_only:
+                self._truncate_partial(files[-1])
+            records = self._records(files[-1])
+            if len(records):
+                self.last_timestamp = int(records['timestamp'][-1])
+
+    def files(self):
+        if not os.path.isdir(self.archive_dir):
+            return []
+        return sorted(
+            os.path.join(self.archive_dir, name) for name in os.listdir(self.archive_dir)
+            if name.startswith('counts-') and name.endswith('.bin')
+        )
+
+    def _truncate_partial(self, path):
+        """Drop a trailing partial record left by a crash mid-write"""
+        size = os.path.getsize(path)
+        if size % self.dtype.itemsize:
+            with open(path, 'r+b') as f:
+                f.truncate(size - size % self.dtype.itemsize)
+
+    def _records(self, path):
+        rows = os.path.getsize(path) // self.dtype.itemsize
+        if rows == 0:
+            return np.zeros(0, dtype=self.dtype)
+        return np.memmap(path, dtype=self.dtype, mode='r', shape=(rows,))
+
+    def append(self, timestamp, counts):
+        """Archive one record; returns False if it is not newer than the last archived one."""
+        if timestamp <= self.last_timestamp:
+            return False
+        record = np.zeros(1, dtype=self.dtype)
+        record['timestamp'] = timestamp
+        record['counts'] = counts
+        month = str(np.datetime64(timestamp, 'ms').astype('datetime64[M]'))
+        with open(os.path.join(self.archive_dir, f'counts-{month}.bin'), 'ab') as f:
+            f.write(record.tobytes())
+        self.last_timestamp = timestamp
+        return True
+
+    def remap_columns(self, columns):
+        """Rewrite every archive file with the columns of `RingBufferStore.remap_columns`, one file at a time."""
+        dtype = np.dtype([('timestamp', '<i8'), ('counts', self.dtype['counts'].base, (len(columns),))])
+        kept = columns >= 0
+        for path in self.files():
+            records = self._records(path)
+            remapped = np.zeros(len(records), dtype=dtype)
+            remapped['timestamp'] = records['timestamp']
+            remapped['counts'][:, kept] = records['counts'][:, columns[kept]]
+            del records
+            tmp_path = path + '.tmp'
+            remapped.tofile(tmp_path)
+            os.replace(tmp_path, path)
+        self.dtype = dtype
+
+    def bounds(self):
+        """(first, last) archived reading times in epoch ms, or None if the archive is empty."""
+        non_empty = [records for records in map(self._records, self.files()) if len(records)]
+        if not non_empty:
+            return None
+        return int(non_empty[0]['timestamp'][0]), int(non_empty[-1]['timestamp'][-1])
+
+    def iter_chunks(self, start_ms=None, end_ms=None, chunk_rows=4096):
+        """Archived records within [start_ms, end_ms] in time order, copied out in chunks of `chunk_rows`."""
+        for path in self.files():
+            records = self._records(path)
+            if not len(records):
+                continue
+            times = records['timestamp']
+            lo = 0 if start_ms is None else int(np.searchsorted(times, start_ms, side='left'))
+            hi = len(records) if end_ms is None else int(np.searchsorted(times, end_ms, side='right'))
+            for i in range(lo, hi, chunk_rows):
+                chunk = np.array(records[i:min(i + chunk_rows, hi)])
+                yield chunk['timestamp'], chunk['counts']
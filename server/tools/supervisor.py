@@ -0,0 +1,248 @@
+import logging
+import multiprocessing
+import os
+import signal
+import time
+
+from tools.log import stop_listeners
+
+logger = logging.getLogger("supervisor")
+
+_CLOCK_TICKS = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def process_usage(pid):
+    """
+    Read CPU time and resident memory of `pid` and its direct children from /proc.
+
+    Returns:
+        dict with 'cpu_seconds', 'rss_mb' and 'processes', or None if /proc is
+        unavailable (non-Linux) or the process is gone.
+    """
+    pids = [pid]
+    try:
+        for entry in os.listdir("/proc"):
+            if entry.isdigit():
+                try:
+                    with open(f"/proc/{entry}/stat", "rb") as f:
+                        fields = f.read().rsplit(b")", 1)[1].split()
+                except OSError:
+                    continue
+                if int(fields[1]) == pid:
+                    pids.append(int(entry))
+
+        cpu_ticks = 0
+        rss_pages = 0
+        for p in pids:
+            with open(f"/proc/{p}/stat", "rb") as f:
+                fields = f.read().rsplit(b")", 1)[1].split()
+            # utime and stime are fields 14 and 15 of /proc/<pid>/stat (12/13 after the comm split)
+            cpu_ticks += int(fields[11]) + int(fields[12])
+            rss_pages += int(fields[21])
+    except (OSError, IndexError, ValueError):
+        return None
+
+    return {
+        "cpu_seconds": cpu_ticks / _CLOCK_TICKS,
+        "rss_mb": rss_pages * _PAGE_SIZE / (1024 * 1024),
+        "processes": len(pids)
+    }
+
+
+def _child_main(target, args):
+    # Forked children inherit the supervisor's handlers; give them the defaults back
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    signal.signal(signal.SIGINT, signal.default_int_handler)
+    if hasattr(signal, "SIGHUP"):
+        # Until the service installs its reload handler, a forwarded SIGHUP must not end it
+        signal.signal(signal.SIGHUP, signal.SIG_IGN)
+    try:
+        target(*args)
+    finally:
+        # multiprocessing leaves via os._exit(), which skips the atexit flush of queued log records
+        stop_listeners()
+
+
+class ManagedProcess:
+    """
+    One supervised child process.
+
+    Attributes:
+        name (str): Display name used in status lines.
+        target (callable): Function run in the child process.
+        args (tuple): Positional arguments for `target`.
+        health_check (callable | None): Called with no arguments; returns True when healthy.
+        start_grace (float): Seconds after start during which failed health checks are ignored.
+        max_failures (int): Consecutive failed health checks before the process is restarted.
+    """
+
+    def __init__(self, name, target, args=(), health_check=None, start_grace=30.0, max_failures=3):
+        self.name = name
+        self.target = target
+        self.args = args
+        self.health_check = health_check
+        self.start_grace = start_grace
+        self.max_failures = max_failures
+
+        self.process = None
+        self.started_at = None
+        self.restarts = 0
+        self.failures = 0
+        self.next_start = 0.0
+        self.backoff = 0.0
+
+    @property
+    def pid(self):
+        return self.process.pid if self.process is not None else None
+
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+
+
+class Supervisor:
+    """
+    Runs several ManagedProcess instances, restarts them with exponential
+    backoff when they exit or fail their health checks, and drains them on
+    SIGTERM/SIGINT. SIGHUP is forwarded to every child (config reload).
+
+    Attributes:
+        check_interval (float): Seconds between liveness/health checks.
+        report_interval (float): Seconds between resource usage reports (0 disables them).
+        drain_timeout (float): Seconds to wait after SIGTERM before killing a child.
+        min_backoff (float): First restart delay.
+        max_backoff (float): Upper bound for the restart delay.
+        stable_after (float): Uptime after which the backoff resets.
+    """
+
+    def __init__(self, check_interval=5.0, report_interval=300.0, drain_timeout=30.0,
+                 min_backoff=1.0, max_backoff=60.0, stable_after=300.0):
+        self.check_interval = check_interval
+        self.report_interval = report_interval
+        self.drain_timeout = drain_timeout
+        self.min_backoff = min_backoff
+        self.max_backoff = max_backoff
+        self.stable_after = stable_after
+
+        self.processes = []
+        self._stopping = False
+        self._context = multiprocessing.get_context("fork")
+
+    def add(self, managed):
+        self.processes.append(managed)
+        return managed
+
+    def _start(self, managed):
+        managed.process = self._context.Process(
+            target=_child_main, args=(managed.target, managed.args), name=managed.name
+        )
+        managed.process.start()
+        managed.started_at = time.monotonic()
+        managed.failures = 0
+        logger.info("Started %s (pid %d)", managed.name, managed.pid)
+
+    def _schedule_restart(self, managed, reason):
+        uptime = time.monotonic() - managed.started_at if managed.started_at else 0
+        if uptime >= self.stable_after:
+            managed.backoff = 0.0
+        managed.backoff = min(self.max_backoff, managed.backoff * 2 if managed.backoff else self.min_backoff)
+        managed.next_start = time.monotonic() + managed.backoff
+        managed.restarts += 1
+        logger.warning("%s %s after %.0fs, restarting in %.0fs (restart #%d)",
+                       managed.name, reason, uptime, managed.backoff, managed.restarts)
+
+    def _terminate(self, managed, timeout):
+        if not managed.is_alive():
+            return
+        managed.process.terminate()
+        self._join_or_kill(managed, timeout)
+
+    def _join_or_kill(self, managed, timeout):
+        if managed.process is None:
+            return
+        managed.process.join(timeout)
+        if managed.process.is_alive():
+            logger.warning("%s did not stop within %.0fs, killing it", managed.name, timeout)
+            managed.process.kill()
+            managed.process.join()
+
+    def _check(self, managed):
+        now = time.monotonic()
+        if managed.process is None:
+            if now >= managed.next_start:
+                self._start(managed)
+            return
+
+        if not managed.process.is_alive():
+            exitcode = managed.process.exitcode
+            managed.process = None
+            self._schedule_restart(managed, f"exited with code {exitcode}")
+            return
+
+        if managed.health_check is None or now - managed.started_at < managed.start_grace:
+            return
+
+        try:
+            healthy = managed.health_check()
+        except Exception as e:
+            logger.debug("Health check for %s raised: %s", managed.name, e)
+            healthy = False
+
+        if healthy:
+            managed.failures = 0
+            return
+
+        managed.failures += 1
+        logger.warning("%s failed health check (%d/%d)", managed.name, managed.failures, managed.max_failures)
+        if managed.failures >= managed.max_failures:
+            self._terminate(managed, self.drain_timeout)
+            managed.process = None
+            self._schedule_restart(managed, "was unhealthy")
+
+    def report(self):
+        """Log CPU time, RSS and restart count of every supervised process."""
+        for managed in self.processes:
+            usage = process_usage(managed.pid) if managed.is_alive() else None
+            if usage is None:
+                logger.info("%s: not running (restarts: %d)", managed.name, managed.restarts)
+                continue
+            logger.info("%s: pid %d, %d process(es), cpu %.1fs, rss %.1f MB, restarts %d",
+                        managed.name, managed.pid, usage["processes"], usage["cpu_seconds"],
+                        usage["rss_mb"], managed.restarts)
+
+    def stop(self, signum=None, frame=None):
+        self._stopping = True
+
+    def forward(self, signum, frame=None):
+        """Pass `signum` on to every running process (SIGHUP: reload config.json)."""
+        for managed in self.processes:
+            if managed.is_alive():
+                os.kill(managed.pid, signum)
+
+    def run(self):
+        """Start all processes and supervise them until SIGTERM/SIGINT, then drain them."""
+        signal.signal(signal.SIGTERM, self.stop)
+        signal.signal(signal.SIGINT, self.stop)
+        if hasattr(signal, "SIGHUP"):
+            signal.signal(signal.SIGHUP, self.forward)
+
+        last_report = time.monotonic()
+        try:
+            while not self._stopping:
+                for managed in self.processes:
+                    self._check(managed)
+
+                if self.report_interval and time.monotonic() - last_report >= self.report_interval:
+                    self.report()
+                    last_report = time.monotonic()
+
+                deadline = time.monotonic() + self.check_interval
+                while not self._stopping and time.monotonic() < deadline:
+                    time.sleep(0.2)
+        finally:
+            logger.info("Draining %d process(es)...", sum(m.is_alive() for m in self.processes))
+            for managed in self.processes:
+                if managed.is_alive():
+                    managed.process.terminate()
+            for managed in self.processes:
+                self._join_or_kill(managed, self.drain_timeout)
@@ -0,0 +1,200 @@
+"""
+Synthetic SeatFinder responses in the exact shape `tools.decoder.SeatFinderDecoder` expects.
+
+Used by the benchmarks and the local SeatFinder stand-in; nothing in the
+production path imports this module.
+"""
+import json
+import math
+import random
+from datetime import datetime, timedelta
+
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S.%f"
+
+# Locations that never close in the synthetic week; everything else follows WEEKLY_HOURS
+ALWAYS_OPEN = {"LSG", "LSM", "LST", "LSN", "LSW", "LBS"}
+WEEKLY_HOURS = {
+    0: ("08:00", "22:00"),
+    1: ("08:00", "22:00"),
+    2: ("08:00", "22:00"),
+    3: ("08:00", "22:00"),
+    4: ("08:00", "20:00"),
+    5: ("10:00", "18:00"),
+}
+
+
+def _timestamp(when):
+    return {"date": when.strftime(DATE_FORMAT), "timezone_type": 3, "timezone": "Europe/Berlin"}
+
+
+def is_open(code, when):
+    """Whether `code` is open at `when` in the synthetic schedule."""
+    if code in ALWAYS_OPEN:
+        return True
+    hours = WEEKLY_HOURS.get(when.weekday())
+    if hours is None:
+        return False
+    return hours[0] <= when.strftime("%H:%M") < hours[1]
+
+
+def opening_hours(code, when):
+    """SeatFinder-style `weekly_opening_hours` for the week containing `when`."""
+    monday = (when - timedelta(days=when.weekday())).replace(hour=0, minute=0, second=0, microsecond=0)
+    if code in ALWAYS_OPEN:
+        return {"weekly_opening_hours": [[
+            _timestamp(monday),
+            _timestamp(monday.replace(hour=23, minute=59))
+        ]]}
+
+    intervals = []
+    for weekday, (start, end) in sorted(WEEKLY_HOURS.items()):
+        day = monday + timedelta(days=weekday)
+        start_h, start_m = map(int, start.split(":"))
+        end_h, end_m = map(int, end.split(":"))
+        intervals.append([
+            _timestamp(day.replace(hour=start_h, minute=start_m)),
+            _timestamp(day.replace(hour=end_h, minute=end_m))
+        ])
+    return {"weekly_opening_hours": intervals}
+
+
+def occupancy(when, rng=None):
+    """Fraction of seats taken at `when`: a midday peak, quieter weekends, a little noise."""
+    hour = when.hour + when.minute / 60
+    peak = math.exp(-((hour - 14.0) ** 2) / 12.0)
+    level = 0.85 if when.weekday() < 5 else 0.45
+    noise = rng.gauss(0, 0.04) if rng is not None else 0.0
+    return min(1.0, max(0.0, 0.05 + level * peak + noise))
+
+
+def free_seats(code, max_seats, when, rng=None):
+    if not is_open(code, when):
+        return 0
+    return int(round(max_seats * (1 - occupancy(when, rng))))
+
+
+def synthetic_payload(config, when=None, rng=None, history=1, closed=(), interval_minutes=5):
+    """
+    Build one SeatFinder response body for all configured locations.
+
+    Args:
+        config (AppConfig): Supplies location codes and max_seats_list.
+        when (datetime): Reading time of the newest entry (default: now).
+        rng (random.Random): Noise source; pass a seeded instance for reproducible data.
+        history (int): Number of readings per location, newest first (upstream sends up to 17).
+        closed (iterable[str]): Extra codes to report as closed (empty estimate list).
+    Returns:
+        list: `[{"seatestimate": {...}}, {"location": {...}}]`
+    """
+    when = when or datetime.now()
+    rng = rng or random.Random(0)
+    closed = set(closed)
+    codes = config.location_codes
+    max_seats = config.forecast_config["max_seats_list"]
+
+    seat_estimate = {}
+    location = {}
+    for code, seats in zip(codes, max_seats):
+        readings = []
+        if code not in closed and is_open(code, when):
+            for i in range(history):
+                reading_time = when - timedelta(minutes=i * interval_minutes)
+                free = free_seats(code, seats, reading_time, rng)
+                readings.append({
+                    "timestamp": _timestamp(reading_time),
+                    "location_name": code,
+                    "free_seats": free,
+                    "occupied_seats": seats - free
+                })
+        seat_estimate[code] = readings
+
+        location[code] = [{
+            "name": code,
+            "long_name": f"Synthetic library {code}",
+            "url": None,
+            "building": None,
+            "level": None,
+            "room": None,
+            "geo_coordinates": "49.011;8.416",
+            "available_seats": seats,
+            "timestamp": _timestamp(when),
+            "super_location": None,
+            "opening_hours": opening_hours(code, when),
+            "sub_locations": []
+        }]
+
+    return [{"seatestimate": seat_estimate}, {"location": location}]
+
+
+SCENARIOS = ("normal", "closures", "empty", "malformed", "mixed")
+MALFORMED_VARIANTS = (
+    "truncated", "no_wrapper", "html", "not_a_list", "missing_location", "location_not_dict", "null_seats",
+    "bad_timestamp"
+)
+
+
+def to_jsonp(data, callback="jQuery_callback"):
+    """Wrap `data` the way the SeatFinder endpoint does."""
+    return f"{callback}({json.dumps(data)});"
+
+
+def malformed_body(config, when, rng, callback="jQuery_callback", variant=None):
+    """A broken response of one of MALFORMED_VARIANTS (random if `variant` is None)."""
+    variant = variant or rng.choice(MALFORMED_VARIANTS)
+    payload = synthetic_payload(config, when, rng)
+
+    if variant == "truncated":
+        text = to_jsonp(payload, callback)
+        return text[:len(text) // 2]
+    if variant == "no_wrapper":
+        return json.dumps(payload)
+    if variant == "html":
+        return "<html><body><h1>502 Bad Gateway</h1></body></html>"
+    if variant == "not_a_list":
+        return to_jsonp({"seatestimate": payload[0]["seatestimate"]}, callback)
+    if variant == "missing_location":
+        payload[0]["seatestimate"].pop(rng.choice(list(payload[0]["seatestimate"])))
+        return to_jsonp(payload, callback)
+    if variant == "location_not_dict":
+        payload[1]["location"] = list(payload[1]["location"].values())
+        return to_jsonp(payload, callback)
+    if variant == "null_seats":
+        for readings in payload[0]["seatestimate"].values():
+            for reading in readings:
+                reading["free_seats"] = None
+        return to_jsonp(payload, callback)
+    if variant == "bad_timestamp":
+        # A date string, but without the fraction of DATE_FORMAT
+        readings = next(readings for readings in payload[0]["seatestimate"].values() if readings)
+        readings[0]["timestamp"]["date"] = when.strftime("%Y-%m-%d %H:%M:%S")
+        return to_jsonp(payload, callback)
+    raise ValueError(f"Unknown malformed variant {variant!r}")
+
+
+def scenario_body(config, when, rng, scenario="normal", callback="jQuery_callback", history=1):
+    """
+    Response body text for one request under `scenario`.
+
+    normal: every location reports per the synthetic schedule.
+    closures: additionally closes a random ~30% of the locations.
+    empty: every seatestimate list is empty.
+    malformed: one of MALFORMED_VARIANTS.
+    mixed: mostly normal, with occasional closures, empty and malformed responses.
+    """
+    if scenario == "mixed":
+        scenario = rng.choices(("normal", "closures", "empty", "malformed"), weights=(85, 8, 2, 5))[0]
+
+    if scenario == "normal":
+        return to_jsonp(synthetic_payload(config, when, rng, history=history), callback)
+    if scenario == "closures":
+        codes = config.location_codes
+        closed = rng.sample(codes, k=max(1, int(len(codes) * 0.3)))
+        return to_jsonp(synthetic_payload(config, when, rng, history=history, closed=closed), callback)
+    if scenario == "empty":
+        payload = synthetic_payload(config, when, rng, history=history)
+        for code in payload[0]["seatestimate"]:
+            payload[0]["seatestimate"][code] = []
+        return to_jsonp(payload, callback)
+    if scenario == "malformed":
+        return malformed_body(config, when, rng, callback)
+    raise ValueError(f"Unknown scenario {scenario!r}, expected one of {', '.join(SCENARIOS)}")
@@ -0,0 +1,36 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class PhaseTimer:
+    """
+    Records how long named startup phases take.
+
+    Phases may run on different threads (e.g. a background warm-up), so
+    recording is guarded by a lock. `summary()` renders the phases in the
+    order they finished.
+    """
+
+    def __init__(self):
+        self.created = time.perf_counter()
+        self.phases = []
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.phases.append((name, time.perf_counter() - start))
+
+    def elapsed(self):
+        """Seconds since the timer was created."""
+        return time.perf_counter() - self.created
+
+    def summary(self):
+        with self._lock:
+            parts = [f"{name} {duration * 1000:.0f}ms" for name, duration in self.phases]
+        return ", ".join(parts) if parts else "no phases recorded"
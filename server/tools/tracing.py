@@ -0,0 +1,160 @@
+"""
+Per-stage timing of collector cycles.
+
+A cycle is opened with `Tracer.cycle()` on the thread that runs it; `span(name)` anywhere
+below it (fetcher, storage, forecaster) then records how long that stage took. Outside a
+cycle `span` only costs a thread-local lookup, so the instrumentation stays in production.
+Finished cycles go into a fixed-size ring that can be summarized or dumped as JSON.
+"""
+import json
+import os
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+_local = threading.local()
+
+
+class CycleTrace:
+    """
+    Spans of one cycle.
+
+    Attributes:
+        label (str): What ran (e.g. the site name).
+        started (float): Wall-clock start (epoch seconds).
+        duration (float): Seconds from start to end, None while running.
+        spans (list[tuple[str, int, float, float]]): (stage, depth, start offset, duration) in seconds,
+            in the order the stages finished.
+        status (str): Outcome set by the caller, e.g. "ok" or "fetch_failed".
+    """
+
+    __slots__ = ("label", "started", "duration", "spans", "status", "_start", "_depth")
+
+    def __init__(self, label):
+        self.label = label
+        self.started = time.time()
+        self.duration = None
+        self.spans = []
+        self.status = None
+        self._start = time.perf_counter()
+        self._depth = 0
+
+    def stage_totals(self):
+        """Seconds per top-level stage (repeated stages are summed)."""
+        totals = {}
+        for name, depth, _, duration in self.spans:
+            if depth == 0:
+                totals[name] = totals.get(name, 0.0) + duration
+        return totals
+
+    def as_dict(self):
+        return {
+            "label": self.label,
+            "started": self.started,
+            "duration_ms": round(self.duration * 1000, 3) if self.duration is not None else None,
+            "status": self.status,
+            "spans": [
+                {"stage": name, "depth": depth, "offset_ms": round(offset * 1000, 3),
+                 "duration_ms": round(duration * 1000, 3)}
+                for name, depth, offset, duration in self.spans
+            ]
+        }
+
+    def describe(self):
+        """One-line breakdown, e.g. "fetch 812ms, forecast 35ms, ..."."""
+        return ", ".join(f"{name} {seconds * 1000:.0f}ms" for name, seconds in self.stage_totals().items())
+
+
+@contextmanager
+def span(name):
+    """Time the enclosed block as stage `name` of the current thread's cycle, if there is one."""
+    trace = getattr(_local, "trace", None)
+    if trace is None:
+        yield
+        return
+    depth = trace._depth
+    trace._depth = depth + 1
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        end = time.perf_counter()
+        trace._depth = depth
+        trace.spans.append((name, depth, start - trace._start, end - start))
+
+
+class Tracer:
+    """
+    Ring of the most recent `capacity` cycle traces.
+
+    Attributes:
+        capacity (int): Number of cycles kept (288 is one day of 5-minute cycles for one site).
+        slow_seconds (float): Cycles longer than this are reported by `cycle()`'s `on_slow` callback.
+    """
+
+    def __init__(self, capacity=288, slow_seconds=None):
+        self.capacity = capacity
+        self.slow_seconds = slow_seconds
+        self._lock = threading.Lock()
+        self._cycles = deque(maxlen=capacity)
+
+    @contextmanager
+    def cycle(self, label, on_slow=None):
+        """
+        Trace one cycle run on the calling thread; yields its CycleTrace.
+
+        `on_slow(trace)` is called after a cycle that took longer than `slow_seconds`.
+        """
+        trace = CycleTrace(label)
+        previous = getattr(_local, "trace", None)
+        _local.trace = trace
+        try:
+            yield trace
+        finally:
+            _local.trace = previous
+            trace.duration = time.perf_counter() - trace._start
+            with self._lock:
+                self._cycles.append(trace)
+            if on_slow is not None and self.slow_seconds is not None and trace.duration > self.slow_seconds:
+                on_slow(trace)
+
+    def recent(self, n=None, label=None):
+        """Finished cycles, oldest first; optionally only the last `n` and only those of `label`."""
+        with self._lock:
+            cycles = [trace for trace in self._cycles if label is None or trace.label == label]
+        return cycles[-n:] if n else cycles
+
+    def summary(self, label=None):
+        """{stage: {"count", "p50_ms", "p95_ms", "max_ms"}} over the cycles in the ring, plus "cycle"."""
+        samples = {}
+        for trace in self.recent(label=label):
+            samples.setdefault("cycle", []).append(trace.duration)
+            for name, seconds in trace.stage_totals().items():
+                samples.setdefault(name, []).append(seconds)
+
+        result = {}
+        for name, values in samples.items():
+            values.sort()
+            result[name] = {
+                "count": len(values),
+                "p50_ms": round(values[(len(values) - 1) // 2] * 1000, 3),
+                "p95_ms": round(values[min(len(values) - 1, int(len(values) * 0.95))] * 1000, 3),
+                "max_ms": round(values[-1] * 1000, 3)
+            }
+        return result
+
+    def dump(self, path):
+        """Write the summary and every cycle in the ring to `path` as JSON (atomically)."""
+        document = {
+            "dumped_at": time.time(),
+            "pid": os.getpid(),
+            "capacity": self.capacity,
+            "summary": self.summary(),
+            "cycles": [trace.as_dict() for trace in self.recent()]
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump(document, f, indent=1)
+        os.replace(tmp_path, path)
+        return path
@@ -0,0 +1,174 @@
+"""
+Compact binary form of the /api/libraries snapshot for clients on metered connections.
+
+Served instead of JSON when the request accepts `application/x-platzpilot`. A body is a
+fixed header, an optional metadata block and packed integer arrays, all little-endian:
+
+    header     magic "PPWF", format version, flags, prediction steps, snapshot version,
+               publish time (epoch seconds), metadata id, number of locations, metadata length
+    metadata   UTF-8 JSON {"groups": {group: [location index, ...]}, "locations": [static entry, ...]}
+               (omitted, length 0, when the client already holds the metadata with this id)
+    free       free seats per location
+    closed     one byte per location, 1 if closed
+    predictions  free seats per location and step, row-major
+
+Counts are int16 (flag FLAG_INT16) when every value fits, else int32. The static part of an
+entry (name, coordinates, opening hours, ...) changes rarely, so the metadata id (CRC-32 of
+the block) usually stays the same across snapshot versions: a client sends it back as
+`?meta=<id>` and then only receives the arrays. A location missing from the snapshot keeps
+its code (a string) in place of the static entry, as in the JSON form.
+"""
+import json
+import struct
+import threading
+import zlib
+
+import numpy as np
+
+CONTENT_TYPE = 'application/x-platzpilot'
+FORMAT_VERSION = 1
+FLAG_INT16 = 1
+
+# magic, format version, flags, steps, snapshot version, publish time, metadata id, locations, metadata length
+_HEADER = struct.Struct('<4sBBHQdIII')
+_MAGIC = b'PPWF'
+_DYNAMIC = ('free_seats_currently', 'predictions', 'is_closed')
+
+
+def metadata_id_hex(metadata_id):
+    """Form of a metadata id used in `?meta=`."""
+    return f"{metadata_id:08x}"
+
+
+def _encode_parts(document):
+    """(metadata block, metadata id, flags, steps, locations, packed arrays) of a snapshot document."""
+    groups = {}
+    statics = []
+    free = []
+    closed = []
+    predictions = []
+    steps = 0
+    for group, entries in document.items():
+        indices = groups[group] = []
+        for entry in entries:
+            indices.append(len(statics))
+            if not isinstance(entry, dict):
+                # Location missing from the payload: its code stands in for the entry
+                statics.append(entry)
+                free.append(0)
+                closed.append(True)
+                predictions.append(())
+                continue
+            statics.append({key: value for key, value in entry.items() if key not in _DYNAMIC})
+            free.append(entry.get('free_seats_currently') or 0)
+            closed.append(bool(entry.get('is_closed')))
+            predictions.append(entry.get('predictions') or ())
+            steps = max(steps, len(predictions[-1]))
+
+    forecast = np.zeros((len(statics), steps), dtype=np.int64)
+    for i, row in enumerate(predictions):
+        forecast[i, :len(row)] = np.rint(row)
+    counts = np.asarray(free, dtype=np.int64)
+
+    low = min(counts.min(initial=0), forecast.min(initial=0))
+    high = max(counts.max(initial=0), forecast.max(initial=0))
+    flags = FLAG_INT16 if -2 ** 15 <= low and high < 2 ** 15 else 0
+    dtype = '<i2' if flags & FLAG_INT16 else '<i4'
+
+    metadata = json.dumps({'groups': groups, 'locations': statics}, ensure_ascii=False,
+                          separators=(',', ':')).encode('utf-8')
+    arrays = b''.join((counts.astype(dtype).tobytes(), np.asarray(closed, dtype=np.uint8).tobytes(),
+                       forecast.astype(dtype).tobytes()))
+    return metadata, zlib.crc32(metadata), flags, steps, len(statics), arrays
+
+
+def encode(document, version=0, published_at=0.0, include_metadata=True):
+    """Binary form of a snapshot document ({group: [entry, ...]} as published by the collector)."""
+    metadata, metadata_id, flags, steps, locations, arrays = _encode_parts(document)
+    if not include_metadata:
+        metadata = b''
+    header = _HEADER.pack(_MAGIC, FORMAT_VERSION, flags, steps, version, published_at, metadata_id, locations,
+                          len(metadata))
+    return b''.join((header, metadata, arrays))
+
+
+def decode(body, metadata=None):
+    """
+    Rebuild the snapshot document from a binary body.
+
+    Args:
+        body (bytes): Response body.
+        metadata (dict): Metadata block of an earlier response, needed if `body` omits it.
+    Returns:
+        tuple[dict, dict]: (document, {"version", "published_at", "metadata_id", "metadata"});
+        predictions come back as integers.
+    Raises:
+        ValueError: If the body is not in this format, or omits metadata that was not given.
+    """
+    if len(body) < _HEADER.size:
+        raise ValueError("Body shorter than the header")
+    magic, format_version, flags, steps, version, published_at, metadata_id, locations, length = \
+        _HEADER.unpack_from(body)
+    if magic != _MAGIC or format_version != FORMAT_VERSION:
+        raise ValueError(f"Not a version {FORMAT_VERSION} PlatzPilot body")
+
+    offset = _HEADER.size
+    if length:
+        metadata = json.loads(bytes(body[offset:offset + length]))
+        offset += length
+    elif metadata is None:
+        raise ValueError(f"Body refers to metadata {metadata_id_hex(metadata_id)} that was not given")
+
+    dtype = np.dtype('<i2' if flags & FLAG_INT16 else '<i4')
+    free = np.frombuffer(body, dtype, locations, offset)
+    offset += free.nbytes
+    closed = np.frombuffer(body, np.uint8, locations, offset)
+    offset += closed.nbytes
+    forecast = np.frombuffer(body, dtype, locations * steps, offset).reshape(locations, steps)
+
+    entries = []
+    free, closed, forecast = free.tolist(), closed.tolist(), forecast.tolist()
+    for i, static in enumerate(metadata['locations']):
+        if isinstance(static, dict):
+            static = dict(static, free_seats_currently=free[i], predictions=forecast[i], is_closed=bool(closed[i]))
+        entries.append(static)
+    document = {group: [entries[i] for i in indices] for group, indices in metadata['groups'].items()}
+    return document, {"version": version, "published_at": published_at, "metadata_id": metadata_id,
+                      "metadata": metadata}
+
+
+class WireIndex:
+    """
+    Binary bodies of a JSON snapshot, encoded once per published version.
+
+    Both variants are kept: with the metadata block, and without it for clients that
+    already hold the metadata of the current id.
+    """
+
+    def __init__(self, reader):
+        self.reader = reader
+        self._lock = threading.Lock()
+        self._version = None
+        self._metadata_id = None
+        self._full = None
+        self._arrays_only = None
+
+    def lookup(self, metadata_id=None):
+        """
+        (Snapshot, body bytes) for a client holding metadata `metadata_id` (hex, or None).
+
+        Returns None if nothing was published yet.
+        """
+        snapshot = self.reader.read()
+        if snapshot is None:
+            return None
+
+        with self._lock:
+            if self._version != snapshot.version:
+                metadata, crc, flags, steps, locations, arrays = _encode_parts(json.loads(snapshot.payload))
+                parts = (FORMAT_VERSION, flags, steps, snapshot.version, snapshot.published_at, crc, locations)
+                self._full = b''.join((_HEADER.pack(_MAGIC, *parts, len(metadata)), metadata, arrays))
+                self._arrays_only = b''.join((_HEADER.pack(_MAGIC, *parts, 0), arrays))
+                self._metadata_id = metadata_id_hex(crc)
+                self._version = snapshot.version
+            return snapshot, self._arrays_only if metadata_id == self._metadata_id else self._full
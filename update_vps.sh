@@ -31,9 +31,7 @@ if [ ! -d "PlatzPilot-KA" ]; then
     exit 1
 fi
 
-# Stop the service
-print_status "⏹️  Stopping PlatzPilot service..."
-sudo systemctl stop platzpilot
+# The service keeps serving while the code is updated; it is only restarted at the end
 
 # Backup current version (optional)
 BACKUP_DIR="PlatzPilot-KA-backup-$(date +%Y%m%d-%H%M%S)"
@@ -62,11 +60,16 @@ fi
 cd ..
 
 # Restart service
-print_status "🚀 Starting PlatzPilot service..."
-sudo systemctl start platzpilot
+print_status "🚀 Restarting PlatzPilot service..."
+sudo systemctl restart platzpilot
 
-# Wait for service to start
-sleep 5
+# Wait for the API to answer (it serves the last published snapshot right after binding)
+for _ in $(seq 1 50); do
+    if curl -s http://localhost:8080/api/health > /dev/null; then
+        break
+    fi
+    sleep 0.2
+done
 
 # Check service status
 if sudo systemctl is-active --quiet platzpilot; then